@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profile archive benchmark
+
+Compares a profile archive against a zip of the same pretty-printed JSON
+profiles: file size, time to pack a directory, time to open the file and
+read one profile (averaged over random profiles, opening the file each
+time) and time to read every profile.
+
+Usage: python benchmarks/bench_archive.py [--profiles N] [--folders N] [--reads N] [--jobs N]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sandbox_config import (
+    SANDBOX_SHARED_FOLDER, MappedFolder, SandboxConfig, ProfileArchive,
+    archive_profiles, find_profiles, format_size, save_profile
+)
+
+
+def make_profiles(directory, count, folders):
+    """Write count varied JSON profiles under directory, as the window saves them"""
+    for i in range(count):
+        config = SandboxConfig(
+            vgpu_enabled=i % 2 == 0,
+            networking_enabled=i % 3 != 0,
+            memory_mb=4096 + (i % 8) * 512,
+            logon_command="C:\\Windows\\System32\\cmd.exe" if i % 4 else "",
+            mapped_folders=[
+                MappedFolder(f"D:\\Projects\\team{i % 50}\\repo{(i + j) % 400}",
+                             f"{SANDBOX_SHARED_FOLDER}\\repo{j}",
+                             j % 3 != 0)
+                for j in range(folders)
+            ],
+            hostname_enabled=True,
+            hostname_value=f"Sandbox{i}"
+        )
+        team = os.path.join(directory, f"team{i % 50}")
+        os.makedirs(team, exist_ok=True)
+        save_profile(config.to_dict(), os.path.join(team, f"profile{i}.json"))
+
+
+def pack_zip(source_dir, zip_path):
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for path in find_profiles(source_dir):
+            archive.write(path, os.path.relpath(path, source_dir).replace(os.sep, '/'))
+
+
+def pack_archive(source_dir, archive_path, jobs):
+    errors = [error for _, error, _ in archive_profiles(source_dir, archive_path, jobs) if error]
+    if errors:
+        raise SystemExit(f"archive failed: {errors[0]}")
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def read_one_zip(zip_path, name):
+    with zipfile.ZipFile(zip_path) as archive:
+        return json.loads(archive.read(name))
+
+
+def read_one_archive(archive_path, name):
+    with ProfileArchive(archive_path) as archive:
+        return archive.load(name)
+
+
+def read_all_zip(zip_path):
+    with zipfile.ZipFile(zip_path) as archive:
+        return [json.loads(archive.read(name)) for name in archive.namelist()]
+
+
+def read_all_archive(archive_path):
+    with ProfileArchive(archive_path) as archive:
+        return [config for name, config in archive.items()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=5000, help="number of profiles")
+    parser.add_argument("--folders", type=int, default=20, help="mapped folders per profile")
+    parser.add_argument("--reads", type=int, default=200, help="random single-profile reads to average")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes for packing the archive")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_dir = os.path.join(directory, "profiles")
+        zip_path = os.path.join(directory, "profiles.zip")
+        archive_path = os.path.join(directory, "profiles.sbxa")
+        make_profiles(source_dir, args.profiles, args.folders)
+        json_size = sum(os.path.getsize(path) for path in find_profiles(source_dir))
+
+        zip_pack = timed(pack_zip, source_dir, zip_path)
+        archive_pack = timed(pack_archive, source_dir, archive_path, args.jobs)
+
+        with ProfileArchive(archive_path) as archive:
+            names = list(archive)
+        # Both formats must hold the same profiles
+        assert read_all_zip(zip_path) == read_all_archive(archive_path)
+
+        picks = random.Random(0).choices(names, k=args.reads)
+        zip_one = timed(lambda: [read_one_zip(zip_path, name) for name in picks]) / args.reads
+        archive_one = timed(lambda: [read_one_archive(archive_path, name) for name in picks]) / args.reads
+        zip_all = timed(read_all_zip, zip_path)
+        archive_all = timed(read_all_archive, archive_path)
+
+        zip_size = os.path.getsize(zip_path)
+        archive_size = os.path.getsize(archive_path)
+
+    print(f"{args.profiles} profiles, {args.folders} folders each, {format_size(json_size)} of JSON")
+    print(f"{'':<10} {'size':>10} {'pack':>9} {'open+read one':>14} {'read all':>9}")
+    for label, size, pack, one, everything in (
+        ("zip+json", zip_size, zip_pack, zip_one, zip_all),
+        ("archive", archive_size, archive_pack, archive_one, archive_all),
+    ):
+        print(f"{label:<10} {format_size(size):>10} {pack:>8.2f}s {one * 1000:>12.3f}ms {everything:>8.2f}s")
+    print(f"archive is {zip_size / archive_size:.1f}x smaller, reads one profile "
+          f"{zip_one / archive_one:.1f}x and all profiles {zip_all / archive_all:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mapped folders table benchmark
+
+Loads large folder lists into MappedFoldersWidget under the offscreen Qt
+platform and times the initial load (including the first paint), a single
+append and a single removal.
+
+Usage: python benchmarks/bench_folders_table.py [--rows N ...]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtWidgets import QApplication
+
+from sandbox_config import MappedFolder
+from sandbox_window import MappedFoldersWidget
+
+
+def make_folders(rows):
+    return [
+        MappedFolder(f"D:\\Projects\\team{i % 50}\\repo{i}",
+                     f"C:\\Users\\WDAGUtilityAccount\\Desktop\\Shared\\repo{i}",
+                     i % 3 != 0)
+        for i in range(rows)
+    ]
+
+
+def timed(app, func):
+    start = time.perf_counter()
+    func()
+    app.processEvents()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="row counts to benchmark")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    widget = MappedFoldersWidget()
+    widget.resize(900, 600)
+    widget.show()
+    app.processEvents()
+
+    print(f"{'rows':>8} {'load':>9} {'append':>9} {'remove':>9}")
+    for rows in args.rows:
+        folders = make_folders(rows)
+        load = timed(app, lambda: widget.set_folders(folders))
+        append = timed(app, lambda: widget.model.append_folder(MappedFolder("D:\\extra", "C:\\extra")))
+        remove = timed(app, lambda: widget.model.remove_rows(0))
+        print(f"{rows:>8} {load:>8.4f}s {append:>8.4f}s {remove:>8.4f}s")
+
+    # Stop background folder checks and scans, as the main window does on close
+    widget.shutdown()
+    widget.close()
+    app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
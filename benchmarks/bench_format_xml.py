@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XML formatting benchmark
+
+Compares the legacy tostring + minidom pretty-print path against the
+single-pass writer, both to a string (format_xml) and streamed to a new
+file the way exports are saved (save_wsb, which also includes building
+the tree, hashing and file I/O), on configurations with many mapped
+folders.
+
+Usage: python benchmarks/bench_format_xml.py [--folders N ...] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from xml.dom import minidom
+from xml.etree.ElementTree import tostring
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sandbox_config import MappedFolder, SandboxConfig, build_wsb_xml, format_xml, save_wsb
+
+
+def legacy_format_xml(element):
+    """The previous tostring -> minidom -> toprettyxml implementation"""
+    return minidom.parseString(tostring(element, 'unicode')).toprettyxml(indent="  ")[23:]
+
+
+def make_config(folders):
+    return SandboxConfig(
+        memory_mb=8192,
+        logon_command="C:\\Windows\\System32\\cmd.exe",
+        mapped_folders=[
+            MappedFolder(f"D:\\Projects\\team{i % 50}\\repo{i}",
+                         f"C:\\Users\\WDAGUtilityAccount\\Desktop\\Shared\\repo{i}",
+                         i % 3 != 0)
+            for i in range(folders)
+        ]
+    )
+
+
+def best_of(repeat, func):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--folders", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="mapped folder counts to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions, best time is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        target = os.path.join(tmp, "bench.wsb")
+
+        def export():
+            # A fresh file each time, or save_wsb would find it unchanged
+            if os.path.exists(target):
+                os.remove(target)
+            save_wsb(config, target)
+
+        print(f"{'folders':>8} {'minidom':>10} {'format_xml':>11} {'save_wsb':>10} {'speedup':>8}")
+        for folders in args.folders:
+            config = make_config(folders)
+            element = build_wsb_xml(config)
+            if legacy_format_xml(element) != format_xml(element):
+                sys.exit(f"Output mismatch at {folders} folders")
+
+            legacy = best_of(args.repeat, lambda: legacy_format_xml(element))
+            single = best_of(args.repeat, lambda: format_xml(element))
+            direct = best_of(args.repeat, export)
+            print(f"{folders:>8} {legacy:>9.3f}s {single:>10.3f}s {direct:>9.3f}s {legacy / single:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
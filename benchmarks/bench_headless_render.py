@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Headless render benchmark
+
+Compares configs/second for rendering WSB files straight from SandboxConfig
+against the GUI path (load_configuration + generate_wsb_xml on a window).
+Also times a headless batch compile and checks that neither headless run
+imported PySide6.
+
+Usage: python benchmarks/bench_headless_render.py [--configs N] [--folders N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sandbox_config import MappedFolder, SandboxConfig, compile_profiles, render_wsb
+
+
+def make_configs(count, folders):
+    """Build a list of varied configuration dictionaries"""
+    configs = []
+    for i in range(count):
+        config = SandboxConfig(
+            vgpu_enabled=i % 2 == 0,
+            networking_enabled=i % 3 != 0,
+            audio_input_enabled=i % 5 == 0,
+            memory_mb=4096 + (i % 8) * 512,
+            logon_command="C:\\Windows\\System32\\cmd.exe" if i % 4 else "",
+            mapped_folders=[
+                MappedFolder(f"C:\\Data\\profile{i}\\folder{j}",
+                             f"C:\\Users\\WDAGUtilityAccount\\Desktop\\Shared\\folder{j}",
+                             j % 2 == 0)
+                for j in range(folders)
+            ],
+            hostname_enabled=True,
+            hostname_value=f"Sandbox{i}"
+        )
+        configs.append(config.to_dict())
+    return configs
+
+
+def bench_headless(configs):
+    start = time.perf_counter()
+    for data in configs:
+        render_wsb(SandboxConfig.from_dict(data))
+    return time.perf_counter() - start
+
+
+def bench_compile(configs, jobs):
+    with tempfile.TemporaryDirectory() as directory:
+        for i, data in enumerate(configs):
+            with open(os.path.join(directory, f"profile{i}.json"), 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+
+        start = time.perf_counter()
+        errors = [error for _, error, _ in compile_profiles(directory, directory, jobs) if error]
+        elapsed = time.perf_counter() - start
+    if errors:
+        raise SystemExit(f"compile failed: {errors[0]}")
+    return elapsed
+
+
+def bench_gui(configs):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtCore import QStandardPaths
+    from PySide6.QtWidgets import QApplication
+    from sandbox_window import SandboxConfigTool
+
+    # Keep the crash-recovery journal away from the user's real one
+    QStandardPaths.setTestModeEnabled(True)
+    start = time.perf_counter()
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = SandboxConfigTool()
+    startup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in configs:
+        window.load_configuration(data)
+        window.format_xml(window.generate_wsb_xml())
+    elapsed = time.perf_counter() - start
+
+    # Close without saving this window's geometry over the user's settings, and
+    # tear it down before the application to avoid a crash at exit
+    window.save_settings = lambda: None
+    window.close()
+    del window
+    app.processEvents()
+    return startup, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--configs", type=int, default=2000, help="number of configurations")
+    parser.add_argument("--folders", type=int, default=5, help="mapped folders per configuration")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes for the compile run")
+    parser.add_argument("--no-gui", action="store_true", help="skip the GUI comparison")
+    args = parser.parse_args()
+
+    configs = make_configs(args.configs, args.folders)
+
+    elapsed = bench_headless(configs)
+    print(f"headless: {len(configs) / elapsed:10.1f} configs/s ({elapsed:.3f}s)")
+
+    elapsed = bench_compile(configs, args.jobs)
+    print(f"compile:  {len(configs) / elapsed:10.1f} configs/s ({elapsed:.3f}s)")
+
+    # Headless rendering and compiling must never pull in Qt
+    if "PySide6" in sys.modules:
+        raise SystemExit("headless path imported PySide6")
+
+    if not args.no_gui:
+        startup, elapsed = bench_gui(configs)
+        print(f"gui:      {len(configs) / elapsed:10.1f} configs/s ({elapsed:.3f}s, "
+              f"+{startup:.3f}s window startup)")
+
+
+if __name__ == "__main__":
+    main()
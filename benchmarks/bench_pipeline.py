@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Configuration pipeline benchmark suite
+
+Times the main window's configuration pipeline (generate_wsb_xml,
+format_xml, get_current_configuration, load_configuration, save_to_file
+and MappedFoldersWidget.refresh_table) under the offscreen Qt platform at
+10 to 100k mapped folders. Results are written as JSON and can be
+compared against a stored baseline; the exit code is 1 if any timing
+regressed past the threshold. A fixed calibration workload is timed
+alongside every measurement and baseline timings are scaled by how much
+faster or slower it ran, so drift in machine speed between runs is not
+reported as a regression.
+
+Usage: python benchmarks/bench_pipeline.py [--folders N ...] [--repeat N]
+           [--output FILE] [--baseline FILE [--update-baseline]]
+           [--threshold RATIO] [--min-delta SECONDS] [--no-normalize]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PySide6
+from PySide6.QtCore import QStandardPaths
+from PySide6.QtWidgets import QApplication
+
+from sandbox_config import MappedFolder, SandboxConfig
+from sandbox_window import SandboxConfigTool
+
+# Bumped when cases or their setup change, so old baselines are not compared
+SUITE_VERSION = 1
+
+
+def make_config(folders):
+    return SandboxConfig(
+        memory_mb=8192,
+        logon_command="C:\\Windows\\System32\\cmd.exe",
+        mapped_folders=[
+            MappedFolder(f"D:\\Projects\\team{i % 50}\\repo{i}",
+                         f"C:\\Users\\WDAGUtilityAccount\\Desktop\\Shared\\repo{i}",
+                         i % 3 != 0)
+            for i in range(folders)
+        ],
+        hostname_enabled=True,
+        hostname_value="Bench"
+    ).to_dict()
+
+
+class Calibration:
+    """Best time of a fixed pure-Python workload that does not touch the code under test
+
+    Sampled next to every measurement, so it sees the same machine state
+    the benchmarks did.
+    """
+
+    def __init__(self):
+        self.best = float('inf')
+
+    def sample(self):
+        table = {}
+        start = time.perf_counter()
+        for i in range(50000):
+            key = f"key{i % 5000}"
+            table[key] = table.get(key, 0) + i
+        sorted(table.items())
+        self.best = min(self.best, time.perf_counter() - start)
+
+
+def settle(app, window):
+    """Run the event loop until previews, journal writes and background checks are done"""
+    app.processEvents()
+    while (window.preview_timer.isActive() or window.journal_timer.isActive()
+           or window.mapped_folders_widget.busy):
+        time.sleep(0.01)
+        app.processEvents()
+    # Deliver results queued by workers that just finished
+    app.processEvents()
+
+
+def best_of(repeat, app, window, calibration, setup, func):
+    """Best wall time of func over repeat runs, each after setup and a settled event loop"""
+    best = float('inf')
+    for run in range(repeat):
+        setup(run)
+        settle(app, window)
+        # Like timeit, keep collector pauses out of the measurement
+        gc.collect()
+        gc.disable()
+        try:
+            calibration.sample()
+            start = time.perf_counter()
+            func(run)
+            app.processEvents()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+def run_suite(app, window, calibration, sizes, repeat, directory):
+    """Return {case: {size: seconds}}"""
+    results = {}
+    table = window.mapped_folders_widget
+
+    def record(case, folders, seconds):
+        results.setdefault(case, {})[str(folders)] = seconds
+
+    for folders in sizes:
+        config = make_config(folders)
+        loaded = lambda run: window.load_configuration(config)
+        nothing = lambda run: None
+
+        record("load_configuration", folders, best_of(
+            repeat, app, window, calibration, lambda run: window.load_configuration(make_config(0)), loaded
+        ))
+        window.load_configuration(config)
+        element = window.generate_wsb_xml()
+        record("generate_wsb_xml", folders, best_of(
+            repeat, app, window, calibration, nothing, lambda run: window.generate_wsb_xml()
+        ))
+        record("format_xml", folders, best_of(
+            repeat, app, window, calibration, nothing, lambda run: window.format_xml(element)
+        ))
+        record("get_current_configuration", folders, best_of(
+            repeat, app, window, calibration, nothing, lambda run: window.get_current_configuration()
+        ))
+        # A new file every run, so nothing is skipped as unchanged
+        record("save_to_file", folders, best_of(
+            repeat, app, window, calibration, nothing,
+            lambda run: window.save_to_file(os.path.join(directory, f"bench{folders}-{run}.json"))
+        ))
+        record("refresh_table", folders, best_of(
+            repeat, app, window, calibration, nothing, lambda run: table.refresh_table()
+        ))
+        print(f"{folders:>8} folders: " + "  ".join(
+            f"{case} {timings[str(folders)]:.4f}s" for case, timings in results.items()
+        ))
+        sys.stdout.flush()
+    return results
+
+
+def compare(results, baseline, threshold, min_delta, scale=1.0):
+    """Print timings against baseline, returning the regressions as (case, size, old, new)
+
+    Baseline timings are multiplied by scale before comparing.
+    """
+    regressions = []
+    print(f"\n{'case':<26} {'folders':>8} {'baseline':>10} {'current':>10} {'change':>8}")
+    for case, timings in results.items():
+        for size, seconds in timings.items():
+            old = baseline.get(case, {}).get(size)
+            if old is None:
+                continue
+            old *= scale
+            change = (seconds - old) / old if old > 0 else 0.0
+            regressed = change > threshold and seconds - old > min_delta
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{case:<26} {size:>8} {old:>9.4f}s {seconds:>9.4f}s {change:>+7.0%}{flag}")
+            if regressed:
+                regressions.append((case, size, old, seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--folders", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000],
+                        help="mapped folder counts to benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions, best time is reported")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results stored in this JSON file")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store these results as the new --baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fractional slowdown that counts as a regression (default: 0.25)")
+    parser.add_argument("--min-delta", type=float, default=0.005,
+                        help="ignore slowdowns smaller than this many seconds (default: 0.005)")
+    parser.add_argument("--no-normalize", action="store_true",
+                        help="compare raw timings without scaling by the calibration run")
+    args = parser.parse_args()
+
+    calibration = Calibration()
+
+    # Keep the crash-recovery journal away from the user's real one
+    QStandardPaths.setTestModeEnabled(True)
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = SandboxConfigTool()
+    window.resize(1200, 800)
+    window.show()
+    window.ensure_all_tabs()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = run_suite(app, window, calibration, args.folders, args.repeat, directory)
+
+    # Close without saving this window's geometry over the user's settings
+    window.save_settings = lambda: None
+    window.close()
+    del window
+    app.processEvents()
+
+    report = {
+        'suite_version': SUITE_VERSION,
+        'python': platform.python_version(),
+        'pyside6': PySide6.__version__,
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'calibration': calibration.best,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if not args.baseline:
+        return 0
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('suite_version') != SUITE_VERSION:
+        print(f"Baseline is from suite version {baseline.get('suite_version')}, "
+              f"not {SUITE_VERSION}; re-record it with --update-baseline", file=sys.stderr)
+        return 2
+    scale = 1.0
+    if not args.no_normalize and baseline.get('calibration'):
+        scale = calibration.best / baseline['calibration']
+        print(f"\nThis machine ran the calibration workload {scale:.2f}x as long as the baseline's")
+    regressions = compare(results, baseline['results'], args.threshold, args.min_delta, scale)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
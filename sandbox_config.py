@@ -0,0 +1,2993 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Windows Sandbox configuration model
+
+The configuration model, JSON profile load/save, WSB rendering and import,
+batch compilation and the profile library. Nothing here imports Qt, so
+scripts and batch worker processes never load PySide6.
+"""
+
+import sys
+import os
+import re
+import ntpath
+import json
+import time
+import sqlite3
+import stat
+import mmap
+import struct
+import uuid
+import shutil
+import hashlib
+import difflib
+import threading
+import functools
+import multiprocessing
+from collections import deque, OrderedDict
+from xml.etree.ElementTree import Element, SubElement, iterparse
+
+__all__ = [
+    # Configuration model and mapped folder checks
+    "SANDBOX_SHARED_FOLDER", "MIN_MEMORY_MB", "MAX_MEMORY_MB",
+    "normalize_host_path", "normalize_sandbox_path",
+    "FOLDER_OK", "FOLDER_MISSING", "FOLDER_NOT_DIRECTORY", "check_host_folder",
+    "format_size", "scan_folder_size", "MappedFolder", "SandboxConfig",
+    "ISSUE_ERROR", "ISSUE_WARNING", "ISSUE_INFO", "ISSUE_SEVERITIES", "MappingIssue",
+    "MAPPING_RULES", "validate_mappings", "format_issue_counts",
+    # Tracing
+    "SpanStats", "Tracer", "tracer", "traced",
+    # WSB rendering, parsing and saving
+    "WSB_SECTIONS", "build_wsb_xml", "WsbPreviewRenderer", "diff_lines",
+    "write_xml", "format_xml", "render_wsb", "write_wsb",
+    "load_profile", "write_if_changed", "stream_if_changed", "save_profile", "save_wsb",
+    "WSB_DEFAULTS", "WSB_TOGGLES", "parse_wsb", "load_config_file",
+    # Comparing, merging and inheriting profiles
+    "SCALAR_FIELDS", "ProfileDiff", "diff_profiles", "merge_profiles", "format_conflicts",
+    "PROFILE_BASE_KEY", "apply_profile_overrides", "derive_profile",
+    "ProfileResolver", "profile_resolver", "resolve_profile",
+    # Batch commands
+    "find_profiles", "compile_profile", "compile_profiles", "import_wsb_file", "import_wsb_files",
+    "run_compile", "run_import", "ProfileWatcher", "run_watch", "run_diff", "run_merge",
+    "summarize_profile", "ProfileLibrary",
+    "PRESETS", "BulkEdit", "bulk_edit_profile", "BULK_EDIT_PARALLEL_THRESHOLD",
+    "bulk_edit_profiles", "run_bulk_edit",
+    "ARCHIVE_EXTENSION", "ARCHIVE_MAGIC", "ARCHIVE_VERSION",
+    "ProfileArchiveWriter", "ProfileArchive", "archive_profiles", "extract_profiles",
+    "extract_archive", "run_archive", "run_extract",
+    # Editing state: crash recovery journals, undo and caching
+    "apply_journal_edit", "EditJournal", "DOCUMENT_JOURNALS_DIR", "document_journal_dirs",
+    "recover_journal", "UndoHistory", "LruCache",
+]
+
+
+# Default location of shared folders inside the sandbox
+SANDBOX_SHARED_FOLDER = "C:\\Users\\WDAGUtilityAccount\\Desktop\\Shared"
+
+# Memory settings the window accepts, in MB
+MIN_MEMORY_MB = 512
+MAX_MEMORY_MB = 32768
+
+
+def normalize_host_path(path):
+    """Normalize a host folder path for comparison, '' for an empty path"""
+    return os.path.normcase(os.path.normpath(path)) if path else ''
+
+
+def normalize_sandbox_path(path):
+    """Normalize a sandbox (always Windows) folder path for comparison"""
+    if not path:
+        return ''
+    path = ntpath.normcase(path)
+    # normpath is comparatively slow, skip it for already-clean paths
+    if '.' in path or '\\\\' in path[1:] or path.endswith('\\'):
+        path = ntpath.normpath(path)
+    return path
+
+
+# Host folder validation results
+FOLDER_OK = "OK"
+FOLDER_MISSING = "Missing"
+FOLDER_NOT_DIRECTORY = "Not a folder"
+
+
+def check_host_folder(path):
+    """Stat a host folder and return one of the FOLDER_* statuses or an error"""
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return FOLDER_MISSING
+    except OSError as e:
+        return f"Error: {e.strerror or e}"
+    except Exception as e:
+        # Paths os.stat rejects outright, such as one containing a NUL
+        return f"Error: {e}"
+    return FOLDER_OK if stat.S_ISDIR(mode) else FOLDER_NOT_DIRECTORY
+
+
+def _check_host_folders(paths):
+    return {path: check_host_folder(path) for path in paths}
+
+
+def format_size(num_bytes):
+    """Human readable byte count"""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if num_bytes < 1024 or unit == "TB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+def scan_folder_size(path, cache, cancelled=None, progress=None, interval=0.2):
+    """Total size and file count of everything under path
+
+    cache maps directory -> (mtime_ns, files size, file count, subdirectories)
+    and is updated in place. A directory whose mtime is unchanged is not
+    listed again, so rescans only walk subtrees where entries were added,
+    removed or renamed. progress(size, count) receives running totals every
+    interval seconds. Returns (size, count), or None once cancelled is set.
+    """
+    total_size = total_count = 0
+    stack = [path]
+    last_report = time.monotonic()
+    while stack:
+        if cancelled is not None and cancelled.is_set():
+            return None
+        directory = stack.pop()
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            continue
+
+        entry = cache.get(directory)
+        if entry is None or entry[0] != mtime_ns:
+            size = count = 0
+            subdirectories = []
+            try:
+                with os.scandir(directory) as entries:
+                    for item in entries:
+                        try:
+                            if item.is_dir(follow_symlinks=False):
+                                subdirectories.append(item.path)
+                            elif item.is_file(follow_symlinks=False):
+                                size += item.stat(follow_symlinks=False).st_size
+                                count += 1
+                        except OSError:
+                            pass
+            except OSError:
+                continue
+            entry = (mtime_ns, size, count, subdirectories)
+            cache[directory] = entry
+
+        total_size += entry[1]
+        total_count += entry[2]
+        stack.extend(entry[3])
+        if progress is not None and time.monotonic() - last_report >= interval:
+            progress(total_size, total_count)
+            last_report = time.monotonic()
+    return total_size, total_count
+
+
+class MappedFolder:
+    """Represents a mapped folder configuration"""
+    __slots__ = ('host_folder', 'sandbox_folder', 'read_only')
+
+    def __init__(self, host_folder="", sandbox_folder="", read_only=True):
+        self.host_folder = host_folder
+        self.sandbox_folder = sandbox_folder
+        self.read_only = read_only
+
+    def copy(self):
+        return MappedFolder(self.host_folder, self.sandbox_folder, self.read_only)
+
+    def to_dict(self):
+        return {
+            'host_folder': self.host_folder,
+            'sandbox_folder': self.sandbox_folder,
+            'read_only': self.read_only
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get('host_folder', ''),
+            data.get('sandbox_folder', ''),
+            data.get('read_only', True)
+        )
+
+
+class SandboxConfig:
+    """Widget-free sandbox configuration model"""
+    __slots__ = (
+        'vgpu_enabled', 'networking_enabled', 'audio_input_enabled',
+        'video_input_enabled', 'protected_client_enabled',
+        'printer_redirection_enabled', 'clipboard_redirection_enabled',
+        'memory_mb', 'logon_command', 'mapped_folders',
+        'hostname_enabled', 'hostname_value', 'force_dark_mode'
+    )
+
+    def __init__(self, vgpu_enabled=True, networking_enabled=True,
+                 audio_input_enabled=False, video_input_enabled=False,
+                 protected_client_enabled=False, printer_redirection_enabled=False,
+                 clipboard_redirection_enabled=True, memory_mb=4096,
+                 logon_command="", mapped_folders=None,
+                 hostname_enabled=False, hostname_value="", force_dark_mode=False):
+        self.vgpu_enabled = vgpu_enabled
+        self.networking_enabled = networking_enabled
+        self.audio_input_enabled = audio_input_enabled
+        self.video_input_enabled = video_input_enabled
+        self.protected_client_enabled = protected_client_enabled
+        self.printer_redirection_enabled = printer_redirection_enabled
+        self.clipboard_redirection_enabled = clipboard_redirection_enabled
+        self.memory_mb = memory_mb
+        self.logon_command = logon_command
+        self.mapped_folders = mapped_folders if mapped_folders is not None else []
+        self.hostname_enabled = hostname_enabled
+        self.hostname_value = hostname_value
+        self.force_dark_mode = force_dark_mode
+
+    def to_dict(self):
+        """Convert to the dictionary format used by saved JSON files"""
+        config = {name: getattr(self, name) for name in self.__slots__}
+        config['mapped_folders'] = [folder.to_dict() for folder in self.mapped_folders]
+        return config
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            vgpu_enabled=data.get('vgpu_enabled', True),
+            networking_enabled=data.get('networking_enabled', True),
+            audio_input_enabled=data.get('audio_input_enabled', False),
+            video_input_enabled=data.get('video_input_enabled', False),
+            protected_client_enabled=data.get('protected_client_enabled', False),
+            printer_redirection_enabled=data.get('printer_redirection_enabled', False),
+            clipboard_redirection_enabled=data.get('clipboard_redirection_enabled', True),
+            memory_mb=data.get('memory_mb', 4096),
+            logon_command=data.get('logon_command', ''),
+            mapped_folders=[MappedFolder.from_dict(folder) for folder in data.get('mapped_folders', [])],
+            hostname_enabled=data.get('hostname_enabled', False),
+            hostname_value=data.get('hostname_value', ''),
+            force_dark_mode=data.get('force_dark_mode', False)
+        )
+
+
+# Mapping issue severities, most serious first
+ISSUE_ERROR = "error"
+ISSUE_WARNING = "warning"
+ISSUE_INFO = "info"
+ISSUE_SEVERITIES = (ISSUE_ERROR, ISSUE_WARNING, ISSUE_INFO)
+
+
+class MappingIssue:
+    """A problem found by validate_mappings, naming the rows involved"""
+    __slots__ = ('severity', 'rule', 'rows', 'message')
+
+    def __init__(self, severity, rule, rows, message):
+        self.severity = severity
+        self.rule = rule
+        self.rows = rows
+        self.message = message
+
+    def __repr__(self):
+        return f"MappingIssue({self.severity!r}, {self.rule!r}, {self.rows!r}, {self.message!r})"
+
+
+# Sandbox folders must be absolute paths on a drive
+_ABSOLUTE_SANDBOX_PATH = re.compile(r'[A-Za-z]:[\\/]')
+
+
+def _prefix_keys(paths, normalize, sep):
+    """(key, row) pairs of normalized paths ending in one separator, skipping empty paths
+
+    The trailing separator makes prefix tests match whole path components.
+    """
+    keys = []
+    for row, path in enumerate(paths):
+        if path:
+            key = normalize(path)
+            keys.append((key if key.endswith(sep) else key + sep, row))
+    return keys
+
+
+def _nested_paths(keys):
+    """Yield (outer, inner, same) for rows whose path equals or lies inside another's
+
+    keys holds (prefix_key, row) pairs. After sorting, every path inside
+    a folder directly follows that folder, so a stack of enclosing paths
+    finds each row's nearest enclosing one in O(n log n) overall. Equal
+    paths pair with the first row that has the path.
+    """
+    stack = []
+    for key, row in sorted(keys):
+        while stack and not key.startswith(stack[-1][0]):
+            stack.pop()
+        if not stack:
+            stack.append((key, row))
+        elif stack[-1][0] == key:
+            yield stack[-1][1], row, True
+        else:
+            yield stack[-1][1], row, False
+            stack.append((key, row))
+
+
+def _describe_mapping(folder):
+    return f"{folder.host_folder} -> {folder.sandbox_folder}"
+
+
+def _check_incomplete(folders, host_keys, sandbox_keys):
+    for row, folder in enumerate(folders):
+        if not folder.host_folder or not folder.sandbox_folder:
+            missing = "host" if not folder.host_folder else "sandbox"
+            yield MappingIssue(
+                ISSUE_WARNING, 'incomplete', (row,),
+                f"Row {row + 1} has no {missing} folder and is left out of the .wsb"
+            )
+
+
+def _check_absolute(folders, host_keys, sandbox_keys):
+    isabs = os.path.isabs
+    for row, folder in enumerate(folders):
+        if folder.sandbox_folder and not _ABSOLUTE_SANDBOX_PATH.match(folder.sandbox_folder):
+            yield MappingIssue(
+                ISSUE_ERROR, 'relative-sandbox', (row,),
+                f"Sandbox folder is not an absolute path: {folder.sandbox_folder}"
+            )
+        if folder.host_folder and not isabs(folder.host_folder):
+            yield MappingIssue(
+                ISSUE_WARNING, 'relative-host', (row,),
+                f"Host folder is not an absolute path: {folder.host_folder}"
+            )
+
+
+def _check_sandbox_overlap(folders, host_keys, sandbox_keys):
+    for outer, inner, same in _nested_paths(sandbox_keys):
+        if same:
+            yield MappingIssue(
+                ISSUE_ERROR, 'duplicate-sandbox', (outer, inner),
+                f"{_describe_mapping(folders[inner])} uses the same sandbox folder as "
+                f"{_describe_mapping(folders[outer])}"
+            )
+        else:
+            yield MappingIssue(
+                ISSUE_INFO, 'nested-sandbox', (outer, inner),
+                f"{_describe_mapping(folders[inner])} is mounted inside "
+                f"{_describe_mapping(folders[outer])} and hides anything at that path"
+            )
+
+
+def _check_host_overlap(folders, host_keys, sandbox_keys):
+    for outer, inner, same in _nested_paths(host_keys):
+        if folders[outer].read_only != folders[inner].read_only:
+            writable = outer if not folders[outer].read_only else inner
+            yield MappingIssue(
+                ISSUE_WARNING, 'duplicate-host' if same else 'nested-host', (outer, inner),
+                f"{_describe_mapping(folders[inner])} and {_describe_mapping(folders[outer])} "
+                f"share host files but only {folders[writable].host_folder} is writable"
+            )
+        elif same:
+            yield MappingIssue(
+                ISSUE_INFO, 'duplicate-host', (outer, inner),
+                f"{folders[inner].host_folder} is mapped more than once"
+            )
+
+
+# Checks run by validate_mappings, each a generator of MappingIssue
+MAPPING_RULES = (_check_incomplete, _check_absolute, _check_sandbox_overlap, _check_host_overlap)
+
+
+def validate_mappings(folders, rules=MAPPING_RULES):
+    """Check a list of MappedFolder objects for conflicting mappings
+
+    Every rule is given the folders plus (prefix_key, row) lists of their
+    normalized host and sandbox paths. Overlap rules sort these once
+    instead of comparing every pair. Returns issues ordered by severity
+    and then by row.
+    """
+    host_keys = _prefix_keys([folder.host_folder for folder in folders], normalize_host_path, os.sep)
+    sandbox_keys = _prefix_keys(
+        [folder.sandbox_folder for folder in folders], normalize_sandbox_path, '\\'
+    )
+
+    issues = [issue for rule in rules for issue in rule(folders, host_keys, sandbox_keys)]
+    issues.sort(key=lambda issue: (ISSUE_SEVERITIES.index(issue.severity), issue.rows))
+    return issues
+
+
+def format_issue_counts(issues):
+    """Summarize issues as counts per severity, such as: 1 error, 2 warnings"""
+    counts = {}
+    for issue in issues:
+        counts[issue.severity] = counts.get(issue.severity, 0) + 1
+    return ", ".join(
+        f"{counts[severity]} {severity}{'s' if counts[severity] != 1 else ''}"
+        for severity in ISSUE_SEVERITIES if severity in counts
+    )
+
+
+class SpanStats:
+    """Call count, recent durations and bytes written for one span name"""
+
+    # Percentiles are taken over this many of the most recent calls
+    MAX_SAMPLES = 1000
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.last = 0.0
+        self.total = 0.0
+        self.bytes = 0
+        self.samples = deque(maxlen=self.MAX_SAMPLES)
+
+    def add(self, seconds, written):
+        self.count += 1
+        self.last = seconds
+        self.total += seconds
+        self.bytes += written
+        self.samples.append(seconds)
+
+    def percentile(self, fraction):
+        """Nearest-rank percentile of the recent durations, in seconds"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _Span:
+    """An open span on one thread, closed by its with block"""
+
+    __slots__ = ('tracer', 'name', 'start', 'bytes', 'stack')
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+        self.bytes = 0
+
+    def __enter__(self):
+        self.stack = self.tracer._stack()
+        self.stack.append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        self.stack.pop()
+        self.tracer._record(self, end)
+        return False
+
+
+class _NullSpan:
+    """Stand-in returned by Tracer.span while recording is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Timing spans from instrumented code paths, kept while enabled
+
+    Each finished span updates its name's SpanStats and is kept, up to
+    MAX_EVENTS, for export as a Chrome trace (chrome://tracing, Perfetto).
+    Bytes reported by add_bytes count towards every span open on the
+    calling thread. While disabled, instrumented calls only pay for the
+    enabled check.
+    """
+
+    MAX_EVENTS = 100000
+
+    def __init__(self):
+        self.enabled = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread_names = {}
+        self.reset()
+
+    def reset(self):
+        """Drop all recorded spans and statistics"""
+        with self._lock:
+            self.events = deque(maxlen=self.MAX_EVENTS)
+            self.stats = {}
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = stack = []
+            return stack
+
+    def span(self, name):
+        """Context manager timing its block as name"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def add_bytes(self, count):
+        """Count written bytes towards the spans open on this thread"""
+        if not self.enabled:
+            return
+        for span in self._stack():
+            span.bytes += count
+
+    def _record(self, span, end):
+        thread = threading.current_thread()
+        with self._lock:
+            self._thread_names.setdefault(thread.ident, thread.name)
+            self.events.append((span.name, span.start, end - span.start, thread.ident, span.bytes))
+            stats = self.stats.get(span.name)
+            if stats is None:
+                stats = self.stats[span.name] = SpanStats(span.name)
+            stats.add((end - span.start) / 1e9, span.bytes)
+
+    def snapshot(self):
+        """SpanStats for every recorded name, sorted by name"""
+        with self._lock:
+            return [self.stats[name] for name in sorted(self.stats)]
+
+    def chrome_trace(self):
+        """The recorded spans as a Chrome trace-event dictionary"""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self._thread_names)
+        trace = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in threads.items()
+        ]
+        for name, start, duration, tid, written in events:
+            event = {
+                'name': name, 'cat': 'sandboxgui', 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': start / 1000, 'dur': duration / 1000,
+            }
+            if written:
+                event['args'] = {'bytes': written}
+            trace.append(event)
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        """Write the recorded spans to path as Chrome trace-event JSON"""
+        write_if_changed(path, json.dumps(self.chrome_trace()))
+
+
+tracer = Tracer()
+
+
+def traced(name):
+    """Decorator timing every call of a function as a tracer span called name"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with _Span(tracer, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _toggle_elements(config):
+    """Build the on/off toggle and memory elements"""
+    elements = []
+
+    # VGpu, Networking and ClipboardRedirection are only written when disabled
+    if not config.vgpu_enabled:
+        elements.append(_text_element("VGpu", "Disable"))
+    if not config.networking_enabled:
+        elements.append(_text_element("Networking", "Disable"))
+
+    elements.append(_text_element("AudioInput", "Enable" if config.audio_input_enabled else "Disable"))
+    elements.append(_text_element("VideoInput", "Enable" if config.video_input_enabled else "Disable"))
+    elements.append(_text_element("ProtectedClient", "Enable" if config.protected_client_enabled else "Disable"))
+    elements.append(_text_element("PrinterRedirection", "Enable" if config.printer_redirection_enabled else "Disable"))
+
+    if not config.clipboard_redirection_enabled:
+        elements.append(_text_element("ClipboardRedirection", "Disable"))
+
+    # MemoryInMB, only included if not default
+    if config.memory_mb != 4096:
+        elements.append(_text_element("MemoryInMB", str(config.memory_mb)))
+
+    return elements
+
+
+def _mapped_folder_elements(config):
+    """Build the MappedFolders element"""
+    if not config.mapped_folders:
+        return []
+
+    mapped_folders = Element("MappedFolders")
+    for folder in config.mapped_folders:
+        if folder.host_folder and folder.sandbox_folder:
+            mapped_folder = SubElement(mapped_folders, "MappedFolder")
+            SubElement(mapped_folder, "HostFolder").text = folder.host_folder
+            SubElement(mapped_folder, "SandboxFolder").text = folder.sandbox_folder
+            SubElement(mapped_folder, "ReadOnly").text = "true" if folder.read_only else "false"
+    return [mapped_folders]
+
+
+def _logon_command_elements(config):
+    """Build the LogonCommand element"""
+    logon_command = config.logon_command.strip()
+    if not logon_command:
+        return []
+
+    element = Element("LogonCommand")
+    SubElement(element, "Command").text = logon_command
+    return [element]
+
+
+def _hostname_elements(config):
+    """Build the HostName element"""
+    hostname_value = config.hostname_value.strip()
+    if config.hostname_enabled and hostname_value:
+        return [_text_element("HostName", hostname_value)]
+    return []
+
+
+def _theme_elements(config):
+    """Build the WindowsAppTheme (Dark Mode) element"""
+    if config.force_dark_mode:
+        return [_text_element("WindowsAppTheme", "Dark")]
+    return []
+
+
+def _text_element(tag, text):
+    element = Element(tag)
+    element.text = text
+    return element
+
+
+# Top-level sections of a WSB document in output order, as
+# (name, function returning the inputs the section depends on, element builder)
+WSB_SECTIONS = (
+    ('toggles',
+     lambda config: (config.vgpu_enabled, config.networking_enabled,
+                     config.audio_input_enabled, config.video_input_enabled,
+                     config.protected_client_enabled, config.printer_redirection_enabled,
+                     config.clipboard_redirection_enabled, config.memory_mb),
+     _toggle_elements),
+    ('mapped_folders',
+     lambda config: tuple((folder.host_folder, folder.sandbox_folder, folder.read_only)
+                          for folder in config.mapped_folders),
+     _mapped_folder_elements),
+    ('logon_command', lambda config: config.logon_command, _logon_command_elements),
+    ('hostname', lambda config: (config.hostname_enabled, config.hostname_value), _hostname_elements),
+    ('theme', lambda config: config.force_dark_mode, _theme_elements),
+)
+
+
+@traced("generate_wsb_xml")
+def build_wsb_xml(config):
+    """Build the WSB XML element tree for a SandboxConfig"""
+    root = Element("Configuration")
+    for _name, _inputs, build in WSB_SECTIONS:
+        root.extend(build(config))
+    return root
+
+
+class WsbPreviewRenderer:
+    """Renders WSB text section by section, caching each section's fragment
+
+    A section is only re-serialized when its inputs change. Callers that
+    track their own folder revision can pass it as folders_key to avoid
+    comparing every mapped folder on each render.
+    """
+    def __init__(self):
+        self._fragments = {}
+
+    @traced("render_preview")
+    def render(self, config, folders_key=None):
+        body = []
+        for name, inputs, build in WSB_SECTIONS:
+            if name == 'mapped_folders' and folders_key is not None:
+                key = folders_key
+            else:
+                key = inputs(config)
+            cached = self._fragments.get(name)
+            if cached is None or cached[0] != key:
+                chunks = []
+                for element in build(config):
+                    write_xml(element, chunks.append, "  ")
+                cached = (key, "".join(chunks))
+                self._fragments[name] = cached
+            body.append(cached[1])
+
+        if not any(body):
+            return "<Configuration/>\n"
+        return "<Configuration>\n" + "".join(body) + "</Configuration>\n"
+
+    def invalidate(self):
+        self._fragments.clear()
+
+
+def _common_prefix(a, b, block=4096):
+    """Length of the longest common prefix of two strings"""
+    limit = min(len(a), len(b))
+    start = 0
+    # Whole blocks compare at C speed; only the differing one is walked
+    while start < limit:
+        end = min(start + block, limit)
+        if a[start:end] != b[start:end]:
+            while a[start] == b[start]:
+                start += 1
+            return start
+        start = end
+    return limit
+
+
+def _common_suffix(a, b, limit, block=4096):
+    """Length of the longest common suffix of two strings, at most limit"""
+    length_a, length_b = len(a), len(b)
+    matched = 0
+    while matched < limit:
+        step = min(block, limit - matched)
+        if a[length_a - matched - step:length_a - matched] != b[length_b - matched - step:length_b - matched]:
+            while a[length_a - matched - 1] == b[length_b - matched - 1]:
+                matched += 1
+            return matched
+        matched += step
+    return limit
+
+
+def _line_count(text, start, end):
+    """Lines, counting a final one without a newline, in text[start:end]"""
+    count = text.count('\n', start, end)
+    if end == len(text) and end > start and text[end - 1] != '\n':
+        count += 1
+    return count
+
+
+def _split_lines(text):
+    """Lines of text with their newlines, split like a QTextDocument (not splitlines)"""
+    lines = [line + '\n' for line in text.split('\n')]
+    last = lines.pop()
+    if last != '\n':
+        lines.append(last[:-1])
+    return lines
+
+
+def diff_lines(old, new, refine_limit=1000):
+    """Line hunks turning text old into new, as (first, old_count, new_text)
+
+    first and old_count select lines of old to replace with new_text.
+    Unchanged lines at the start and end are found by comparing whole
+    blocks of text, so a small edit in a large document costs about one
+    pass over it. The changed region between them is split further with
+    difflib when neither side is over refine_limit lines. Hunks are in
+    document order.
+    """
+    if old == new:
+        return []
+    prefix = _common_prefix(old, new)
+    suffix = _common_suffix(old, new, min(len(old), len(new)) - prefix)
+    # Widen the changed region to whole lines on both sides
+    prefix = old.rfind('\n', 0, prefix) + 1
+    old_end, new_end = len(old) - suffix, len(new) - suffix
+    if suffix and not ((old_end == 0 or old[old_end - 1] == '\n')
+                       and (new_end == 0 or new[new_end - 1] == '\n')):
+        newline = old.find('\n', old_end)
+        skip = newline + 1 - old_end if newline != -1 else suffix
+        old_end += skip
+        new_end += skip
+
+    first = old.count('\n', 0, prefix)
+    old_count = _line_count(old, prefix, old_end)
+    if old_count > refine_limit or new.count('\n', prefix, new_end) > refine_limit:
+        return [(first, old_count, new[prefix:new_end])]
+
+    old_lines = _split_lines(old[prefix:old_end])
+    new_lines = _split_lines(new[prefix:new_end])
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [
+        (first + i1, i2 - i1, "".join(new_lines[j1:j2]))
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal'
+    ]
+
+
+# Characters that are not allowed anywhere in an XML 1.0 document
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+# minidom escapes double quotes in text content before Python 3.13
+_ESCAPE_TEXT_QUOTES = sys.version_info < (3, 13)
+
+
+def _escape_xml(text, attribute=False):
+    """Escape text the way a serialize/parse/pretty-print round trip would"""
+    if _INVALID_XML_CHARS.search(text):
+        raise ValueError(f"Invalid XML character in {text!r}")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    if '"' in text and (attribute or _ESCAPE_TEXT_QUOTES):
+        text = text.replace('"', "&quot;")
+    return text
+
+
+def write_xml(element, write, indent="", addindent="  "):
+    """Write an element tree as indented XML in a single pass
+
+    Output is identical to pretty-printing the tree through minidom, but no
+    intermediate string or DOM is built. write is called with successive
+    chunks, e.g. a file's write method or a list's append.
+    """
+    tag = element.tag
+    if element.attrib:
+        tag_open = tag + "".join(
+            f' {name}="{_escape_xml(value, True)}"' for name, value in element.attrib.items()
+        )
+    else:
+        tag_open = tag
+    text = element.text
+
+    if not len(element):
+        if text:
+            write(f"{indent}<{tag_open}>{_escape_xml(text)}</{tag}>\n")
+        else:
+            write(f"{indent}<{tag_open}/>\n")
+        return
+
+    write(f"{indent}<{tag_open}>\n")
+    child_indent = indent + addindent
+    if text:
+        write(f"{child_indent}{_escape_xml(text)}\n")
+    for child in element:
+        write_xml(child, write, child_indent, addindent)
+        if child.tail:
+            write(f"{child_indent}{_escape_xml(child.tail)}\n")
+    write(f"{indent}</{tag}>\n")
+
+
+@traced("format_xml")
+def format_xml(element):
+    """Format XML with proper indentation"""
+    chunks = []
+    write_xml(element, chunks.append)
+    return "".join(chunks)
+
+
+@traced("render_wsb")
+def render_wsb(config):
+    """Render a SandboxConfig to formatted WSB text without any widgets"""
+    return format_xml(build_wsb_xml(config))
+
+
+@traced("write_wsb")
+def write_wsb(config, f):
+    """Write a SandboxConfig as WSB XML straight to an open text file"""
+    write_xml(build_wsb_xml(config), f.write)
+
+
+def load_profile(file_path):
+    """Read a JSON profile written by save_profile, returning its dictionary"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("profile is not a JSON object")
+    return data
+
+
+def _file_digest(path):
+    """SHA-256 digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+def _rotate_backups(path, backups):
+    """Keep the current path as path.bak1, shifting older copies up to path.bakN"""
+    for number in range(backups - 1, 0, -1):
+        older = f"{path}.bak{number}"
+        if os.path.exists(older):
+            os.replace(older, f"{path}.bak{number + 1}")
+    newest = f"{path}.bak1"
+    try:
+        os.remove(newest)
+    except FileNotFoundError:
+        pass
+    try:
+        # The link keeps the old content once path is replaced, without a copy
+        os.link(path, newest)
+    except OSError:
+        shutil.copy2(path, newest)
+
+
+@traced("write_if_changed")
+def write_if_changed(path, text, backups=0):
+    """Atomically replace path with text unless it already holds exactly that
+
+    The content is written to a temporary file next to path, flushed to
+    disk and renamed over path, so a crash leaves either the old or the new
+    file, never a truncated one. A file whose content hash already matches
+    is not touched, keeping its mtime. With backups, the replaced version
+    is kept as path.bak1 and up to backups older copies as path.bakN.
+    Line endings follow the platform, as in a text-mode write; bytes are
+    written as they are. Returns True if the file was written.
+    """
+    if isinstance(text, bytes):
+        data = text
+    else:
+        if os.linesep != '\n':
+            text = text.replace('\n', os.linesep)
+        data = text.encode('utf-8')
+    try:
+        existing_size = os.stat(path).st_size
+    except FileNotFoundError:
+        existing_size = None
+    # Sizes differ for most real changes, so the old file is rarely read
+    if existing_size == len(data) and _file_digest(path) == hashlib.sha256(data).digest():
+        return False
+
+    temp_path, f = _open_temp(path)
+    try:
+        with f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace_with_temp(path, temp_path, existing_size, backups)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+    tracer.add_bytes(len(data))
+    return True
+
+
+def _open_temp(path):
+    """Create a temporary file next to path, returning its name and binary file object"""
+    directory, name = os.path.split(path)
+    temp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+    # Created like open(path, 'w') would, so new files get the usual permissions
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    return temp_path, open(os.open(temp_path, flags, 0o666), 'wb')
+
+
+def _replace_with_temp(path, temp_path, existing_size, backups):
+    """Rename a finished temporary file over path, keeping its mode and backups"""
+    if existing_size is not None:
+        shutil.copymode(path, temp_path)
+        if backups:
+            _rotate_backups(path, backups)
+    os.replace(temp_path, path)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class _HashingWriter:
+    """Text file stand-in that encodes, hashes and writes its text in blocks"""
+
+    BLOCK_SIZE = 1 << 16
+
+    def __init__(self, f):
+        self._file = f
+        self._chunks = []
+        self._pending = 0
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, text):
+        self._chunks.append(text)
+        self._pending += len(text)
+        if self._pending >= self.BLOCK_SIZE:
+            self.flush()
+
+    def flush(self):
+        text = "".join(self._chunks)
+        self._chunks = []
+        self._pending = 0
+        if os.linesep != '\n':
+            text = text.replace('\n', os.linesep)
+        data = text.encode('utf-8')
+        self.digest.update(data)
+        self.size += len(data)
+        self._file.write(data)
+
+
+@traced("write_if_changed")
+def stream_if_changed(path, produce, backups=0):
+    """write_if_changed for text produced in pieces, never held whole in memory
+
+    produce is called with a file-like object to write() the text to. It
+    goes straight to the temporary file and is hashed on the way, and
+    the temporary file is dropped if path already held the same bytes.
+    """
+    try:
+        existing_size = os.stat(path).st_size
+    except FileNotFoundError:
+        existing_size = None
+
+    temp_path, f = _open_temp(path)
+    try:
+        with f:
+            writer = _HashingWriter(f)
+            produce(writer)
+            writer.flush()
+            if writer.size == existing_size and _file_digest(path) == writer.digest.digest():
+                unchanged = True
+            else:
+                unchanged = False
+                f.flush()
+                os.fsync(f.fileno())
+        if unchanged:
+            _remove_quietly(temp_path)
+            return False
+        _replace_with_temp(path, temp_path, existing_size, backups)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+    tracer.add_bytes(writer.size)
+    return True
+
+
+def save_profile(config, file_path, backups=0):
+    """Write a configuration dictionary as a JSON profile
+
+    Uses write_if_changed, returning False when the profile on disk was
+    already identical.
+    """
+    return write_if_changed(file_path, json.dumps(config, indent=2, ensure_ascii=False), backups)
+
+
+def save_wsb(config, file_path, backups=0):
+    """Write a SandboxConfig as a .wsb file, streamed with stream_if_changed"""
+    return stream_if_changed(file_path, functools.partial(write_wsb, config), backups)
+
+
+# Values Windows Sandbox uses when a .wsb omits an option or says "Default"
+WSB_DEFAULTS = {
+    'vgpu_enabled': True,
+    'networking_enabled': True,
+    'audio_input_enabled': True,
+    'video_input_enabled': False,
+    'protected_client_enabled': False,
+    'printer_redirection_enabled': False,
+    'clipboard_redirection_enabled': True,
+}
+
+# Lower-cased .wsb toggle element names and the configuration keys they set
+WSB_TOGGLES = {
+    'vgpu': 'vgpu_enabled',
+    'networking': 'networking_enabled',
+    'audioinput': 'audio_input_enabled',
+    'videoinput': 'video_input_enabled',
+    'protectedclient': 'protected_client_enabled',
+    'printerredirection': 'printer_redirection_enabled',
+    'clipboardredirection': 'clipboard_redirection_enabled',
+}
+
+
+def _wsb_text(element):
+    return (element.text or '').strip() if element is not None else ''
+
+
+def _wsb_child(element, name):
+    """Find a direct child by case-insensitive tag name"""
+    for child in element:
+        if child.tag.lower() == name:
+            return child
+    return None
+
+
+def parse_wsb(source):
+    """Parse a .wsb file (path or binary file object) into a configuration dictionary
+
+    The file is streamed with iterparse and every MappedFolder is dropped
+    from the tree as soon as it has been read, so memory stays flat no
+    matter how many folders the file maps. Tag names are matched
+    case-insensitively, as Windows Sandbox does.
+    """
+    config = dict(WSB_DEFAULTS)
+    config['mapped_folders'] = folders = []
+    parents = []
+
+    for event, element in iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            parents.append(element)
+            continue
+
+        parents.pop()
+        tag = element.tag.lower()
+
+        if tag == 'mappedfolder':
+            host_folder = _wsb_text(_wsb_child(element, 'hostfolder'))
+            sandbox_folder = _wsb_text(_wsb_child(element, 'sandboxfolder'))
+            if not sandbox_folder and host_folder:
+                # Windows maps to a Desktop folder of the same name by default
+                sandbox_folder = ntpath.join(
+                    "C:\\Users\\WDAGUtilityAccount\\Desktop", ntpath.basename(host_folder.rstrip('\\/'))
+                )
+            folders.append({
+                'host_folder': host_folder,
+                'sandbox_folder': sandbox_folder,
+                'read_only': _wsb_text(_wsb_child(element, 'readonly')).lower() == 'true'
+            })
+            if parents:
+                parents[-1].remove(element)
+            continue
+
+        # Only direct children of <Configuration> carry settings
+        if len(parents) != 1:
+            continue
+
+        value = _wsb_text(element)
+        if tag in WSB_TOGGLES:
+            key = WSB_TOGGLES[tag]
+            if value.lower() == 'enable':
+                config[key] = True
+            elif value.lower() == 'disable':
+                config[key] = False
+            else:
+                config[key] = WSB_DEFAULTS[key]
+        elif tag == 'memoryinmb':
+            config['memory_mb'] = int(value)
+        elif tag == 'logoncommand':
+            config['logon_command'] = _wsb_text(_wsb_child(element, 'command'))
+        elif tag == 'hostname':
+            config['hostname_enabled'] = bool(value)
+            config['hostname_value'] = value
+        elif tag == 'windowsapptheme':
+            config['force_dark_mode'] = value.lower() == 'dark'
+        # Top-level elements are no longer needed once read
+        element.clear()
+
+    # Fill in the remaining keys in their usual order without copying folders
+    result = SandboxConfig().to_dict()
+    result.update(config)
+    return result
+
+
+def load_config_file(file_path):
+    """Load a JSON profile or a .wsb file as a complete configuration dictionary
+
+    Profiles that extend a base are resolved. The result may be shared
+    with other callers and must not be modified.
+    """
+    if file_path.lower().endswith('.wsb'):
+        return parse_wsb(file_path)
+    return resolve_profile(file_path)
+
+
+# Every configuration field except the folder list, in saved order
+SCALAR_FIELDS = tuple(name for name in SandboxConfig.__slots__ if name != 'mapped_folders')
+
+
+def _folder_key(folder):
+    return (normalize_host_path(folder.get('host_folder', '')),
+            normalize_sandbox_path(folder.get('sandbox_folder', '')))
+
+
+def _index_folders(folders):
+    """Map each folder's normalized (host, sandbox) key to the folder, first one wins"""
+    index = {}
+    for folder in folders:
+        index.setdefault(_folder_key(folder), folder)
+    return index
+
+
+def _describe_folder(folder):
+    access = "read-only" if folder.get('read_only', True) else "read-write"
+    return f"{folder.get('host_folder', '')} -> {folder.get('sandbox_folder', '')} ({access})"
+
+
+class ProfileDiff:
+    """Differences between two configuration dictionaries
+
+    fields holds (name, old, new) for every changed setting. Folders are
+    matched on their normalized host and sandbox paths, so removed and
+    added list whole mappings, and changed lists (old, new) pairs whose
+    other settings differ. Folder order is ignored.
+    """
+    __slots__ = ('fields', 'removed', 'added', 'changed')
+
+    def __init__(self, fields, removed, added, changed):
+        self.fields = fields
+        self.removed = removed
+        self.added = added
+        self.changed = changed
+
+    def __bool__(self):
+        return bool(self.fields or self.removed or self.added or self.changed)
+
+    def format(self, old_label="old", new_label="new"):
+        """Render the differences as text, one line per change"""
+        lines = [f"--- {old_label}", f"+++ {new_label}"]
+        lines.extend(f"~ {name}: {old!r} -> {new!r}" for name, old, new in self.fields)
+        lines.extend(f"- folder {_describe_folder(folder)}" for folder in self.removed)
+        lines.extend(f"+ folder {_describe_folder(folder)}" for folder in self.added)
+        lines.extend(
+            f"~ folder {_describe_folder(old)} => {_describe_folder(new)}"
+            for old, new in self.changed
+        )
+        if not self:
+            lines.append("Profiles are identical")
+        return "\n".join(lines) + "\n"
+
+
+def diff_profiles(old, new):
+    """Compare two configuration dictionaries in time linear in their folder counts"""
+    fields = [
+        (name, old.get(name), new.get(name))
+        for name in SCALAR_FIELDS if old.get(name) != new.get(name)
+    ]
+    old_index = _index_folders(old.get('mapped_folders', []))
+    new_index = _index_folders(new.get('mapped_folders', []))
+    removed = [folder for key, folder in old_index.items() if key not in new_index]
+    added = [folder for key, folder in new_index.items() if key not in old_index]
+    changed = [
+        (folder, new_index[key]) for key, folder in old_index.items()
+        if key in new_index and folder != new_index[key]
+    ]
+    return ProfileDiff(fields, removed, added, changed)
+
+
+def _merge_value(base, ours, theirs):
+    """Three-way merge of one value, returning (value, conflicted)"""
+    if ours == theirs or theirs == base:
+        return ours, False
+    if ours == base:
+        return theirs, False
+    return ours, True
+
+
+def merge_profiles(base, ours, theirs):
+    """Three-way merge of configuration dictionaries
+
+    A setting or folder changed on only one side takes that side's value.
+    When both sides changed it differently, ours is kept and the conflict
+    is reported. Folders are matched by normalized host and sandbox path;
+    the merged list keeps our order with their additions appended.
+    Returns (merged, conflicts) where conflicts holds (name, base, ours,
+    theirs) tuples.
+    """
+    merged = {}
+    conflicts = []
+    for name in SCALAR_FIELDS:
+        value, conflicted = _merge_value(base.get(name), ours.get(name), theirs.get(name))
+        merged[name] = value
+        if conflicted:
+            conflicts.append((name, base.get(name), ours.get(name), theirs.get(name)))
+
+    base_index = _index_folders(base.get('mapped_folders', []))
+    our_index = _index_folders(ours.get('mapped_folders', []))
+    their_index = _index_folders(theirs.get('mapped_folders', []))
+    folders = []
+    for key, folder in list(our_index.items()) + [
+        (key, None) for key in their_index if key not in our_index
+    ]:
+        base_folder, their_folder = base_index.get(key), their_index.get(key)
+        value, conflicted = _merge_value(base_folder, folder, their_folder)
+        if conflicted:
+            described = folder or their_folder
+            conflicts.append((
+                f"folder {described.get('host_folder', '')} -> {described.get('sandbox_folder', '')}",
+                base_folder, folder, their_folder
+            ))
+        if value is not None:
+            folders.append(value)
+    merged['mapped_folders'] = folders
+    return merged, conflicts
+
+
+def format_conflicts(conflicts):
+    """Render merge conflicts as text, one line per conflict"""
+    return "".join(
+        f"! {name}: base {base!r}, ours {ours!r}, theirs {theirs!r} (kept ours)\n"
+        for name, base, ours, theirs in conflicts
+    )
+
+
+# Key under which a derived profile names the profile it extends
+PROFILE_BASE_KEY = 'extends'
+
+
+def _profile_base_path(path, data):
+    """Absolute path of the profile data extends, resolved against path's directory"""
+    base = data.get(PROFILE_BASE_KEY)
+    if not base:
+        return None
+    if not isinstance(base, str):
+        raise ValueError(f"'{PROFILE_BASE_KEY}' must be a file path")
+    return os.path.abspath(os.path.join(os.path.dirname(path), base))
+
+
+def apply_profile_overrides(base, overrides):
+    """Apply a derived profile's overrides to its resolved base
+
+    Settings present in overrides replace the base's. mapped_folders, if
+    given, replaces the base's list; remove_folders then drops mappings
+    matching on host and sandbox path (or on host path alone when no
+    sandbox_folder is given), and add_folders replaces a mapping with the
+    same paths in place or appends a new one.
+    """
+    config = dict(base)
+    for name in SCALAR_FIELDS:
+        if name in overrides:
+            config[name] = overrides[name]
+    folders = overrides.get('mapped_folders', base['mapped_folders'])
+    config['mapped_folders'] = _add_folders(
+        _remove_folders(folders, overrides.get('remove_folders')), overrides.get('add_folders')
+    )
+    return SandboxConfig.from_dict(config).to_dict()
+
+
+def _remove_folders(folders, removed):
+    """folders without those matching removed, on host and sandbox path or on host path alone"""
+    if not removed:
+        return folders
+    keys = {_folder_key(folder) for folder in removed if folder.get('sandbox_folder')}
+    hosts = {
+        normalize_host_path(folder.get('host_folder', ''))
+        for folder in removed if not folder.get('sandbox_folder')
+    }
+    return [
+        folder for folder in folders
+        if _folder_key(folder) not in keys and _folder_key(folder)[0] not in hosts
+    ]
+
+
+def _add_folders(folders, added):
+    """folders with each of added replacing the folder with the same paths, or appended"""
+    if not added:
+        return folders
+    folders = list(folders)
+    positions = {_folder_key(folder): row for row, folder in enumerate(folders)}
+    for folder in added:
+        key = _folder_key(folder)
+        if key in positions:
+            folders[positions[key]] = folder
+        else:
+            positions[key] = len(folders)
+            folders.append(folder)
+    return folders
+
+
+def derive_profile(base, config, extends):
+    """Express a complete configuration as overrides of base
+
+    The inverse of apply_profile_overrides: the result extends the given
+    path and resolves back to exactly config. Folder changes are stored as
+    add_folders/remove_folders unless the folder order cannot be kept
+    that way, in which case the whole list is stored.
+    """
+    diff = diff_profiles(base, config)
+    derived = {PROFILE_BASE_KEY: extends}
+    derived.update((name, new) for name, old, new in diff.fields)
+    if diff.removed:
+        derived['remove_folders'] = [
+            {'host_folder': folder['host_folder'], 'sandbox_folder': folder['sandbox_folder']}
+            for folder in diff.removed
+        ]
+    added = [new for old, new in diff.changed] + diff.added
+    if added:
+        derived['add_folders'] = added
+    if apply_profile_overrides(base, derived)['mapped_folders'] != config['mapped_folders']:
+        derived.pop('remove_folders', None)
+        derived.pop('add_folders', None)
+        derived['mapped_folders'] = config['mapped_folders']
+    return derived
+
+
+class _ProfileEntry:
+    __slots__ = ('stamp', 'data', 'base_path', 'base', 'resolved')
+
+    def __init__(self, stamp, data, base_path):
+        self.stamp = stamp
+        self.data = data
+        self.base_path = base_path
+        self.base = None
+        self.resolved = None
+
+
+class ProfileResolver:
+    """Memoized resolution of profiles that extend a base profile
+
+    A derived profile names its base under "extends", relative to its own
+    directory, and overrides settings as described in
+    apply_profile_overrides. Files are re-read only when their mtime or
+    size changes, and a profile is re-resolved only when it or a profile
+    it extends changed. Resolved dictionaries are shared and must not be
+    modified.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._dependents = {}
+
+    def _load(self, path):
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        entry = self._entries.get(path)
+        if entry is not None and entry.stamp == stamp:
+            return entry
+        if entry is not None and entry.base_path is not None:
+            self._dependents[entry.base_path].discard(path)
+
+        data = parse_wsb(path) if path.lower().endswith('.wsb') else load_profile(path)
+        entry = _ProfileEntry(stamp, data, _profile_base_path(path, data))
+        self._entries[path] = entry
+        if entry.base_path is not None:
+            self._dependents.setdefault(entry.base_path, set()).add(path)
+        return entry
+
+    def base_of(self, path):
+        """Absolute path of the profile path extends, or None"""
+        return self._load(os.path.abspath(path)).base_path
+
+    def resolve(self, path):
+        """Return the complete configuration dictionary of a profile"""
+        return self._resolve(os.path.abspath(path), ())
+
+    def _resolve(self, path, chain):
+        if path in chain:
+            raise ValueError("profile inheritance cycle: " + " -> ".join(chain + (path,)))
+        entry = self._load(path)
+        if entry.base_path is None:
+            if entry.resolved is None:
+                entry.resolved = SandboxConfig.from_dict(entry.data).to_dict()
+            return entry.resolved
+
+        try:
+            base = self._resolve(entry.base_path, chain + (path,))
+        except FileNotFoundError:
+            raise ValueError(f"base profile not found: {entry.base_path}") from None
+        # A base that was re-resolved is a new object, so identity tracks staleness
+        if entry.base is not base:
+            entry.base = base
+            entry.resolved = apply_profile_overrides(base, entry.data)
+        return entry.resolved
+
+    def dependents(self, path):
+        """Absolute paths of every cached profile extending path, directly or not"""
+        found = set()
+        pending = [os.path.abspath(path)]
+        while pending:
+            for child in self._dependents.get(pending.pop(), ()):
+                if child not in found:
+                    found.add(child)
+                    pending.append(child)
+        return found
+
+    def invalidate(self, path):
+        """Forget path, returning the paths whose resolution it affects
+
+        Only needed when a file may change without its mtime or size
+        changing; resolve() notices other changes by itself.
+        """
+        path = os.path.abspath(path)
+        entry = self._entries.pop(path, None)
+        if entry is not None and entry.base_path is not None:
+            self._dependents[entry.base_path].discard(path)
+        return {path} | self.dependents(path)
+
+    def clear(self):
+        self._entries.clear()
+        self._dependents.clear()
+
+
+# Shared by load_config_file, batch workers and the profile library
+profile_resolver = ProfileResolver()
+
+
+def resolve_profile(file_path):
+    """Load a JSON profile, applying any profile it extends, through profile_resolver"""
+    return profile_resolver.resolve(file_path)
+
+
+def find_profiles(source_dir, extension='.json'):
+    """Yield profile paths under source_dir, walking lazily"""
+    for dirpath, dirnames, filenames in os.walk(source_dir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(extension):
+                yield os.path.join(dirpath, filename)
+
+
+def _mirror_path(source, source_dir, output_dir, target_extension):
+    """Where source, found under source_dir, belongs in output_dir"""
+    relative = os.path.relpath(source, source_dir)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + target_extension)
+
+
+def _mirror_jobs(source_dir, output_dir, source_extension, target_extension):
+    """Yield (source, target) pairs mirroring source_dir into output_dir"""
+    for source in find_profiles(source_dir, source_extension):
+        yield source, _mirror_path(source, source_dir, output_dir, target_extension)
+
+
+def _run_parallel(func, items, jobs=None, chunksize=32, ordered=False):
+    """Map func over items on a process pool, yielding results as they finish
+
+    items is consumed lazily, so large directory walks are never held in
+    memory. With ordered, results are yielded in the order of items
+    instead. With a single job everything runs in-process.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for item in items:
+            yield func(item)
+        return
+
+    with multiprocessing.Pool(jobs) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        yield from imap(func, items, chunksize)
+
+
+def compile_profile(job, backups=0):
+    """Compile a single JSON profile to a .wsb file
+
+    Returns (source, error, written) where error is None on success, so
+    one bad profile never stops a batch, and written is False when the
+    .wsb on disk was already up to date.
+    """
+    source, target = job
+    try:
+        config = SandboxConfig.from_dict(resolve_profile(source))
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        return source, None, save_wsb(config, target, backups)
+    except Exception as e:
+        return source, str(e), False
+
+
+def compile_profiles(source_dir, output_dir, jobs=None, backups=0):
+    """Compile every JSON profile under source_dir into output_dir
+
+    The directory tree is mirrored with .wsb extensions. Profiles are read
+    by the worker processes and results are yielded as (source, error,
+    written) in completion order, so nothing is loaded up front. Outputs
+    whose content did not change are left untouched.
+    """
+    return _run_parallel(
+        functools.partial(compile_profile, backups=backups),
+        _mirror_jobs(source_dir, output_dir, '.json', '.wsb'), jobs
+    )
+
+
+def import_wsb_file(job, backups=0):
+    """Convert a single .wsb file to a JSON profile, returning (source, error, written)"""
+    source, target = job
+    try:
+        config = parse_wsb(source)
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        return source, None, save_profile(config, target, backups)
+    except Exception as e:
+        return source, str(e), False
+
+
+def import_wsb_files(source_dir, output_dir, jobs=None, backups=0):
+    """Convert every .wsb file under source_dir into JSON profiles in output_dir"""
+    return _run_parallel(
+        functools.partial(import_wsb_file, backups=backups),
+        _mirror_jobs(source_dir, output_dir, '.wsb', '.json'), jobs
+    )
+
+
+def _run_batch(verb, results):
+    """Report a batch's per-file failures and throughput, returning the exit code"""
+    start = time.perf_counter()
+    succeeded = unchanged = 0
+    failures = []
+    for source, error, written in results:
+        if error is None:
+            succeeded += 1
+            unchanged += not written
+        else:
+            failures.append(source)
+            print(f"FAILED {source}: {error}", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    total = succeeded + len(failures)
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"{verb} {succeeded}/{total} profiles in {elapsed:.2f}s "
+          f"({rate:.1f} profiles/s), {unchanged} unchanged, {len(failures)} failed")
+    return 1 if failures else 0
+
+
+def run_compile(source_dir, output_dir, jobs=None, backups=0):
+    """Command-line batch compile, returns the process exit code"""
+    if not os.path.isdir(source_dir):
+        print(f"Error: not a directory: {source_dir}", file=sys.stderr)
+        return 2
+    return _run_batch("Compiled", compile_profiles(source_dir, output_dir, jobs, backups))
+
+
+def run_import(source_dir, output_dir, jobs=None, backups=0):
+    """Command-line bulk .wsb import, returns the process exit code"""
+    if not os.path.isdir(source_dir):
+        print(f"Error: not a directory: {source_dir}", file=sys.stderr)
+        return 2
+    return _run_batch("Imported", import_wsb_files(source_dir, output_dir, jobs, backups))
+
+
+class _PollingWaiter:
+    """Change waiter for platforms without native notifications: just sleeps"""
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        return False
+
+    def close(self):
+        pass
+
+
+class _WindowsChangeWaiter:
+    """Wakes on any file change under a directory tree via FindFirstChangeNotificationW"""
+    NOTIFY_FILTER = 0x1 | 0x2 | 0x8 | 0x10  # file name, directory name, size, last write
+    WAIT_OBJECT_0 = 0
+
+    def __init__(self, directory):
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.FindFirstChangeNotificationW.argtypes = (wintypes.LPCWSTR, wintypes.BOOL, wintypes.DWORD)
+        kernel32.FindFirstChangeNotificationW.restype = wintypes.HANDLE
+        kernel32.FindNextChangeNotification.argtypes = (wintypes.HANDLE,)
+        kernel32.FindCloseChangeNotification.argtypes = (wintypes.HANDLE,)
+        kernel32.WaitForSingleObject.argtypes = (wintypes.HANDLE, wintypes.DWORD)
+        kernel32.WaitForSingleObject.restype = wintypes.DWORD
+        handle = kernel32.FindFirstChangeNotificationW(directory, True, self.NOTIFY_FILTER)
+        if handle is None or handle == ctypes.c_void_p(-1).value:
+            raise ctypes.WinError(ctypes.get_last_error())
+        self._kernel32 = kernel32
+        self._handle = handle
+
+    def wait(self, timeout):
+        """Block until something changes or timeout seconds pass, returning whether notified"""
+        if self._kernel32.WaitForSingleObject(self._handle, int(timeout * 1000)) != self.WAIT_OBJECT_0:
+            return False
+        self._kernel32.FindNextChangeNotification(self._handle)
+        return True
+
+    def close(self):
+        self._kernel32.FindCloseChangeNotification(self._handle)
+
+
+def _change_waiter(directory):
+    """The best available way to sleep until directory may have changed"""
+    if sys.platform == 'win32':
+        try:
+            return _WindowsChangeWaiter(directory)
+        except OSError:
+            pass
+    return _PollingWaiter()
+
+
+class ProfileWatcher:
+    """Keeps the .wsb outputs of a profile directory up to date as it changes
+
+    Each poll is a stat sweep compared with an (mtime, size) snapshot, so
+    only profiles that changed, or that extend one that did, are compiled.
+    Where the platform offers change notifications they end the wait
+    between sweeps early. Changes are collected until the tree has been
+    quiet for DEBOUNCE seconds, then compiled on a worker pool that lives
+    as long as the watcher, so workers keep their resolved bases cached.
+    """
+    POLL_INTERVAL = 1.0
+    DEBOUNCE = 0.5
+    # A tree that never goes quiet is still compiled this often
+    MAX_DELAY = 5.0
+
+    def __init__(self, source_dir, output_dir, jobs=None, backups=0):
+        self.source_dir = os.path.abspath(source_dir)
+        self.output_dir = os.path.abspath(output_dir)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.backups = backups
+        self.snapshot = {}
+        self.profiles = set()
+        # Dependency graph keyed by normcased path: profile -> base, base -> profiles
+        self.bases = {}
+        self.children = {}
+
+    def sweep(self):
+        """Stat every profile and base, returning the paths added, modified or removed"""
+        current = {path: (st.st_mtime_ns, st.st_size) for path, st in _scan_profile_stats(self.source_dir)}
+        self.profiles = set(current)
+        # Bases outside the watched directory are swept too
+        for base in set(self.bases.values()):
+            if base not in current:
+                try:
+                    st = os.stat(base)
+                except OSError:
+                    continue
+                current[base] = (st.st_mtime_ns, st.st_size)
+
+        changed = {path for path, stamp in current.items() if self.snapshot.get(path) != stamp}
+        changed.update(path for path in self.snapshot if path not in current)
+        self.snapshot = current
+        return changed
+
+    def _update_base(self, path):
+        """Re-read which profile path extends"""
+        key = os.path.normcase(path)
+        old = self.bases.pop(key, None)
+        if old is not None:
+            self.children[os.path.normcase(old)].discard(path)
+        try:
+            base = _profile_base_path(path, load_profile(path))
+        except Exception:
+            # Missing or broken profiles are reported when compiled
+            return
+        if base is not None:
+            self.bases[key] = base
+            self.children.setdefault(os.path.normcase(base), set()).add(path)
+
+    def affected(self, changed):
+        """Profiles to recompile after the given paths changed"""
+        for path in changed:
+            self._update_base(path)
+        targets = set()
+        seen = set()
+        pending = list(changed)
+        while pending:
+            path = pending.pop()
+            key = os.path.normcase(path)
+            if key in seen:
+                continue
+            seen.add(key)
+            if path in self.profiles:
+                targets.add(path)
+            pending.extend(self.children.get(key, ()))
+        return targets
+
+    def compile(self, paths, pool=None):
+        """Compile paths, yielding (source, error, written) as they finish"""
+        jobs = [(path, _mirror_path(path, self.source_dir, self.output_dir, '.wsb')) for path in sorted(paths)]
+        func = functools.partial(compile_profile, backups=self.backups)
+        if pool is None:
+            return map(func, jobs)
+        chunksize = max(1, min(32, len(jobs) // (self.jobs * 4)))
+        return pool.imap_unordered(func, jobs, chunksize)
+
+    def rebuild(self, changed, pool=None):
+        """Recompile whatever the changed paths affect"""
+        targets = self.affected(changed)
+        if targets:
+            print(f"{len(changed)} file(s) changed, recompiling {len(targets)} profile(s)")
+            _run_batch("Compiled", self.compile(targets, pool))
+            sys.stdout.flush()
+
+    def run(self, stop=None):
+        """Compile everything once, then recompile changes until stop is set or Ctrl+C"""
+        waiter = _change_waiter(self.source_dir)
+        pool = multiprocessing.Pool(self.jobs) if self.jobs > 1 else None
+        try:
+            changed = self.sweep()
+            print(f"Watching {self.source_dir} ({len(self.profiles)} profiles), press Ctrl+C to stop")
+            self.rebuild(changed, pool)
+            while stop is None or not stop.is_set():
+                waiter.wait(self.POLL_INTERVAL)
+                changed = self.sweep()
+                if not changed:
+                    continue
+                # Let a burst of saves finish before compiling
+                started = time.monotonic()
+                while time.monotonic() - started < self.MAX_DELAY:
+                    time.sleep(self.DEBOUNCE)
+                    more = self.sweep()
+                    if not more:
+                        break
+                    changed |= more
+                self.rebuild(changed, pool)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            waiter.close()
+            if pool is not None:
+                pool.terminate()
+        return 0
+
+
+def run_watch(source_dir, output_dir, jobs=None, backups=0):
+    """Command-line watch mode, returns the process exit code"""
+    if not os.path.isdir(source_dir):
+        print(f"Error: not a directory: {source_dir}", file=sys.stderr)
+        return 2
+    return ProfileWatcher(source_dir, output_dir, jobs, backups).run()
+
+
+def run_diff(old_path, new_path):
+    """Command-line profile diff; exit code 0 if identical, 1 if they differ"""
+    try:
+        diff = diff_profiles(load_config_file(old_path), load_config_file(new_path))
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    sys.stdout.write(diff.format(old_path, new_path))
+    return 1 if diff else 0
+
+
+def run_merge(base_path, ours_path, theirs_path, output_path=None):
+    """Command-line three-way merge, writing JSON to output_path or stdout
+
+    Returns 1 if there were conflicts, which are listed on stderr and
+    resolved in favour of ours.
+    """
+    try:
+        merged, conflicts = merge_profiles(
+            load_config_file(base_path), load_config_file(ours_path), load_config_file(theirs_path)
+        )
+        if output_path:
+            save_profile(merged, output_path)
+        else:
+            sys.stdout.write(json.dumps(merged, indent=2, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    sys.stderr.write(format_conflicts(conflicts))
+    return 1 if conflicts else 0
+
+
+def _scan_profile_stats(directory):
+    """Yield (path, stat) for JSON profiles under directory using scandir"""
+    try:
+        entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from _scan_profile_stats(entry.path)
+        elif entry.name.lower().endswith('.json'):
+            yield entry.path, entry.stat()
+
+
+def summarize_profile(job):
+    """Resolve a profile and return its ProfileLibrary index row"""
+    root_dir, path, relative, mtime_ns, size = job
+    base = None
+    try:
+        base_path = profile_resolver.base_of(path)
+        if base_path is not None:
+            base = os.path.normcase(os.path.relpath(base_path, root_dir))
+        config = SandboxConfig.from_dict(profile_resolver.resolve(path))
+    except Exception as e:
+        return (relative, mtime_ns, size, str(e)) + (None,) * (len(ProfileLibrary.COLUMNS) - 5) + (base,)
+    return (relative, mtime_ns, size, None) + tuple(
+        int(getattr(config, name)) for name in ProfileLibrary.TOGGLES
+    ) + (config.memory_mb, len(config.mapped_folders), config.logon_command, config.hostname_value, base)
+
+
+class ProfileLibrary:
+    """SQLite index over a directory tree of JSON profiles
+
+    The index stores each profile's resolved toggles, memory and
+    mapped-folder count so filtering never parses JSON. refresh() only
+    re-reads files whose mtime or size changed, plus the profiles that
+    extend them; full configurations are read lazily by load().
+    """
+    INDEX_FILENAME = '.sandboxgui_library.sqlite3'
+    SCHEMA_VERSION = 2
+
+    TOGGLES = (
+        'vgpu_enabled', 'networking_enabled', 'audio_input_enabled',
+        'video_input_enabled', 'protected_client_enabled',
+        'printer_redirection_enabled', 'clipboard_redirection_enabled',
+        'hostname_enabled', 'force_dark_mode'
+    )
+    COLUMNS = ('path', 'mtime_ns', 'size', 'error') + TOGGLES + (
+        'memory_mb', 'folder_count', 'logon_command', 'hostname_value', 'base'
+    )
+
+    # Below this many changed files parsing in-process beats starting a pool
+    PARALLEL_THRESHOLD = 256
+
+    def __init__(self, root_dir, index_path=None):
+        self.root_dir = os.path.abspath(root_dir)
+        self.index_path = index_path or os.path.join(self.root_dir, self.INDEX_FILENAME)
+        self.connection = sqlite3.connect(self.index_path)
+        self.connection.row_factory = sqlite3.Row
+        self._create_schema()
+
+    def _create_schema(self):
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version == self.SCHEMA_VERSION:
+            return
+        toggle_columns = ", ".join(f"{name} INTEGER" for name in self.TOGGLES)
+        with self.connection:
+            self.connection.execute("DROP TABLE IF EXISTS profiles")
+            self.connection.execute(
+                "CREATE TABLE profiles (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, "
+                f"error TEXT, {toggle_columns}, memory_mb INTEGER, folder_count INTEGER, "
+                "logon_command TEXT, hostname_value TEXT, base TEXT)"
+            )
+            self.connection.execute("CREATE INDEX profiles_memory ON profiles (memory_mb)")
+            self.connection.execute("CREATE INDEX profiles_folders ON profiles (folder_count)")
+            self.connection.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def close(self):
+        self.connection.close()
+
+    def refresh(self, jobs=None):
+        """Bring the index up to date with the directory
+
+        Returns (updated, removed) counts. Only new or modified profiles,
+        and profiles extending them, are parsed; large batches are parsed
+        on the process pool.
+        """
+        known = {}
+        children = {}
+        for row in self.connection.execute("SELECT path, mtime_ns, size, base FROM profiles"):
+            known[row['path']] = (row['mtime_ns'], row['size'])
+            if row['base'] is not None:
+                children.setdefault(row['base'], []).append(row['path'])
+
+        on_disk = {}
+        changed = {}
+        for path, st in _scan_profile_stats(self.root_dir):
+            relative = os.path.relpath(path, self.root_dir)
+            job = (self.root_dir, path, relative, st.st_mtime_ns, st.st_size)
+            on_disk[os.path.normcase(relative)] = job
+            if known.pop(relative, None) != (st.st_mtime_ns, st.st_size):
+                changed[relative] = job
+
+        # Profiles extending a changed or deleted profile resolve differently now
+        pending = [os.path.normcase(relative) for relative in list(changed) + list(known)]
+        while pending:
+            for child in children.get(pending.pop(), ()):
+                job = on_disk.get(os.path.normcase(child))
+                if job is not None and job[2] not in changed:
+                    changed[job[2]] = job
+                    pending.append(os.path.normcase(child))
+
+        if len(changed) < self.PARALLEL_THRESHOLD:
+            jobs = 1
+        rows = list(_run_parallel(summarize_profile, changed.values(), jobs))
+
+        placeholders = ", ".join("?" * len(self.COLUMNS))
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO profiles ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                rows
+            )
+            # Whatever is left in known no longer exists on disk
+            self.connection.executemany(
+                "DELETE FROM profiles WHERE path = ?", ((path,) for path in known)
+            )
+        return len(rows), len(known)
+
+    def query(self, name=None, min_memory_mb=None, max_memory_mb=None,
+              min_folders=None, max_folders=None, include_errors=False, **toggles):
+        """Return index rows matching all given filters, ordered by path
+
+        Toggle filters are passed by configuration key, for example
+        query(networking_enabled=True, min_memory_mb=8193).
+        """
+        clauses = []
+        params = []
+        for key, value in toggles.items():
+            if key not in self.TOGGLES:
+                raise ValueError(f"Unknown filter: {key}")
+            clauses.append(f"{key} = ?")
+            params.append(int(bool(value)))
+        for column, operator, value in (
+            ('memory_mb', '>=', min_memory_mb), ('memory_mb', '<=', max_memory_mb),
+            ('folder_count', '>=', min_folders), ('folder_count', '<=', max_folders),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+        if name:
+            clauses.append("path LIKE ? ESCAPE '\\'")
+            escaped = name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%")
+        if not include_errors:
+            clauses.append("error IS NULL")
+
+        sql = "SELECT * FROM profiles"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return self.connection.execute(sql + " ORDER BY path", params).fetchall()
+
+    def full_path(self, path):
+        """Absolute path of an indexed profile"""
+        return os.path.join(self.root_dir, path)
+
+    def load(self, path):
+        """Load the resolved configuration dictionary of an indexed profile"""
+        return resolve_profile(self.full_path(path))
+
+
+# Toggle settings set by each preset, in the window and by bulk edits
+PRESETS = {
+    'secure': {
+        'vgpu_enabled': False, 'networking_enabled': False, 'audio_input_enabled': False,
+        'video_input_enabled': False, 'printer_redirection_enabled': False,
+        'clipboard_redirection_enabled': False, 'protected_client_enabled': True
+    },
+    'default': {
+        'vgpu_enabled': True, 'networking_enabled': True, 'audio_input_enabled': False,
+        'video_input_enabled': False, 'printer_redirection_enabled': False,
+        'clipboard_redirection_enabled': True, 'protected_client_enabled': False
+    },
+    'testing': {
+        'vgpu_enabled': True, 'networking_enabled': True, 'audio_input_enabled': True,
+        'video_input_enabled': True, 'printer_redirection_enabled': True,
+        'clipboard_redirection_enabled': True, 'protected_client_enabled': False
+    },
+}
+
+
+class BulkEdit:
+    """Changes made to every profile of a bulk edit
+
+    preset names one of PRESETS and memory_mb replaces the memory
+    setting. remove_folders and add_folders take folder dictionaries and
+    match them as a derived profile's overrides do (see
+    apply_profile_overrides); removals are applied first.
+    """
+    __slots__ = ('preset', 'memory_mb', 'add_folders', 'remove_folders')
+
+    def __init__(self, preset=None, memory_mb=None, add_folders=(), remove_folders=()):
+        if preset is not None and preset not in PRESETS:
+            raise ValueError(f"Unknown preset: {preset}")
+        if memory_mb is not None and not MIN_MEMORY_MB <= memory_mb <= MAX_MEMORY_MB:
+            raise ValueError(f"Memory must be between {MIN_MEMORY_MB} and {MAX_MEMORY_MB} MB")
+        self.preset = preset
+        self.memory_mb = memory_mb
+        self.add_folders = [MappedFolder.from_dict(folder).to_dict() for folder in add_folders]
+        if any(not folder['host_folder'] or not folder['sandbox_folder'] for folder in self.add_folders):
+            raise ValueError("Added folders need both a host and a sandbox folder")
+        self.remove_folders = list(remove_folders)
+        if any(not folder.get('host_folder') for folder in self.remove_folders):
+            raise ValueError("Removed folders need a host folder")
+
+    def __bool__(self):
+        return bool(self.preset or self.memory_mb is not None
+                    or self.add_folders or self.remove_folders)
+
+    def apply(self, config):
+        """Return a copy of a configuration dictionary with the changes made"""
+        config = dict(config)
+        if self.preset is not None:
+            config.update(PRESETS[self.preset])
+        if self.memory_mb is not None:
+            config['memory_mb'] = self.memory_mb
+        config['mapped_folders'] = _add_folders(
+            _remove_folders(config['mapped_folders'], self.remove_folders), self.add_folders
+        )
+        return config
+
+
+def _aside_path(path, tag):
+    """Hidden name next to path that _set_aside keeps its content under"""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{tag}.orig")
+
+
+def _set_aside(path, tag=None):
+    """Keep path's current content under a hidden name next to it, returning that name"""
+    aside = _aside_path(path, tag or uuid.uuid4().hex[:8])
+    try:
+        # The link keeps the old content once path is replaced, without a copy
+        os.link(path, aside)
+    except OSError:
+        shutil.copy2(path, aside)
+    return aside
+
+
+def _restore_aside(aside, path):
+    """Put content kept by _set_aside back in place of path"""
+    if os.path.exists(path) and os.path.samefile(aside, path):
+        # Never replaced, and renaming a link over itself would keep both names
+        os.remove(aside)
+    else:
+        os.replace(aside, path)
+    profile_resolver.invalidate(path)
+
+
+def bulk_edit_profile(path, edit, dry_run=False, backups=0, keep_original=None):
+    """Make a BulkEdit's changes to one JSON profile file
+
+    Returns (path, error, diff, written) where diff is the ProfileDiff of
+    the resolved profile, or None if it could not be read. A profile that
+    extends a base is saved as overrides of it, as the window saves it.
+    The original file is set aside until the written one has been read
+    back and resolves to the edited settings; on any failure it is put
+    back, so a file is either fully edited or left exactly as it was.
+    With keep_original, a tag, the original stays at _aside_path(path,
+    keep_original) after a successful write, for the caller to restore or
+    remove. With dry_run nothing is written.
+    """
+    path = os.path.abspath(path)
+    try:
+        if not path.lower().endswith('.json'):
+            # A .wsb is compiled from its profile; edit the profile and recompile
+            raise ValueError("not a JSON profile")
+        before = profile_resolver.resolve(path)
+        after = edit.apply(before)
+        diff = diff_profiles(before, after)
+        if dry_run or not diff:
+            return path, None, diff, False
+        base_path = profile_resolver.base_of(path)
+        stored = after
+        if base_path is not None:
+            extends = os.path.relpath(base_path, os.path.dirname(path))
+            stored = derive_profile(profile_resolver.resolve(base_path), after, extends)
+    except Exception as e:
+        return path, str(e), None, False
+
+    aside = _set_aside(path, keep_original)
+    try:
+        written = save_profile(stored, path, backups)
+        # The stamp may not change when a rewrite is quick and the same size
+        profile_resolver.invalidate(path)
+        if diff_profiles(after, profile_resolver.resolve(path)):
+            raise ValueError("the saved profile does not read back as edited")
+    except BaseException as e:
+        try:
+            _restore_aside(aside, path)
+        except OSError as restore_error:
+            if not isinstance(e, Exception):
+                raise
+            return path, f"{e}; could not restore the original, kept as {aside}: {restore_error}", diff, True
+        if not isinstance(e, Exception):
+            raise
+        return path, f"{e} (original restored)", diff, False
+    if keep_original is None:
+        os.remove(aside)
+    return path, None, diff, written
+
+
+# Below this many profiles editing in-process beats starting a pool
+BULK_EDIT_PARALLEL_THRESHOLD = 64
+
+
+def bulk_edit_profiles(paths, edit, jobs=None, dry_run=False, backups=0, atomic=False):
+    """Make a BulkEdit's changes to every profile in paths on a process pool
+
+    Yields bulk_edit_profile results in completion order, so callers can
+    report progress. Every file is edited independently: one failure is
+    rolled back and reported without stopping the rest.
+
+    With atomic, the batch is all or nothing. Originals are kept aside
+    until every file has been edited, and if any failed, every profile
+    already written is restored and reported as rolled back. Results are
+    then only yielded once the batch is decided.
+    """
+    # A profile given twice would be edited twice
+    paths = list(dict.fromkeys(os.path.abspath(path) for path in paths))
+    if len(paths) < BULK_EDIT_PARALLEL_THRESHOLD:
+        jobs = 1
+    if not atomic or dry_run:
+        return _run_parallel(
+            functools.partial(bulk_edit_profile, edit=edit, dry_run=dry_run, backups=backups),
+            paths, jobs
+        )
+    return _bulk_edit_atomic(paths, edit, jobs, backups)
+
+
+def _bulk_edit_atomic(paths, edit, jobs, backups):
+    tag = uuid.uuid4().hex[:8]
+    results = list(_run_parallel(
+        functools.partial(bulk_edit_profile, edit=edit, backups=backups, keep_original=tag),
+        paths, jobs
+    ))
+    # A successful edit that changed something left its original aside
+    edited = [index for index, (_, error, diff, _) in enumerate(results) if error is None and diff]
+    failed = sum(error is not None for _, error, _, _ in results)
+    for index in edited:
+        path, _, diff, written = results[index]
+        aside = _aside_path(path, tag)
+        if not failed:
+            os.remove(aside)
+            continue
+        try:
+            _restore_aside(aside, path)
+            results[index] = (path, f"rolled back, {failed} profile(s) in the batch failed", diff, False)
+        except OSError as e:
+            results[index] = (
+                path, f"could not roll back, original kept as {aside}: {e}", diff, written
+            )
+    yield from results
+
+
+def run_bulk_edit(paths, edit, jobs=None, dry_run=False, backups=0, atomic=False):
+    """Command-line bulk edit of profile files and directories, returns the process exit code
+
+    A dry run prints how each profile would change. Progress is shown on
+    stderr when it is a terminal. With atomic, a failure rolls back every
+    profile of the batch (see bulk_edit_profiles).
+    """
+    if not edit:
+        print("Error: nothing to change; give --preset, --memory, --add-folder or --remove-folder",
+              file=sys.stderr)
+        return 2
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(find_profiles(path))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"Error: no such file or directory: {path}", file=sys.stderr)
+            return 2
+    files = list(dict.fromkeys(os.path.abspath(path) for path in files))
+
+    start = time.perf_counter()
+    changed = unchanged = failed = 0
+    show_progress = sys.stderr.isatty()
+    progress = ""
+    last_report = 0.0
+
+    def clear_progress():
+        sys.stderr.write("\r" + " " * len(progress) + "\r")
+
+    for done, (path, error, diff, written) in enumerate(
+            bulk_edit_profiles(files, edit, jobs, dry_run, backups, atomic), 1):
+        if progress and (error is not None or (dry_run and diff)):
+            clear_progress()
+            progress = ""
+        if error is not None:
+            failed += 1
+            print(f"FAILED {path}: {error}", file=sys.stderr)
+        elif diff:
+            changed += 1
+            if dry_run:
+                sys.stdout.write(diff.format(path, f"{path} (edited)"))
+                sys.stdout.flush()
+        else:
+            unchanged += 1
+        if show_progress and time.monotonic() - last_report >= 0.2:
+            last_report = time.monotonic()
+            progress = f"{done}/{len(files)} profiles"
+            sys.stderr.write("\r" + progress)
+            sys.stderr.flush()
+    if progress:
+        clear_progress()
+    elapsed = time.perf_counter() - start
+
+    verb = "Would change" if dry_run else "Changed"
+    rate = len(files) / elapsed if elapsed > 0 else 0.0
+    print(f"{verb} {changed}/{len(files)} profiles in {elapsed:.2f}s "
+          f"({rate:.1f} profiles/s), {unchanged} unchanged, {failed} failed")
+    return 1 if failed else 0
+
+
+ARCHIVE_EXTENSION = '.sbxa'
+ARCHIVE_MAGIC = b'SBXA'
+ARCHIVE_VERSION = 1
+# Magic, version, profile count, then the strings, paths and index section offsets
+_ARCHIVE_HEADER = struct.Struct('<4sHIQQQ')
+# Name path id, record offset and record length of one profile, sorted by name
+_ARCHIVE_INDEX_ENTRY = struct.Struct('<IQI')
+# Parent path id and string id of one path
+_ARCHIVE_PATH_ENTRY = struct.Struct('<II')
+# Boolean settings, packed into one integer in this order
+_ARCHIVE_TOGGLES = (
+    'vgpu_enabled', 'networking_enabled', 'audio_input_enabled',
+    'video_input_enabled', 'protected_client_enabled',
+    'printer_redirection_enabled', 'clipboard_redirection_enabled',
+    'hostname_enabled', 'force_dark_mode'
+)
+
+
+def _write_varint(out, value):
+    """Append a non-negative integer to out as 7 bits per byte, low bits first"""
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    """Decode a _write_varint integer at pos, returning (value, next position)"""
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _archive_value(config, name, kind):
+    value = config[name]
+    # bool is an int, but a memory setting of True is not
+    if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise ValueError(f"{name} must be {'true or false' if kind is bool else kind.__name__}")
+    return value
+
+
+class ProfileArchiveWriter:
+    """Builds a profile archive (see ProfileArchive) in memory
+
+    Strings are stored once however often they occur, and paths are
+    stored as their parent path plus last component, so a prefix such as
+    SANDBOX_SHARED_FOLDER is stored once for every folder under it.
+    """
+
+    def __init__(self):
+        self._strings = {'': 0}
+        # Path id 0 is the empty path, the parent of paths without a separator
+        self._paths = {'': 0}
+        self._path_entries = [(0, 0)]
+        self._records = bytearray()
+        self._index = {}
+
+    def __len__(self):
+        return len(self._index)
+
+    def _string(self, text):
+        string_id = self._strings.get(text)
+        if string_id is None:
+            string_id = self._strings[text] = len(self._strings)
+        return string_id
+
+    def _path(self, path):
+        path_id = self._paths.get(path)
+        # Walk up to the nearest parent already stored, then add each level below it
+        pending = []
+        while path_id is None:
+            cut = max(path.rfind('\\'), path.rfind('/'), 0)
+            pending.append((path, path[cut:]))
+            path = path[:cut]
+            path_id = self._paths.get(path)
+        for full, component in reversed(pending):
+            self._path_entries.append((path_id, self._string(component)))
+            path_id = self._paths[full] = len(self._path_entries) - 1
+        return path_id
+
+    def add(self, name, config):
+        """Add a complete configuration dictionary under name, a '/'-separated relative path"""
+        if name in self._index:
+            raise ValueError(f"duplicate profile name: {name}")
+        record = bytearray()
+        flags = 0
+        for bit, field in enumerate(_ARCHIVE_TOGGLES):
+            flags |= _archive_value(config, field, bool) << bit
+        _write_varint(record, flags)
+        memory_mb = _archive_value(config, 'memory_mb', int)
+        if memory_mb < 0:
+            raise ValueError("memory_mb must not be negative")
+        _write_varint(record, memory_mb)
+        _write_varint(record, self._string(_archive_value(config, 'logon_command', str)))
+        _write_varint(record, self._string(_archive_value(config, 'hostname_value', str)))
+        folders = config['mapped_folders']
+        _write_varint(record, len(folders))
+        for folder in folders:
+            host = self._path(_archive_value(folder, 'host_folder', str))
+            _write_varint(record, host << 1 | _archive_value(folder, 'read_only', bool))
+            _write_varint(record, self._path(_archive_value(folder, 'sandbox_folder', str)))
+        self._index[name] = (self._path(name), len(self._records), len(record))
+        self._records += record
+
+    def to_bytes(self):
+        header_size = _ARCHIVE_HEADER.size
+        strings = [text.encode('utf-8') for text in self._strings]
+        offsets = [0]
+        for data in strings:
+            offsets.append(offsets[-1] + len(data))
+        if offsets[-1] > 0xffffffff:
+            raise ValueError("too much text for one archive")
+        strings_offset = header_size + len(self._records)
+        strings_section = b''.join([
+            struct.pack('<I', len(strings)), struct.pack(f'<{len(offsets)}I', *offsets)
+        ] + strings)
+        paths_offset = strings_offset + len(strings_section)
+        paths_section = struct.pack('<I', len(self._path_entries)) + b''.join(
+            _ARCHIVE_PATH_ENTRY.pack(parent, string) for parent, string in self._path_entries
+        )
+        index_offset = paths_offset + len(paths_section)
+        index_section = b''.join(
+            _ARCHIVE_INDEX_ENTRY.pack(path_id, header_size + offset, length)
+            for name, (path_id, offset, length) in sorted(self._index.items())
+        )
+        header = _ARCHIVE_HEADER.pack(
+            ARCHIVE_MAGIC, ARCHIVE_VERSION, len(self._index), strings_offset, paths_offset, index_offset
+        )
+        return b''.join((header, self._records, strings_section, paths_section, index_section))
+
+    def save(self, path, backups=0):
+        """Write the archive with write_if_changed"""
+        return write_if_changed(path, self.to_bytes(), backups)
+
+
+class ProfileArchive:
+    """Read-only, memory-mapped access to a file of resolved profiles
+
+    The file holds a header, one record per profile, a string table with
+    an offset per string, a table of paths as (parent path, component)
+    pairs and an index sorted by profile name. Nothing is parsed when it
+    is opened: load() binary-searches the index and decodes one record,
+    so reading a single profile costs the same in an archive of any size.
+    Records store settings as variable-length integers, with text and
+    paths as ids into the tables. Decoded strings are cached, so repeated
+    paths are shared between the profiles read. The section table is
+    checked when the file is opened and every id and offset as it is
+    read, so a damaged file raises ValueError rather than reading junk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _ARCHIVE_HEADER.size:
+                raise ValueError(f"not a profile archive: {path}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self._count, strings_offset, paths_offset, index_offset = \
+                _ARCHIVE_HEADER.unpack_from(self._map)
+            if magic != ARCHIVE_MAGIC:
+                raise ValueError(f"not a profile archive: {path}")
+            if version != ARCHIVE_VERSION:
+                raise ValueError(f"unsupported profile archive version {version}: {path}")
+            if index_offset + self._count * _ARCHIVE_INDEX_ENTRY.size > len(self._map):
+                raise ValueError(f"truncated profile archive: {path}")
+            # Records, strings, paths and index follow the header in that order
+            if not (_ARCHIVE_HEADER.size <= strings_offset and strings_offset + 4 <= paths_offset
+                    and paths_offset + 4 <= index_offset):
+                raise self._corrupt()
+            self._string_count, = struct.unpack_from('<I', self._map, strings_offset)
+            self._string_offsets = strings_offset + 4
+            self._string_data = self._string_offsets + 4 * (self._string_count + 1)
+            if self._string_data > paths_offset:
+                raise self._corrupt()
+            self._text_size, = struct.unpack_from(
+                '<I', self._map, self._string_offsets + 4 * self._string_count
+            )
+            self._path_count, = struct.unpack_from('<I', self._map, paths_offset)
+            self._paths_offset = paths_offset + 4
+            if (self._string_data + self._text_size > paths_offset
+                    or self._paths_offset + self._path_count * _ARCHIVE_PATH_ENTRY.size > index_offset):
+                raise self._corrupt()
+            self._records_end = strings_offset
+            self._index_offset = index_offset
+        except BaseException:
+            self._map.close()
+            raise
+        self._strings = {}
+        self._paths = {}
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        """Profile names, in sorted order"""
+        return (self.name(position) for position in range(self._count))
+
+    def __contains__(self, name):
+        return self._find(name) is not None
+
+    def _corrupt(self):
+        return ValueError(f"corrupt profile archive: {self.path}")
+
+    def _string(self, string_id):
+        text = self._strings.get(string_id)
+        if text is None:
+            if string_id >= self._string_count:
+                raise self._corrupt()
+            start, end = struct.unpack_from('<II', self._map, self._string_offsets + 4 * string_id)
+            if not start <= end <= self._text_size:
+                raise self._corrupt()
+            data = self._map[self._string_data + start:self._string_data + end]
+            text = self._strings[string_id] = data.decode('utf-8')
+        return text
+
+    def _path(self, path_id):
+        path = self._paths.get(path_id)
+        if path is None:
+            if path_id >= self._path_count:
+                raise self._corrupt()
+            parts = []
+            current = path_id
+            while current:
+                parent, string_id = _ARCHIVE_PATH_ENTRY.unpack_from(
+                    self._map, self._paths_offset + current * _ARCHIVE_PATH_ENTRY.size
+                )
+                # Parents are always stored first, which also rules out cycles
+                if parent >= current:
+                    raise self._corrupt()
+                parts.append(self._string(string_id))
+                current = parent
+            path = self._paths[path_id] = ''.join(reversed(parts))
+        return path
+
+    def _entry(self, position):
+        path_id, offset, length = _ARCHIVE_INDEX_ENTRY.unpack_from(
+            self._map, self._index_offset + position * _ARCHIVE_INDEX_ENTRY.size
+        )
+        if not _ARCHIVE_HEADER.size <= offset <= offset + length <= self._records_end:
+            raise self._corrupt()
+        return path_id, offset, length
+
+    def name(self, position):
+        """Name of the profile at position in sorted order"""
+        return self._path(self._entry(position)[0])
+
+    def _find(self, name):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self.name(middle) < name:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self.name(low) == name:
+            return low
+        return None
+
+    def load(self, name):
+        """Configuration dictionary of the profile stored under name"""
+        position = self._find(name)
+        if position is None:
+            raise KeyError(name)
+        return self._load_at(position)
+
+    def items(self):
+        """(name, configuration dictionary) for every profile, in name order"""
+        for position in range(self._count):
+            yield self.name(position), self._load_at(position)
+
+    def _load_at(self, position):
+        _path_id, offset, length = self._entry(position)
+        try:
+            return self._decode(self._map[offset:offset + length])
+        except (IndexError, struct.error):
+            # A varint or folder list runs past the end of its record
+            raise self._corrupt() from None
+
+    def _decode(self, data):
+        flags, pos = _read_varint(data, 0)
+        config = {field: bool(flags >> bit & 1) for bit, field in enumerate(_ARCHIVE_TOGGLES)}
+        config['memory_mb'], pos = _read_varint(data, pos)
+        logon_command, pos = _read_varint(data, pos)
+        hostname_value, pos = _read_varint(data, pos)
+        count, pos = _read_varint(data, pos)
+        folders = []
+        for _ in range(count):
+            host, pos = _read_varint(data, pos)
+            sandbox, pos = _read_varint(data, pos)
+            folders.append({
+                'host_folder': self._path(host >> 1),
+                'sandbox_folder': self._path(sandbox),
+                'read_only': bool(host & 1)
+            })
+        config['logon_command'] = self._string(logon_command)
+        config['mapped_folders'] = folders
+        config['hostname_value'] = self._string(hostname_value)
+        # Keys in the order of SandboxConfig.to_dict, as saved JSON profiles have them
+        return {name: config[name] for name in SandboxConfig.__slots__}
+
+
+def _archive_name(source, source_dir):
+    """Archive name of a profile: its path relative to source_dir with '/' separators"""
+    return os.path.relpath(source, source_dir).replace(os.sep, '/')
+
+
+def _resolve_for_archive(source):
+    """Resolve one profile for archiving, returning (source, error, config)"""
+    try:
+        # Resolved profiles are complete and in SandboxConfig.to_dict form already
+        return source, None, resolve_profile(source)
+    except Exception as e:
+        return source, str(e), None
+
+
+def archive_profiles(source_dir, archive_path, jobs=None, backups=0):
+    """Pack every JSON profile under source_dir into one archive
+
+    Profiles are resolved on the process pool, so profiles extending a
+    base are stored complete, and added in directory order so the same
+    profiles always make the same file. Yields (source, error, added) as
+    profiles are added; the archive is written once all are.
+    """
+    writer = ProfileArchiveWriter()
+    for source, error, config in _run_parallel(
+            _resolve_for_archive, find_profiles(source_dir), jobs, ordered=True):
+        if error is None:
+            try:
+                writer.add(_archive_name(source, source_dir), config)
+            except ValueError as e:
+                error = str(e)
+        yield source, error, error is None
+    os.makedirs(os.path.dirname(os.path.abspath(archive_path)), exist_ok=True)
+    writer.save(archive_path, backups)
+
+
+def _extract_target(name, output_dir):
+    """Where an archived profile belongs in output_dir, refusing names that leave it"""
+    parts = name.split('/')
+    if ('\\' in name or ntpath.splitdrive(name)[0] or os.path.isabs(name)
+            or '' in parts or '.' in parts or '..' in parts):
+        raise ValueError(f"unsafe profile name in archive: {name}")
+    return os.path.join(output_dir, *parts)
+
+
+def extract_profiles(job):
+    """Extract one chunk of archived profiles to JSON, returning [(name, error, written)]"""
+    archive_path, names, output_dir, backups = job
+    results = []
+    with ProfileArchive(archive_path) as archive:
+        for name in names:
+            try:
+                target = _extract_target(name, output_dir)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                results.append((name, None, save_profile(archive.load(name), target, backups)))
+            except Exception as e:
+                results.append((name, str(e), False))
+    return results
+
+
+def extract_archive(archive_path, output_dir, jobs=None, backups=0, chunk=256):
+    """Write every profile in an archive to output_dir as a JSON profile
+
+    Chunks of profiles are extracted on the process pool, each worker
+    mapping the archive itself. Yields (name, error, written) as profiles
+    are written; unchanged files are left untouched.
+    """
+    with ProfileArchive(archive_path) as archive:
+        names = list(archive)
+    if len(names) <= chunk:
+        jobs = 1
+    chunks = (
+        (archive_path, names[start:start + chunk], output_dir, backups)
+        for start in range(0, len(names), chunk)
+    )
+    for results in _run_parallel(extract_profiles, chunks, jobs, chunksize=1):
+        yield from results
+
+
+def run_archive(source_dir, archive_path, jobs=None, backups=0):
+    """Command-line archive packing, returns the process exit code"""
+    if not os.path.isdir(source_dir):
+        print(f"Error: not a directory: {source_dir}", file=sys.stderr)
+        return 2
+    try:
+        code = _run_batch("Archived", archive_profiles(source_dir, archive_path, jobs, backups))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(f"Wrote {archive_path} ({format_size(os.path.getsize(archive_path))})")
+    return code
+
+
+def run_extract(archive_path, output_dir, jobs=None, backups=0):
+    """Command-line archive extraction, returns the process exit code"""
+    try:
+        return _run_batch("Extracted", extract_archive(archive_path, output_dir, jobs, backups))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+
+def apply_journal_edit(config, edit):
+    """Apply one journal edit to a configuration dictionary in place"""
+    op = edit['op']
+    folders = config['mapped_folders']
+    if op == 'set':
+        config[edit['field']] = edit['value']
+    elif op == 'insert_folders':
+        folders[edit['row']:edit['row']] = edit['folders']
+    elif op == 'remove_folders':
+        del folders[edit['row']:edit['row'] + edit['count']]
+    elif op == 'update_folder':
+        folders[edit['row']] = edit['folder']
+    elif op == 'set_folders':
+        config['mapped_folders'] = edit['folders']
+    else:
+        raise ValueError(f"Unknown journal edit: {op!r}")
+
+
+class EditJournal:
+    """Append-only log of configuration edits for crash recovery
+
+    The journal is a snapshot of the whole configuration plus a JSON-lines
+    file of the edits made since. Edits are buffered by record() and
+    appended by flush(), with consecutive changes to one field collapsed
+    into a single line, so typing costs nothing until the next flush.
+    compact() folds the edits into a new snapshot to bound replay time.
+    The edit file starts with the generation of its snapshot, so edits
+    are never replayed onto a snapshot that already contains them.
+    """
+    SNAPSHOT_NAME = "recovery-snapshot.json"
+    JOURNAL_NAME = "recovery-journal.jsonl"
+
+    # Edits appended before the journal asks to be compacted
+    COMPACT_EDITS = 1000
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, self.SNAPSHOT_NAME)
+        self.journal_path = os.path.join(directory, self.JOURNAL_NAME)
+        self.edit_count = 0
+        self._buffer = []
+        self._file = None
+
+    @property
+    def needs_compaction(self):
+        return self.edit_count >= self.COMPACT_EDITS
+
+    def start(self, config, current_file=None, saved=True):
+        """Snapshot config and begin an empty edit log
+
+        saved marks a snapshot that matches current_file on disk; such a
+        snapshot is only worth recovering once edits follow it.
+        """
+        generation = uuid.uuid4().hex
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.snapshot_path + '.tmp'
+        # One dumps call stays on the C encoder; dump() streams in Python
+        snapshot = json.dumps({
+            'generation': generation, 'saved': saved,
+            'current_file': current_file, 'config': config
+        })
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(snapshot)
+        os.replace(temp_path, self.snapshot_path)
+
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.journal_path, 'w', encoding='utf-8')
+        self._file.write(json.dumps({'generation': generation}) + '\n')
+        self._file.flush()
+        self._buffer = []
+        self.edit_count = 0
+
+    def record(self, edit):
+        """Buffer an edit until the next flush"""
+        if self._file is None:
+            return
+        buffer = self._buffer
+        if (edit['op'] == 'set' and buffer and buffer[-1]['op'] == 'set'
+                and buffer[-1]['field'] == edit['field']):
+            buffer[-1] = edit
+        else:
+            buffer.append(edit)
+
+    def flush(self):
+        """Append the buffered edits to the edit log"""
+        if not self._buffer or self._file is None:
+            return
+        self._file.write("".join(json.dumps(edit) + '\n' for edit in self._buffer))
+        self._file.flush()
+        self.edit_count += len(self._buffer)
+        self._buffer = []
+
+    def compact(self, config, current_file=None):
+        """Replace the snapshot and edit log with a snapshot of config"""
+        self.start(config, current_file, saved=False)
+
+    def discard(self):
+        """Stop journaling and delete the journal files"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._buffer = []
+        for path in (self.snapshot_path, self.journal_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+# Subdirectory of the journal directory with one journal per open profile
+DOCUMENT_JOURNALS_DIR = "documents"
+
+
+def document_journal_dirs(directory):
+    """Per-profile journal directories under directory, in name order"""
+    root = os.path.join(directory, DOCUMENT_JOURNALS_DIR)
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return []
+    return [os.path.join(root, name) for name in names if os.path.isdir(os.path.join(root, name))]
+
+
+def recover_journal(directory):
+    """Replay a journal left behind by a session that did not exit cleanly
+
+    Returns (config, current_file) with config as a dictionary, or None if
+    there is no journal or nothing changed since the last save. A torn or
+    corrupt line ends the replay; every edit before it is kept.
+    """
+    snapshot_path = os.path.join(directory, EditJournal.SNAPSHOT_NAME)
+    journal_path = os.path.join(directory, EditJournal.JOURNAL_NAME)
+    try:
+        with open(snapshot_path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        config = SandboxConfig().to_dict()
+        config.update(snapshot['config'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    edits = 0
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline() or 'null')
+            # An edit log from before the last compaction is already in the snapshot
+            if isinstance(header, dict) and header.get('generation') == snapshot.get('generation'):
+                for line in f:
+                    try:
+                        apply_journal_edit(config, json.loads(line))
+                    except (ValueError, KeyError, TypeError, IndexError):
+                        break
+                    edits += 1
+    except (OSError, ValueError):
+        pass
+
+    if snapshot.get('saved') and not edits:
+        return None
+    return config, snapshot.get('current_file')
+
+
+class _UndoStep:
+    __slots__ = ('changes', 'key', 'time', 'weight')
+
+    def __init__(self, key, now):
+        self.changes = []
+        self.key = key
+        self.time = now
+        self.weight = 0
+
+
+def _edit_weight(edit):
+    """Rough memory cost of an edit: one, plus every folder it holds"""
+    return 1 + sum(len(value) for value in edit.values() if isinstance(value, list))
+
+
+class UndoHistory:
+    """Bounded undo/redo stack of edit steps
+
+    Each step is a list of (edit, inverse) pairs in the journal's edit
+    format, so history holds only what changed. Folder lists and
+    MappedFolder objects are kept by reference, not copied. This is safe
+    because undo and redo always return them to the exact state they were
+    recorded in. An edit made within MERGE_SECONDS of the last one, with
+    the same merge key, joins the last step. Everything between
+    begin_group() and end_group() becomes one step. The oldest steps are
+    dropped past MAX_STEPS or once the total weight passes MAX_WEIGHT.
+    """
+    MERGE_SECONDS = 1.0
+    MAX_STEPS = 500
+    MAX_WEIGHT = 1000000
+
+    def __init__(self):
+        self._undo = deque()
+        self._redo = []
+        self._weight = 0
+        self._group_depth = 0
+        self._group_key = None
+        self._break = True
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._weight = 0
+        self._break = True
+
+    def close_step(self):
+        """Make the next edit start a new step"""
+        self._break = True
+
+    def begin_group(self):
+        """Collect every edit until the matching end_group() into one step"""
+        if not self._group_depth:
+            self._group_key = object()
+            self._break = True
+        self._group_depth += 1
+
+    def end_group(self):
+        self._group_depth -= 1
+        if not self._group_depth:
+            self._break = True
+
+    def record(self, edit, inverse, key=None):
+        """Add an edit and the edit that reverts it, dropping any redo steps"""
+        now = time.monotonic()
+        self._redo.clear()
+        if self._group_depth:
+            key = self._group_key
+        step = self._undo[-1] if self._undo else None
+        if (self._break or step is None or key is None or step.key != key
+                or (not self._group_depth and now - step.time > self.MERGE_SECONDS)):
+            step = _UndoStep(key, now)
+            self._undo.append(step)
+            self._break = False
+        step.time = now
+        step.changes.append((edit, inverse))
+        weight = _edit_weight(edit) + _edit_weight(inverse)
+        step.weight += weight
+        self._weight += weight
+        self._trim()
+
+    def _trim(self):
+        undo = self._undo
+        while len(undo) > 1 and (len(undo) > self.MAX_STEPS or self._weight > self.MAX_WEIGHT):
+            self._weight -= undo.popleft().weight
+
+    def undo(self, apply):
+        """Revert the last step by passing its inverse edits to apply"""
+        if not self._undo:
+            return False
+        step = self._undo.pop()
+        self._weight -= step.weight
+        for _, inverse in reversed(step.changes):
+            apply(inverse)
+        self._redo.append(step)
+        self._break = True
+        return True
+
+    def redo(self, apply):
+        """Reapply the last undone step by passing its edits to apply"""
+        if not self._redo:
+            return False
+        step = self._redo.pop()
+        for edit, _ in step.changes:
+            apply(edit)
+        self._undo.append(step)
+        self._weight += step.weight
+        self._trim()
+        self._break = True
+        return True
+
+
+class LruCache:
+    """Recency order of cached items, bounded by item count and total weight
+
+    Only keys and weights are tracked; put() returns the keys that no
+    longer fit, least recently used first, for the owner to drop. Keys
+    for which evictable returns False are kept whatever the bounds.
+    """
+
+    def __init__(self, max_items, max_weight):
+        self.max_items = max_items
+        self.max_weight = max_weight
+        self._weights = OrderedDict()
+        self.weight = 0
+
+    def __len__(self):
+        return len(self._weights)
+
+    def __contains__(self, key):
+        return key in self._weights
+
+    def put(self, key, weight, evictable=lambda key: True):
+        """Add or refresh key as the most recently used, returning the evicted keys"""
+        self.pop(key)
+        self._weights[key] = weight
+        self.weight += weight
+        evicted = []
+        for candidate in list(self._weights):
+            if len(self._weights) <= self.max_items and self.weight <= self.max_weight:
+                break
+            if candidate is not key and evictable(candidate):
+                evicted.append(candidate)
+                self.weight -= self._weights.pop(candidate)
+        return evicted
+
+    def pop(self, key):
+        """Stop tracking key, if it is tracked"""
+        weight = self._weights.pop(key, None)
+        if weight is not None:
+            self.weight -= weight
@@ -0,0 +1,3270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Windows Sandbox Configuration Tool - user interface
+
+The Qt widgets and main window. SandBoxGUI.main imports this module only
+when the window is requested.
+"""
+
+import sys
+import os
+import re
+import ntpath
+import time
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+    QTabWidget, QGroupBox, QLabel, QLineEdit, QPushButton, QCheckBox,
+    QComboBox, QTextEdit, QTableView, QAbstractItemView, QHeaderView,
+    QFileDialog, QMessageBox, QSpinBox, QFormLayout, QSplitter,
+    QScrollArea, QFrame, QGridLayout, QDialog, QPlainTextEdit, QDialogButtonBox,
+    QDockWidget, QTabBar, QPlainTextDocumentLayout, QProgressBar
+)
+from PySide6.QtCore import (
+    Qt, QSettings, QTimer, Signal, QAbstractTableModel, QModelIndex, QObject,
+    QStandardPaths, QLockFile
+)
+from PySide6.QtGui import (
+    QIcon, QFont, QAction, QPixmap, QColor, QKeySequence, QSyntaxHighlighter,
+    QTextCharFormat, QTextCursor, QTextDocument
+)
+
+from sandbox_config import (
+    SANDBOX_SHARED_FOLDER, FOLDER_OK, MappedFolder, SandboxConfig,
+    ProfileLibrary, WsbPreviewRenderer, normalize_host_path,
+    normalize_sandbox_path, _check_host_folders, scan_folder_size,
+    format_size, build_wsb_xml, format_xml,
+    save_profile, save_wsb, parse_wsb, EditJournal, recover_journal,
+    profile_resolver, derive_profile,
+    UndoHistory, SCALAR_FIELDS, load_config_file, diff_profiles,
+    merge_profiles, format_conflicts, ISSUE_ERROR, ISSUE_WARNING, ISSUE_INFO,
+    validate_mappings, format_issue_counts, tracer, traced, diff_lines,
+    LruCache, DOCUMENT_JOURNALS_DIR, document_journal_dirs, MIN_MEMORY_MB, MAX_MEMORY_MB,
+    PRESETS, BulkEdit, bulk_edit_profiles
+)
+
+
+class HostFolderValidator(QObject):
+    """Checks host folders on a thread pool and caches the results
+
+    Nothing here ever touches the file system on the calling thread, so a
+    hanging network share cannot freeze the UI. Results are cached per path
+    for TTL seconds and delivered in batches through results_ready.
+    """
+    results_ready = Signal(object)
+    _batch_done = Signal(object)
+
+    TTL = 30.0
+    BATCH_SIZE = 32
+
+    def __init__(self, parent=None, max_workers=8):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="folder-check")
+        self._cache = {}
+        self._pending = set()
+        # Emitted from worker threads, delivered on this object's thread
+        self._batch_done.connect(self._store_results)
+
+    @property
+    def busy(self):
+        """Whether any checks are still running"""
+        return bool(self._pending)
+
+    def status(self, path):
+        """Cached status for path, or None; stale or missing entries are re-checked"""
+        entry = self._cache.get(path)
+        if entry is None or time.monotonic() - entry[1] > self.TTL:
+            self.request([path])
+        return entry[0] if entry else None
+
+    def request(self, paths):
+        """Queue background checks for paths without a fresh cached result"""
+        now = time.monotonic()
+        cache = self._cache
+        pending = self._pending
+        batch = [
+            path for path in dict.fromkeys(paths)
+            if path and path not in pending
+            and (path not in cache or now - cache[path][1] > self.TTL)
+        ]
+        pending.update(batch)
+        for start in range(0, len(batch), self.BATCH_SIZE):
+            self._submit(batch[start:start + self.BATCH_SIZE])
+
+    def invalidate(self, path):
+        """Forget the cached status for path"""
+        self._cache.pop(path, None)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, paths):
+        future = self._executor.submit(_check_host_folders, paths)
+        future.add_done_callback(lambda future: self._on_future_done(future, paths))
+
+    def _on_future_done(self, future, paths):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            self._batch_done.emit(future.result())
+        else:
+            # A failed batch must not leave its paths pending forever
+            self._batch_done.emit(dict.fromkeys(paths, f"Error: {error}"))
+
+    def _store_results(self, results):
+        checked_at = time.monotonic()
+        for path, status in results.items():
+            self._pending.discard(path)
+            self._cache[path] = (status, checked_at)
+        self.results_ready.emit(results)
+
+
+class FolderSizeScanner(QObject):
+    """Computes folder sizes and file counts on a worker pool
+
+    Running totals are streamed through scan_progress as (path, (size,
+    count, finished)). Directory listings are cached by mtime across scans,
+    so rescanning an unchanged tree only costs one stat per directory.
+    Scans can be cancelled per path or all at once.
+    """
+    scan_progress = Signal(str, object)
+    _scan_update = Signal(object)
+
+    def __init__(self, parent=None, max_workers=2):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="folder-size")
+        self._directory_cache = {}
+        self._results = {}
+        self._jobs = {}
+        self._scan_update.connect(self._on_scan_update)
+
+    @property
+    def busy(self):
+        """Whether any scans are still running"""
+        return bool(self._jobs)
+
+    def result(self, path):
+        """Latest (size, count, finished) for path, starting a scan if there is none"""
+        if path not in self._results and path not in self._jobs:
+            self.scan(path)
+        return self._results.get(path)
+
+    def scan(self, path):
+        """Start (or restart) scanning path"""
+        self.cancel(path)
+        cancelled = threading.Event()
+        self._jobs[path] = cancelled
+        self._executor.submit(self._run, path, cancelled)
+
+    def cancel(self, path):
+        """Stop scanning path and forget its totals"""
+        cancelled = self._jobs.pop(path, None)
+        if cancelled is not None:
+            cancelled.set()
+        self._results.pop(path, None)
+
+    def cancel_all(self):
+        for cancelled in self._jobs.values():
+            cancelled.set()
+        self._jobs.clear()
+        self._results.clear()
+
+    def rescan_all(self):
+        """Drop all totals so folders are scanned again as they are shown"""
+        self.cancel_all()
+
+    def shutdown(self):
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, path, cancelled):
+        def report(size, count):
+            self._scan_update.emit((path, cancelled, (size, count, False)))
+
+        totals = scan_folder_size(path, self._directory_cache, cancelled, report)
+        if totals is not None:
+            self._scan_update.emit((path, cancelled, totals + (True,)))
+
+    def _on_scan_update(self, update):
+        path, cancelled, result = update
+        # Ignore late updates from cancelled or superseded scans
+        if self._jobs.get(path) is not cancelled:
+            return
+        self._results[path] = result
+        if result[2]:
+            del self._jobs[path]
+        self.scan_progress.emit(path, result)
+
+
+class MappingValidator(QObject):
+    """Runs validate_mappings on a worker thread
+
+    Each request validates a snapshot of the folder list. The folders
+    themselves are not copied, so the UI thread only pays for the list.
+    Folders edited while a check runs bump the caller's revision, and
+    issues_ready carries the token given with the request so callers can
+    drop results for stale lists. Requests queued behind a newer one are
+    skipped.
+    """
+    issues_ready = Signal(object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="mapping-check")
+        self._latest = None
+        self._future = None
+
+    @property
+    def busy(self):
+        """Whether a validation is still running"""
+        return self._future is not None and not self._future.done()
+
+    def request(self, folders, token):
+        """Validate a snapshot of the folder list in the background"""
+        self._latest = token
+        self._future = self._executor.submit(self._run, tuple(folders), token)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, folders, token):
+        if token != self._latest:
+            return
+        self.issues_ready.emit(token, validate_mappings(folders))
+
+
+class MappedFoldersModel(QAbstractTableModel):
+    """Table model backed directly by a list of MappedFolder objects
+
+    Normalized host and sandbox paths are counted in hash indexes so
+    duplicates are rejected in constant time. Counts rather than sets are
+    kept because loaded profiles may already contain duplicates.
+    """
+    HEADERS = ("Host Folder", "Sandbox Folder", "Read Only", "Status", "Size")
+    HOST_COLUMN, SANDBOX_COLUMN, READ_ONLY_COLUMN, STATUS_COLUMN, SIZE_COLUMN = range(5)
+
+    # Row highlight for the most serious mapping issue on a row
+    ISSUE_COLORS = {ISSUE_ERROR: QColor(255, 215, 215), ISSUE_WARNING: QColor(255, 240, 200)}
+    
+    duplicate_rejected = Signal(str)
+    # Row and a copy of the folder as it was before an edit through setData
+    folder_edited = Signal(int, object)
+
+    def __init__(self, folders=None, parent=None, validator=None, scanner=None):
+        super().__init__(parent)
+        self.folders = folders if folders is not None else []
+        self.validator = validator
+        if validator is not None:
+            validator.results_ready.connect(self._on_validation_results)
+        # Sizes are scanned lazily as rows are displayed
+        self.scanner = scanner
+        if scanner is not None:
+            scanner.scan_progress.connect(self._on_scan_progress)
+        # Bumped by the owning widget on every change, so views can cache work per revision
+        self.revision = 0
+        # Last mapping validation result, the revision it was run on and its issues by row
+        self.issues = []
+        self.issues_revision = None
+        self.row_issues = {}
+        self._rebuild_index()
+        self._validate(self.folders)
+
+    def _validate(self, folders):
+        if self.validator is not None:
+            self.validator.request(folder.host_folder for folder in folders)
+
+    def _on_validation_results(self, results):
+        # The size column is blanked for folders that fail the check
+        self._rows_changed(self._host_rows(results), self.STATUS_COLUMN, self.SIZE_COLUMN)
+
+    def _on_scan_progress(self, path, result):
+        self._rows_changed(self._host_rows([path]), self.SIZE_COLUMN, self.SIZE_COLUMN)
+
+    def _host_rows(self, paths):
+        """Sorted rows whose host folder is one of paths"""
+        keys = {normalize_host_path(path) for path in paths}
+        keys.intersection_update(self._host_index)
+        if not keys:
+            return []
+        if self._host_row_index is None:
+            # Built on demand, as rows shift with every insert and removal
+            self._host_row_index = {}
+            for row, folder in enumerate(self.folders):
+                self._host_row_index.setdefault(normalize_host_path(folder.host_folder), []).append(row)
+        return sorted(row for key in keys for row in self._host_row_index.get(key, ()))
+
+    def _rows_changed(self, rows, first_column, last_column):
+        """Emit dataChanged for sorted rows, one signal per contiguous run"""
+        position = 0
+        while position < len(rows):
+            start = end = rows[position]
+            position += 1
+            while position < len(rows) and rows[position] == end + 1:
+                end = rows[position]
+                position += 1
+            self.dataChanged.emit(
+                self.index(start, first_column),
+                self.index(end, last_column),
+                [Qt.ItemDataRole.DisplayRole]
+            )
+
+    def _column_changed(self, column):
+        if self.folders:
+            self.dataChanged.emit(
+                self.index(0, column),
+                self.index(len(self.folders) - 1, column),
+                [Qt.ItemDataRole.DisplayRole]
+            )
+
+    def _rebuild_index(self):
+        self._host_index = {}
+        self._sandbox_index = {}
+        # Host folder keys to rows, see _host_rows
+        self._host_row_index = None
+        for folder in self.folders:
+            self._index_folder(folder, 1)
+
+    def _index_folder(self, folder, delta):
+        self._host_row_index = None
+        self._index_key(self._host_index, normalize_host_path(folder.host_folder), delta)
+        self._index_key(self._sandbox_index, normalize_sandbox_path(folder.sandbox_folder), delta)
+
+    @staticmethod
+    def _index_key(index, key, delta):
+        if not key:
+            return
+        count = index.get(key, 0) + delta
+        if count > 0:
+            index[key] = count
+        else:
+            index.pop(key, None)
+
+    EDIT_ROLES = frozenset({
+        Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole, Qt.ItemDataRole.CheckStateRole
+    })
+
+    @classmethod
+    def is_folder_edit(cls, top_left, roles):
+        """Whether a dataChanged notification is an edit to the folders
+
+        Status and size updates and issue highlighting are not.
+        """
+        if top_left.column() > cls.READ_ONLY_COLUMN:
+            return False
+        return not roles or any(Qt.ItemDataRole(role) in cls.EDIT_ROLES for role in roles)
+
+    def set_issues(self, issues):
+        """Highlight the rows involved in the given mapping issues"""
+        self.row_issues = {}
+        for issue in issues:
+            for row in issue.rows:
+                self.row_issues.setdefault(row, []).append(issue)
+        if self.folders:
+            self.dataChanged.emit(
+                self.index(0, self.HOST_COLUMN),
+                self.index(len(self.folders) - 1, self.SANDBOX_COLUMN),
+                [Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ToolTipRole]
+            )
+
+    def has_host_folder(self, path):
+        """Whether a host folder is already mapped"""
+        return normalize_host_path(path) in self._host_index
+
+    def has_sandbox_folder(self, path):
+        """Whether a sandbox folder is already a mapping target"""
+        return normalize_sandbox_path(path) in self._sandbox_index
+
+    def duplicate_reason(self, folder):
+        """Describe why folder would duplicate an existing mapping, or None"""
+        if folder.host_folder and self.has_host_folder(folder.host_folder):
+            return f"The host folder is already mapped:\n{folder.host_folder}"
+        if folder.sandbox_folder and self.has_sandbox_folder(folder.sandbox_folder):
+            return f"The sandbox folder is already in use:\n{folder.sandbox_folder}"
+        return None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.folders)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return section + 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        folder = self.folders[index.row()]
+        column = index.column()
+        if column == self.READ_ONLY_COLUMN:
+            if role == Qt.ItemDataRole.CheckStateRole:
+                return Qt.CheckState.Checked if folder.read_only else Qt.CheckState.Unchecked
+        elif column == self.STATUS_COLUMN:
+            if self.validator is None or not folder.host_folder:
+                return None
+            if role == Qt.ItemDataRole.DisplayRole:
+                return self.validator.status(folder.host_folder) or "Checking..."
+            if role == Qt.ItemDataRole.ForegroundRole:
+                status = self.validator.status(folder.host_folder)
+                if status is not None and status != FOLDER_OK:
+                    return QColor(Qt.GlobalColor.darkRed)
+        elif column == self.SIZE_COLUMN:
+            if self.scanner is None or not folder.host_folder or role != Qt.ItemDataRole.DisplayRole:
+                return None
+            if self.validator is not None and self.validator.status(folder.host_folder) not in (None, FOLDER_OK):
+                return ""
+            result = self.scanner.result(folder.host_folder)
+            if result is None:
+                return "Scanning..."
+            size, count, finished = result
+            text = f"{format_size(size)} ({count:,} files)"
+            return text if finished else text + "..."
+        elif role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return folder.host_folder if column == self.HOST_COLUMN else folder.sandbox_folder
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            issues = self.row_issues.get(index.row())
+            if issues:
+                return "\n".join(issue.message for issue in issues)
+        elif role == Qt.ItemDataRole.BackgroundRole:
+            issues = self.row_issues.get(index.row())
+            if issues:
+                # Issues are ordered most serious first
+                return self.ISSUE_COLORS.get(issues[0].severity)
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid():
+            return False
+        folder = self.folders[index.row()]
+        previous = folder.copy()
+        column = index.column()
+        if column == self.READ_ONLY_COLUMN and role == Qt.ItemDataRole.CheckStateRole:
+            read_only = Qt.CheckState(value) == Qt.CheckState.Checked
+            if read_only == folder.read_only:
+                return False
+            folder.read_only = read_only
+        elif column == self.HOST_COLUMN and role == Qt.ItemDataRole.EditRole:
+            if value == folder.host_folder:
+                return False
+            key = normalize_host_path(value)
+            if key and key != normalize_host_path(folder.host_folder) and key in self._host_index:
+                self.duplicate_rejected.emit(f"The host folder is already mapped:\n{value}")
+                return False
+            self._index_key(self._host_index, normalize_host_path(folder.host_folder), -1)
+            self._index_key(self._host_index, key, 1)
+            self._host_row_index = None
+            if self.scanner is not None:
+                self.scanner.cancel(folder.host_folder)
+            folder.host_folder = value
+            if self.validator is not None:
+                # An edited path must never show a stale status
+                self.validator.invalidate(value)
+                self.validator.request([value])
+            status_index = self.index(index.row(), self.STATUS_COLUMN)
+            size_index = self.index(index.row(), self.SIZE_COLUMN)
+            self.dataChanged.emit(status_index, size_index, [Qt.ItemDataRole.DisplayRole])
+        elif column == self.SANDBOX_COLUMN and role == Qt.ItemDataRole.EditRole:
+            if value == folder.sandbox_folder:
+                return False
+            key = normalize_sandbox_path(value)
+            if key and key != normalize_sandbox_path(folder.sandbox_folder) and key in self._sandbox_index:
+                self.duplicate_rejected.emit(f"The sandbox folder is already in use:\n{value}")
+                return False
+            self._index_key(self._sandbox_index, normalize_sandbox_path(folder.sandbox_folder), -1)
+            self._index_key(self._sandbox_index, key, 1)
+            folder.sandbox_folder = value
+        else:
+            return False
+        self.dataChanged.emit(index, index, [role])
+        self.folder_edited.emit(index.row(), previous)
+        return True
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() == self.READ_ONLY_COLUMN:
+            return flags | Qt.ItemFlag.ItemIsUserCheckable
+        if index.column() in (self.STATUS_COLUMN, self.SIZE_COLUMN):
+            return flags
+        return flags | Qt.ItemFlag.ItemIsEditable
+
+    @traced("refresh_table")
+    def set_folders(self, folders):
+        """Replace the backing list"""
+        if self.scanner is not None:
+            self.scanner.cancel_all()
+        self.beginResetModel()
+        self.folders = folders
+        self.row_issues = {}
+        self._rebuild_index()
+        self.endResetModel()
+        self._validate(folders)
+
+    def append_folder(self, folder):
+        """Append a folder, emitting a single-row insert
+
+        Returns False and emits duplicate_rejected if the host or sandbox
+        folder is already mapped.
+        """
+        reason = self.duplicate_reason(folder)
+        if reason:
+            self.duplicate_rejected.emit(reason)
+            return False
+        self.insert_folders(len(self.folders), [folder])
+        return True
+
+    def insert_folders(self, row, folders):
+        """Insert folders before row as one row-range insert, without duplicate checks"""
+        self.beginInsertRows(QModelIndex(), row, row + len(folders) - 1)
+        # Row numbers shift, so highlights wait for the next validation
+        self.row_issues = {}
+        self.folders[row:row] = folders
+        for folder in folders:
+            self._index_folder(folder, 1)
+        self.endInsertRows()
+        self._validate(folders)
+
+    def update_folder(self, row, folder):
+        """Copy folder's values into the folder at row, without duplicate checks"""
+        current = self.folders[row]
+        host_changed = current.host_folder != folder.host_folder
+        self._index_folder(current, -1)
+        if host_changed and self.scanner is not None:
+            self.scanner.cancel(current.host_folder)
+        current.host_folder = folder.host_folder
+        current.sandbox_folder = folder.sandbox_folder
+        current.read_only = folder.read_only
+        self._index_folder(current, 1)
+        if host_changed and self.validator is not None:
+            self.validator.invalidate(current.host_folder)
+            self.validator.request([current.host_folder])
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+
+    def remove_rows(self, row, count=1):
+        """Remove count folders starting at row, emitting a row-range removal"""
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        self.row_issues = {}
+        for folder in self.folders[row:row + count]:
+            self._index_folder(folder, -1)
+            if self.scanner is not None:
+                self.scanner.cancel(folder.host_folder)
+        del self.folders[row:row + count]
+        self.endRemoveRows()
+
+    def remove_row_set(self, rows):
+        """Remove arbitrary rows, one removal signal per contiguous run"""
+        rows = sorted(set(rows), reverse=True)
+        # Work bottom-up so earlier runs keep their row numbers
+        position = 0
+        while position < len(rows):
+            end = start = rows[position]
+            position += 1
+            while position < len(rows) and rows[position] == start - 1:
+                start = rows[position]
+                position += 1
+            self.remove_rows(start, end - start + 1)
+
+    def unique_sandbox_folder(self, host_folder):
+        """Pick an unused sandbox folder under the shared folder for host_folder"""
+        if not self.has_sandbox_folder(SANDBOX_SHARED_FOLDER):
+            return SANDBOX_SHARED_FOLDER
+        name = os.path.basename(os.path.normpath(host_folder)) or "Folder"
+        candidate = ntpath.join(SANDBOX_SHARED_FOLDER, name)
+        suffix = 2
+        while self.has_sandbox_folder(candidate):
+            candidate = ntpath.join(SANDBOX_SHARED_FOLDER, f"{name} ({suffix})")
+            suffix += 1
+        return candidate
+
+
+class MappedFoldersWidget(QWidget):
+    """Widget for managing mapped folders"""
+    folders_changed = Signal()
+
+    # Quiet time after an edit before the mappings are re-validated
+    VALIDATION_DELAY_MS = 300
+    # Issue messages listed in the summary tooltip
+    ISSUE_TOOLTIP_LINES = 20
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.validator = HostFolderValidator(self)
+        self.scanner = FolderSizeScanner(self)
+        self.model = MappedFoldersModel(parent=self, validator=self.validator, scanner=self.scanner)
+        self.mapping_validator = MappingValidator(self)
+        self.mapping_validator.issues_ready.connect(self.on_issues_ready)
+        self.validation_timer = QTimer(self)
+        self.validation_timer.setSingleShot(True)
+        self.validation_timer.setInterval(self.VALIDATION_DELAY_MS)
+        self.validation_timer.timeout.connect(self.validate_mappings)
+        self.setup_ui()
+
+    @property
+    def mapped_folders(self):
+        return self.model.folders
+
+    @property
+    def revision(self):
+        """Key that changes whenever the shown folders change"""
+        return self.model.revision
+
+    @property
+    def issues(self):
+        return self.model.issues
+
+    def create_model(self, folders=None):
+        """A folders model sharing this widget's validators, for set_model"""
+        return MappedFoldersModel(folders, validator=self.validator, scanner=self.scanner)
+
+    def model_signals(self, model):
+        """(signal, slot) pairs connecting model to this widget"""
+        return (
+            (model.dataChanged, self.on_data_changed),
+            (model.rowsInserted, self.notify_changed),
+            (model.rowsRemoved, self.notify_changed),
+            (model.modelReset, self.notify_changed),
+            (model.duplicate_rejected, self.on_duplicate_rejected),
+        )
+
+    def set_model(self, model):
+        """Show another folders model, such as another open profile's, in the same table"""
+        if model is self.model:
+            return
+        for signal, slot in self.model_signals(self.model):
+            signal.disconnect(slot)
+        # Only the shown folders are worth scanning
+        self.scanner.cancel_all()
+        selection = self.table.selectionModel()
+        self.model = model
+        self.table.setModel(model)
+        selection.deleteLater()
+        self.table.selectionModel().selectionChanged.connect(self.on_selection_changed)
+        for signal, slot in self.model_signals(model):
+            signal.connect(slot)
+        self.on_selection_changed()
+        self.show_issues()
+        if model.issues_revision != model.revision:
+            self.validation_timer.start()
+        else:
+            self.validation_timer.stop()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(8)
+        
+        # Compact controls
+        controls_layout = QHBoxLayout()
+        controls_layout.setSpacing(8)
+        
+        self.add_button = QPushButton("Add Folder")
+        self.add_button.setMaximumWidth(100)
+        self.remove_button = QPushButton("Remove")
+        self.remove_button.setMaximumWidth(80)
+        self.remove_button.setEnabled(False)
+        
+        # Add quick add buttons
+        desktop_btn = QPushButton("+ Desktop")
+        desktop_btn.setMaximumWidth(80)
+        desktop_btn.setToolTip("Add Desktop folder")
+        desktop_btn.clicked.connect(lambda: self.add_predefined_folder("Desktop"))
+        
+        downloads_btn = QPushButton("+ Downloads")
+        downloads_btn.setMaximumWidth(90)
+        downloads_btn.setToolTip("Add Downloads folder")
+        downloads_btn.clicked.connect(lambda: self.add_predefined_folder("Downloads"))
+        
+        controls_layout.addWidget(self.add_button)
+        controls_layout.addWidget(self.remove_button)
+        controls_layout.addWidget(QLabel("|  Quick Add:"))
+        controls_layout.addWidget(desktop_btn)
+        controls_layout.addWidget(downloads_btn)
+        controls_layout.addStretch()
+        
+        rescan_btn = QPushButton("Rescan Sizes")
+        rescan_btn.setToolTip("Recalculate folder sizes, re-reading only changed directories")
+        rescan_btn.clicked.connect(self.rescan_sizes)
+        controls_layout.addWidget(rescan_btn)
+        
+        # Compact table
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        
+        # Fixed row height so large lists never measure rows individually
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(25)
+        
+        self.issues_label = QLabel()
+        self.issues_label.setVisible(False)
+        
+        layout.addLayout(controls_layout)
+        layout.addWidget(self.table)
+        layout.addWidget(self.issues_label)
+        
+        # Connect signals
+        self.add_button.clicked.connect(self.add_folder)
+        self.remove_button.clicked.connect(self.remove_folder)
+        self.table.selectionModel().selectionChanged.connect(self.on_selection_changed)
+        for signal, slot in self.model_signals(self.model):
+            signal.connect(slot)
+
+    def add_folder(self):
+        """Add a new mapped folder"""
+        dialog = QFileDialog()
+        folder = dialog.getExistingDirectory(self, "Select Host Folder")
+        if folder:
+            mapped_folder = MappedFolder(folder, self.model.unique_sandbox_folder(folder))
+            self.model.append_folder(mapped_folder)
+            
+    def add_predefined_folder(self, folder_type):
+        """Add a predefined folder"""
+        import os
+        
+        if folder_type == "Desktop":
+            host_folder = os.path.join(os.path.expanduser("~"), "Desktop")
+            sandbox_folder = "C:\\Users\\WDAGUtilityAccount\\Desktop\\Shared\\Desktop"
+        elif folder_type == "Downloads":
+            host_folder = os.path.join(os.path.expanduser("~"), "Downloads")
+            sandbox_folder = "C:\\Users\\WDAGUtilityAccount\\Desktop\\Shared\\Downloads"
+        else:
+            return
+            
+        # Existence is checked in the background and shown in the Status column
+        mapped_folder = MappedFolder(host_folder, sandbox_folder)
+        self.model.append_folder(mapped_folder)
+
+    def remove_folder(self):
+        """Remove the selected mapped folders"""
+        rows = [index.row() for index in self.table.selectionModel().selectedRows()]
+        if not rows and self.table.currentIndex().row() >= 0:
+            rows = [self.table.currentIndex().row()]
+        if rows:
+            self.model.remove_row_set(rows)
+
+    def rescan_sizes(self):
+        """Recalculate the sizes of the displayed folders"""
+        self.scanner.rescan_all()
+        self.model._column_changed(self.model.SIZE_COLUMN)
+
+    @property
+    def busy(self):
+        """Whether validation or size scans are pending or running in the background"""
+        return (self.validation_timer.isActive() or self.mapping_validator.busy
+                or self.validator.busy or self.scanner.busy)
+
+    def shutdown(self):
+        """Stop background validation and size scans"""
+        self.validator.shutdown()
+        self.scanner.shutdown()
+        self.mapping_validator.shutdown()
+
+    def on_duplicate_rejected(self, message):
+        """Warn about a mapping that duplicates an existing one"""
+        QMessageBox.warning(self, "Duplicate Folder", message)
+
+    def on_selection_changed(self):
+        """Handle selection change"""
+        has_selection = self.table.selectionModel().hasSelection()
+        self.remove_button.setEnabled(has_selection)
+
+    def refresh_table(self):
+        """Refresh the table with current mapped folders"""
+        self.model.set_folders(self.model.folders)
+
+    def get_folders(self):
+        """Get all mapped folders"""
+        return self.mapped_folders
+
+    def set_folders(self, folders):
+        """Set mapped folders"""
+        self.model.set_folders(folders)
+
+    def on_data_changed(self, top_left, bottom_right, roles=()):
+        """Treat edits to the folders as changes, but not status, size or highlighting updates"""
+        if self.model.is_folder_edit(top_left, roles):
+            self.notify_changed()
+
+    def notify_changed(self, *args):
+        """Record a change to the folder list and announce it"""
+        self.model.revision += 1
+        self.validation_timer.start()
+        self.folders_changed.emit()
+
+    def validate_mappings(self):
+        """Check the mappings for conflicts in the background"""
+        self.validation_timer.stop()
+        self.mapping_validator.request(self.model.folders, (self.model, self.model.revision))
+        
+    def on_issues_ready(self, token, issues):
+        """Store validation results unless the folders changed since they were requested"""
+        model, revision = token
+        if revision != model.revision:
+            return
+        model.issues = issues
+        model.issues_revision = revision
+        model.set_issues(issues)
+        if model is self.model:
+            self.show_issues()
+            
+    def show_issues(self):
+        """Summarize the shown model's mapping issues below the table"""
+        if not self.issues:
+            self.issues_label.setVisible(False)
+            return
+        color = "darkred" if self.issues[0].severity == ISSUE_ERROR else "#8a6d00"
+        if self.issues[0].severity == ISSUE_INFO:
+            color = "gray"
+        self.issues_label.setText(
+            f"<span style='color: {color}'>Mapping issues: {format_issue_counts(self.issues)}</span>"
+            " (hover highlighted rows for details)"
+        )
+        lines = [issue.message for issue in self.issues[:self.ISSUE_TOOLTIP_LINES]]
+        if len(self.issues) > self.ISSUE_TOOLTIP_LINES:
+            lines.append(f"... and {len(self.issues) - self.ISSUE_TOOLTIP_LINES} more")
+        self.issues_label.setToolTip("\n".join(lines))
+        self.issues_label.setVisible(True)
+
+
+class ProfileLibraryModel(QAbstractTableModel):
+    """Read-only table over ProfileLibrary query rows"""
+    COLUMNS = (
+        ("Profile", 'path'), ("Memory (MB)", 'memory_mb'), ("Folders", 'folder_count'),
+        ("Networking", 'networking_enabled'), ("vGPU", 'vgpu_enabled'),
+        ("Clipboard", 'clipboard_redirection_enabled'), ("Protected", 'protected_client_enabled')
+    )
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section][0]
+        return section + 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        key = self.COLUMNS[index.column()][1]
+        value = self.rows[index.row()][key]
+        if key in ProfileLibrary.TOGGLES:
+            return "Yes" if value else "No"
+        return value
+
+
+class ProfileLibraryDialog(QDialog):
+    """Browse and filter a directory of profiles through its ProfileLibrary index"""
+    profile_selected = Signal(str)
+    # Full paths of the selected profiles
+    bulk_edit_requested = Signal(object)
+
+    # Toggles offered as tri-state filters (partially checked means "any")
+    FILTERS = (
+        ("Networking", 'networking_enabled'), ("vGPU", 'vgpu_enabled'),
+        ("Clipboard", 'clipboard_redirection_enabled'), ("Protected Client", 'protected_client_enabled'),
+        ("Audio Input", 'audio_input_enabled'), ("Video Input", 'video_input_enabled'),
+        ("Printer", 'printer_redirection_enabled')
+    )
+
+    def __init__(self, library, parent=None):
+        super().__init__(parent)
+        self.library = library
+        self.setWindowTitle(f"Profile Library - {library.root_dir}")
+        self.resize(900, 600)
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(8)
+        
+        # Filters
+        filters_group = QGroupBox("Filters")
+        filters_layout = QGridLayout(filters_group)
+        filters_layout.setSpacing(8)
+        
+        self.filter_checks = {}
+        for position, (label, key) in enumerate(self.FILTERS):
+            checkbox = QCheckBox(label)
+            checkbox.setTristate(True)
+            checkbox.setCheckState(Qt.CheckState.PartiallyChecked)
+            checkbox.setToolTip("Checked: enabled, unchecked: disabled, partial: any")
+            checkbox.stateChanged.connect(self.apply_filters)
+            filters_layout.addWidget(checkbox, position // 4, position % 4)
+            self.filter_checks[key] = checkbox
+            
+        self.name_filter = QLineEdit()
+        self.name_filter.setPlaceholderText("Profile name contains...")
+        self.name_filter.textChanged.connect(self.apply_filters)
+        
+        self.min_memory = QSpinBox()
+        self.min_memory.setRange(0, 32768)
+        self.min_memory.setSingleStep(1024)
+        self.min_memory.setSuffix(" MB")
+        self.min_memory.setSpecialValueText("Any")
+        self.min_memory.valueChanged.connect(self.apply_filters)
+        
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(self.name_filter)
+        search_layout.addWidget(QLabel("Min Memory:"))
+        search_layout.addWidget(self.min_memory)
+        filters_layout.addLayout(search_layout, 2, 0, 1, 4)
+        
+        # Results
+        self.model = ProfileLibraryModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(25)
+        self.table.doubleClicked.connect(self.on_double_clicked)
+        
+        # Controls
+        controls_layout = QHBoxLayout()
+        self.count_label = QLabel()
+        rescan_button = QPushButton("Rescan")
+        rescan_button.setToolTip("Re-index profiles changed on disk")
+        rescan_button.clicked.connect(self.rescan)
+        bulk_edit_button = QPushButton("Bulk Edit...")
+        bulk_edit_button.setToolTip("Change every selected profile at once")
+        bulk_edit_button.clicked.connect(self.bulk_edit_selected)
+        open_button = QPushButton("Open")
+        open_button.clicked.connect(self.open_selected)
+        controls_layout.addWidget(self.count_label)
+        controls_layout.addStretch()
+        controls_layout.addWidget(rescan_button)
+        controls_layout.addWidget(bulk_edit_button)
+        controls_layout.addWidget(open_button)
+        
+        layout.addWidget(filters_group)
+        layout.addWidget(self.table)
+        layout.addLayout(controls_layout)
+
+    def rescan(self):
+        """Update the index from disk and re-run the current query"""
+        updated, removed = self.library.refresh()
+        self.apply_filters()
+        self.count_label.setText(
+            f"{self.model.rowCount()} profiles ({updated} updated, {removed} removed)"
+        )
+
+    def apply_filters(self, *args):
+        """Query the index with the current filter settings"""
+        toggles = {}
+        for key, checkbox in self.filter_checks.items():
+            state = checkbox.checkState()
+            if state != Qt.CheckState.PartiallyChecked:
+                toggles[key] = state == Qt.CheckState.Checked
+        rows = self.library.query(
+            name=self.name_filter.text().strip() or None,
+            min_memory_mb=self.min_memory.value() or None,
+            **toggles
+        )
+        self.model.set_rows(rows)
+        self.count_label.setText(f"{len(rows)} profiles")
+
+    def on_double_clicked(self, index):
+        self.select_row(index.row())
+
+    def open_selected(self):
+        index = self.table.currentIndex()
+        if index.isValid():
+            self.select_row(index.row())
+
+    def select_row(self, row):
+        self.profile_selected.emit(self.library.full_path(self.model.rows[row]['path']))
+
+    def bulk_edit_selected(self):
+        rows = sorted(index.row() for index in self.table.selectionModel().selectedRows())
+        if not rows:
+            QMessageBox.information(self, "Bulk Edit", "Select the profiles to change first.")
+            return
+        self.bulk_edit_requested.emit([self.library.full_path(self.model.rows[row]['path']) for row in rows])
+
+
+class BulkEditRunner(QObject):
+    """Runs bulk_edit_profiles on a worker thread
+
+    progress reports every profile as it finishes; finished carries all
+    results, and the error that stopped the batch early, if any.
+    """
+    progress = Signal(int, int)
+    finished = Signal(object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="bulk-edit")
+        self._future = None
+
+    @property
+    def busy(self):
+        """Whether a batch is still running"""
+        return self._future is not None and not self._future.done()
+
+    def start(self, paths, edit, dry_run=False, backups=0):
+        self._future = self._executor.submit(self._run, list(paths), edit, dry_run, backups)
+
+    def _run(self, paths, edit, dry_run, backups):
+        results = []
+        error = None
+        try:
+            for result in bulk_edit_profiles(paths, edit, dry_run=dry_run, backups=backups):
+                results.append(result)
+                self.progress.emit(len(results), len(paths))
+        except Exception as e:
+            error = str(e)
+        self.finished.emit(results, error)
+
+
+class BulkEditDialog(QDialog):
+    """Preview and make the same changes to many profile files at once"""
+    # Paths of the profiles rewritten by an applied edit
+    profiles_edited = Signal(object)
+
+    PRESET_CHOICES = (
+        ("Keep current", None), ("Secure", 'secure'), ("Default", 'default'), ("Testing", 'testing')
+    )
+
+    def __init__(self, paths, backups=0, parent=None):
+        super().__init__(parent)
+        self.paths = list(paths)
+        self.backups = backups
+        self.dry_run = True
+        self.runner = BulkEditRunner(self)
+        self.runner.progress.connect(self.on_progress)
+        self.runner.finished.connect(self.on_finished)
+        self.setWindowTitle(f"Bulk Edit - {len(self.paths)} profiles")
+        self.resize(800, 600)
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(8)
+        
+        changes_group = QGroupBox("Changes")
+        changes_layout = QFormLayout(changes_group)
+        
+        self.preset = QComboBox()
+        for label, name in self.PRESET_CHOICES:
+            self.preset.addItem(label, name)
+        changes_layout.addRow("Preset:", self.preset)
+        
+        self.set_memory = QCheckBox("Set to")
+        self.memory_mb = QSpinBox()
+        self.memory_mb.setRange(MIN_MEMORY_MB, MAX_MEMORY_MB)
+        self.memory_mb.setValue(4096)
+        self.memory_mb.setSingleStep(1024)
+        self.memory_mb.setSuffix(" MB")
+        self.memory_mb.setEnabled(False)
+        self.set_memory.toggled.connect(self.memory_mb.setEnabled)
+        memory_layout = QHBoxLayout()
+        memory_layout.addWidget(self.set_memory)
+        memory_layout.addWidget(self.memory_mb)
+        memory_layout.addStretch()
+        changes_layout.addRow("Memory:", memory_layout)
+        
+        self.add_host = QLineEdit()
+        self.add_host.setPlaceholderText("Host folder")
+        self.add_sandbox = QLineEdit()
+        self.add_sandbox.setPlaceholderText("Sandbox folder")
+        self.add_read_only = QCheckBox("Read Only")
+        self.add_read_only.setChecked(True)
+        add_layout = QHBoxLayout()
+        add_layout.addWidget(self.add_host)
+        add_layout.addWidget(self.add_sandbox)
+        add_layout.addWidget(self.add_read_only)
+        changes_layout.addRow("Add folder:", add_layout)
+        
+        self.remove_host = QLineEdit()
+        self.remove_host.setPlaceholderText("Host folder")
+        self.remove_sandbox = QLineEdit()
+        self.remove_sandbox.setPlaceholderText("Sandbox folder (any if empty)")
+        remove_layout = QHBoxLayout()
+        remove_layout.addWidget(self.remove_host)
+        remove_layout.addWidget(self.remove_sandbox)
+        changes_layout.addRow("Remove folder:", remove_layout)
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, max(len(self.paths), 1))
+        self.progress_bar.setValue(0)
+        
+        self.report = QPlainTextEdit()
+        self.report.setReadOnly(True)
+        self.report.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.report.setFont(QFont("Consolas", 9))
+        self.report.setPlaceholderText("Preview shows how each profile would change, without saving anything.")
+        
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        self.preview_button = buttons.addButton("Preview", QDialogButtonBox.ButtonRole.ActionRole)
+        self.preview_button.clicked.connect(self.preview)
+        self.apply_button = buttons.addButton("Apply", QDialogButtonBox.ButtonRole.ActionRole)
+        self.apply_button.clicked.connect(self.apply)
+        buttons.rejected.connect(self.reject)
+        
+        layout.addWidget(changes_group)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.report)
+        layout.addWidget(buttons)
+
+    def build_edit(self):
+        """BulkEdit for the entered changes, or None after explaining what is wrong"""
+        add_folders = []
+        if self.add_host.text().strip() or self.add_sandbox.text().strip():
+            add_folders.append({
+                'host_folder': self.add_host.text().strip(),
+                'sandbox_folder': self.add_sandbox.text().strip(),
+                'read_only': self.add_read_only.isChecked()
+            })
+        remove_folders = []
+        if self.remove_host.text().strip() or self.remove_sandbox.text().strip():
+            remove_folders.append({
+                'host_folder': self.remove_host.text().strip(),
+                'sandbox_folder': self.remove_sandbox.text().strip()
+            })
+        try:
+            edit = BulkEdit(
+                preset=self.preset.currentData(),
+                memory_mb=self.memory_mb.value() if self.set_memory.isChecked() else None,
+                add_folders=add_folders, remove_folders=remove_folders
+            )
+        except ValueError as e:
+            QMessageBox.warning(self, "Bulk Edit", str(e))
+            return None
+        if not edit:
+            QMessageBox.information(self, "Bulk Edit", "Choose at least one change to make.")
+            return None
+        return edit
+
+    def preview(self):
+        """Show how every profile would change, saving nothing"""
+        edit = self.build_edit()
+        if edit is not None:
+            self.start(edit, dry_run=True)
+
+    def apply(self):
+        """Save the changes to every profile after confirming"""
+        edit = self.build_edit()
+        if edit is None:
+            return
+        reply = QMessageBox.question(
+            self, "Bulk Edit",
+            f"Change {len(self.paths)} profiles on disk? Each file is checked after saving "
+            "and restored if anything goes wrong.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            self.start(edit, dry_run=False)
+
+    def start(self, edit, dry_run):
+        self.dry_run = dry_run
+        self.preview_button.setEnabled(False)
+        self.apply_button.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.report.setPlainText("Previewing..." if dry_run else "Saving...")
+        self.runner.start(self.paths, edit, dry_run, self.backups)
+
+    def on_progress(self, done, total):
+        self.progress_bar.setValue(done)
+
+    def on_finished(self, results, error):
+        """Report the batch and announce the profiles it rewrote"""
+        self.preview_button.setEnabled(True)
+        self.apply_button.setEnabled(True)
+        results.sort(key=lambda result: result[0])
+        changed = [(path, diff) for path, failure, diff, written in results if failure is None and diff]
+        failed = [(path, failure) for path, failure, diff, written in results if failure is not None]
+        verb = "Would change" if self.dry_run else "Changed"
+        lines = [f"{verb} {len(changed)} of {len(self.paths)} profiles, {len(failed)} failed"]
+        if error is not None:
+            lines.append(f"Stopped after {len(results)} profiles: {error}")
+        lines.extend(f"FAILED {path}: {failure}" for path, failure in failed)
+        text = "\n".join(lines) + "\n\n" + "".join(
+            diff.format(path, f"{path} (edited)") for path, diff in changed
+        )
+        self.report.setPlainText(text)
+        if not self.dry_run:
+            rewritten = [result[0] for result in results if result[3]]
+            if rewritten:
+                self.profiles_edited.emit(rewritten)
+
+    def reject(self):
+        # Files being saved must not lose their dialog halfway through
+        if self.runner.busy:
+            return
+        super().reject()
+
+
+class ProfileDiffDialog(QDialog):
+    """Read-only text report of a profile comparison or merge"""
+
+    def __init__(self, title, text, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(800, 500)
+        
+        layout = QVBoxLayout(self)
+        self.report = QPlainTextEdit()
+        self.report.setReadOnly(True)
+        self.report.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.report.setFont(QFont("Consolas", 9))
+        self.report.setPlainText(text)
+        layout.addWidget(self.report)
+        
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+
+class XmlHighlighter(QSyntaxHighlighter):
+    """Colors tags, attribute values and comments in the WSB preview
+
+    QSyntaxHighlighter only re-runs highlightBlock for the blocks an edit
+    touched, so patched previews are not re-highlighted as a whole.
+    """
+    TOKENS = re.compile(r'(<!--.*?-->)|(<[^>]*>?)')
+    ATTRIBUTE_VALUES = re.compile(r'"[^"]*"')
+
+    def __init__(self, document):
+        super().__init__(document)
+        self.tag_format = QTextCharFormat()
+        self.tag_format.setForeground(QColor(0, 0, 160))
+        self.value_format = QTextCharFormat()
+        self.value_format.setForeground(QColor(160, 0, 0))
+        self.comment_format = QTextCharFormat()
+        self.comment_format.setForeground(QColor(0, 128, 0))
+
+    def highlightBlock(self, text):
+        if '<' not in text:
+            return
+        for match in self.TOKENS.finditer(text):
+            start, end = match.span()
+            if match.group(1):
+                self.setFormat(start, end - start, self.comment_format)
+                continue
+            self.setFormat(start, end - start, self.tag_format)
+            if '"' in match.group(2):
+                for value in self.ATTRIBUTE_VALUES.finditer(text, start, end):
+                    self.setFormat(value.start(), value.end() - value.start(), self.value_format)
+
+
+class WsbPreviewDocument(QTextDocument):
+    """Highlighted preview text of one profile and the text it was last given"""
+
+    def __init__(self, font, parent=None):
+        super().__init__(parent)
+        self.setDocumentLayout(QPlainTextDocumentLayout(self))
+        self.setDefaultFont(font)
+        # Nothing to undo in a read-only view, so keep no copies of old text
+        self.setUndoRedoEnabled(False)
+        self.highlighter = XmlHighlighter(self)
+        self.shown = None
+
+
+class WsbPreviewEdit(QPlainTextEdit):
+    """Read-only, highlighted WSB preview that only rewrites the lines that changed
+
+    Edits go through a separate cursor, so the user's selection and scroll
+    position survive a refresh. Each open profile can keep its own
+    document, swapped in with setDocument.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setFont(QFont("Courier New", 10))
+        self.setDocument(self.create_document())
+
+    def create_document(self):
+        """An empty preview document for setDocument"""
+        return WsbPreviewDocument(self.font(), self)
+
+    @property
+    def shown(self):
+        return self.document().shown
+
+    def show_text(self, text):
+        """Make the preview show text, patching only the lines that differ"""
+        document = self.document()
+        if text == document.shown:
+            return
+        # Qt also starts a block at U+2029, which would throw line numbers off
+        if document.shown is None or '\u2029' in text or '\u2029' in document.shown:
+            self.setPlainText(text)
+            document.shown = text
+            return
+
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        # Last hunk first, so earlier line numbers stay valid
+        for first, count, replacement in reversed(diff_lines(document.shown, text)):
+            cursor.setPosition(document.findBlockByNumber(first).position())
+            end = document.findBlockByNumber(first + count)
+            cursor.setPosition(
+                end.position() if end.isValid() else document.characterCount() - 1,
+                QTextCursor.MoveMode.KeepAnchor
+            )
+            cursor.insertText(replacement)
+        cursor.endEditBlock()
+        document.shown = text
+
+    def invalidate(self):
+        """Replace the whole text on the next show_text"""
+        self.document().shown = None
+
+
+class DiagnosticsModel(QAbstractTableModel):
+    """Read-only table of tracer statistics, one row per span name"""
+    COLUMNS = ("Span", "Calls", "Last (ms)", "p50 (ms)", "p95 (ms)", "Bytes Written")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+
+    def set_stats(self, stats):
+        rows = [
+            (s.name, s.count, s.last * 1000, s.percentile(0.5) * 1000,
+             s.percentile(0.95) * 1000, s.bytes)
+            for s in stats
+        ]
+        if rows == self.rows:
+            return
+        if [row[0] for row in rows] == [row[0] for row in self.rows]:
+            # Same spans as before, so keep the selection and scroll position
+            self.rows = rows
+            self.dataChanged.emit(self.index(0, 1), self.index(len(rows) - 1, len(self.COLUMNS) - 1))
+            return
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return section + 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if role == Qt.ItemDataRole.TextAlignmentRole and column > 0:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        value = self.rows[index.row()][column]
+        if column in (2, 3, 4):
+            return f"{value:.2f}"
+        if column == 5:
+            return format_size(value) if value else ""
+        return value
+
+
+class DiagnosticsDock(QDockWidget):
+    """Live timings of the instrumented code paths, with Chrome trace export"""
+
+    # How often the table picks up new spans while the dock is visible
+    REFRESH_MS = 1000
+
+    def __init__(self, parent=None):
+        super().__init__("Diagnostics", parent)
+        # Named so the window state can restore its position
+        self.setObjectName("DiagnosticsDock")
+
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+
+        controls = QHBoxLayout()
+        self.record_check = QCheckBox("Record timings")
+        self.record_check.setChecked(tracer.enabled)
+        self.record_check.toggled.connect(self.set_recording)
+        controls.addWidget(self.record_check)
+        controls.addStretch()
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        controls.addWidget(reset_button)
+        export_button = QPushButton("Export Trace...")
+        export_button.clicked.connect(self.export_trace)
+        controls.addWidget(export_button)
+        layout.addLayout(controls)
+
+        self.model = DiagnosticsModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        self.setWidget(widget)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.on_visibility_changed)
+
+    def on_visibility_changed(self, visible):
+        """Only poll the tracer while the dock can be seen"""
+        if visible:
+            self.refresh()
+            self.refresh_timer.start()
+        else:
+            self.refresh_timer.stop()
+
+    def set_recording(self, enabled):
+        """Turn span recording on or off"""
+        tracer.enabled = enabled
+        self.refresh()
+
+    def reset(self):
+        """Drop everything recorded so far"""
+        tracer.reset()
+        self.refresh()
+
+    def refresh(self):
+        """Show the tracer's current statistics"""
+        self.model.set_stats(tracer.snapshot())
+        text = f"{len(tracer.events)} spans recorded"
+        if not tracer.enabled:
+            text += " (recording off)"
+        self.summary_label.setText(text)
+
+    def export_trace(self):
+        """Save the recorded spans as a Chrome trace-event file"""
+        if not tracer.events:
+            QMessageBox.information(
+                self, "Export Trace",
+                "No spans have been recorded yet. Turn on Record timings and use the tool first."
+            )
+            return
+
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export Chrome Trace",
+            "sandboxgui-trace.json", "Trace files (*.json);;All files (*.*)"
+        )
+        if not file_path:
+            return
+        try:
+            tracer.export_chrome_trace(file_path)
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Error",
+                f"Failed to export trace:\n{str(e)}"
+            )
+            return
+        self.summary_label.setText(f"Trace exported: {file_path}")
+
+
+class ProfileDocument:
+    """One open profile: its file, edit state and the models cached for its tab
+
+    The active document's settings live in the window's widgets. An
+    inactive one keeps them in config, together with its folders model and
+    preview document, so switching back rebuilds nothing. unload() drops
+    all of that from a saved profile to bound memory; it is then read from
+    disk again when next shown.
+    """
+
+    def __init__(self, config=None):
+        self.current_file = None
+        # Absolute path of the profile current_file extends, if any
+        self.current_base = None
+        # Whether there are edits that are not saved to current_file
+        self.modified = False
+        self.journal = None
+        self.history = UndoHistory()
+        self.preview_renderer = WsbPreviewRenderer()
+        self.pending_folders_revision = 0
+        # Settings, folders model and preview held while the document is inactive
+        self.config = config if config is not None else SandboxConfig()
+        self.folders_model = None
+        self.preview_document = None
+        self.loaded = True
+
+    @property
+    def title(self):
+        name = os.path.basename(self.current_file) if self.current_file else "Untitled"
+        return f"{name}*" if self.modified else name
+
+    @property
+    def weight(self):
+        """Size of the cached state, in mapped folders"""
+        if self.folders_model is not None:
+            return len(self.folders_model.folders) + 1
+        if self.config is not None:
+            return len(self.config.mapped_folders) + 1
+        return 1
+
+    def unload(self):
+        """Drop the cached state, leaving only what is needed to reload the profile"""
+        self.config = None
+        self.folders_model = None
+        if self.preview_document is not None:
+            self.preview_document.deleteLater()
+            self.preview_document = None
+        self.history = UndoHistory()
+        self.preview_renderer = WsbPreviewRenderer()
+        self.pending_folders_revision = 0
+        self.loaded = False
+
+
+class _DocumentAttribute:
+    """Window attribute that belongs to the active ProfileDocument"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, window, owner=None):
+        if window is None:
+            return self
+        return getattr(window.document, self.name)
+
+    def __set__(self, window, value):
+        setattr(window.document, self.name, value)
+
+
+class SandboxConfigTool(QMainWindow):
+    """Main application window for Windows Sandbox configuration"""
+
+    # State of the profile being edited, switched with the document tabs
+    current_file = _DocumentAttribute()
+    current_base = _DocumentAttribute()
+    modified = _DocumentAttribute()
+    history = _DocumentAttribute()
+    journal = _DocumentAttribute()
+    preview_renderer = _DocumentAttribute()
+    pending_folders_revision = _DocumentAttribute()
+
+    # Inactive profiles kept loaded for instant switching; past either bound
+    # the least recently used saved ones are reloaded from disk when shown
+    MAX_CACHED_DOCUMENTS = 20
+    MAX_CACHED_FOLDERS = 250000
+
+    # Delay used to coalesce bursts of edits into one preview refresh
+    PREVIEW_DEBOUNCE_MS = 200
+    
+    # Longest time an edit waits in memory before reaching the journal
+    JOURNAL_FLUSH_MS = 500
+    
+    # Rolling .bakN copies kept by saves when backups are enabled
+    BACKUP_COUNT = 3
+    
+    # General tab check boxes, named after their SandboxConfig fields
+    TOGGLE_FIELDS = (
+        'vgpu_enabled', 'networking_enabled', 'audio_input_enabled',
+        'video_input_enabled', 'protected_client_enabled',
+        'printer_redirection_enabled', 'clipboard_redirection_enabled',
+        'hostname_enabled', 'force_dark_mode'
+    )
+    
+    def __init__(self, startup_profile=None):
+        super().__init__()
+        self.startup_profile = startup_profile
+        self.settings = QSettings("SandboxGUI", "WindowsSandboxConfig")
+        # The profile being edited; the others wait in document_cache
+        self.document = ProfileDocument()
+        self.document_cache = LruCache(self.MAX_CACHED_DOCUMENTS, self.MAX_CACHED_FOLDERS)
+        # Built the first time Help > Diagnostics is opened
+        self.diagnostics_dock = None
+        self.setup_ui()
+        self.setup_menu()
+        self.mark_startup("menu")
+        self.load_settings()
+        self.mark_startup("load_settings")
+        self.setup_journal()
+        
+    def mark_startup(self, phase):
+        """Record a startup phase when running with --profile-startup"""
+        if self.startup_profile is not None:
+            self.startup_profile.mark(phase)
+            
+    def setup_ui(self):
+        """Setup the user interface"""
+        self.setWindowTitle("Windows Sandbox Configuration Tool")
+        self.setMinimumSize(1000, 700)  # Increased size for better layout
+        self.resize(1200, 800)  # Default size
+        
+        # Central widget
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        
+        # Main layout with better spacing
+        main_layout = QVBoxLayout(central_widget)
+        main_layout.setSpacing(10)
+        main_layout.setContentsMargins(10, 10, 10, 10)
+        
+        # Live preview, debounced so rapid edits trigger one refresh
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(self.PREVIEW_DEBOUNCE_MS)
+        self.preview_timer.timeout.connect(self.on_preview_timer)
+        
+        # Undo history and crash-recovery journal; neither records loads
+        self.replaying_history = False
+        self.loading_config = False
+        self.journal_directory = None
+        self.journal_lock = None
+        self.journal_timer = QTimer(self)
+        self.journal_timer.setSingleShot(True)
+        self.journal_timer.setInterval(self.JOURNAL_FLUSH_MS)
+        self.journal_timer.timeout.connect(self.on_journal_timer)
+        
+        # Values for tabs that have not been built yet
+        self.pending_config = SandboxConfig()
+        self.mapped_folders_widget = None
+        self.logon_command = None
+        self.preview_text = None
+        
+        # One tab per open profile, all sharing the widgets below
+        self.document_tabs = QTabBar()
+        self.document_tabs.setDocumentMode(True)
+        self.document_tabs.setTabsClosable(True)
+        self.document_tabs.setMovable(True)
+        self.document_tabs.setExpanding(False)
+        self.document_tabs.setAutoHide(True)
+        self.add_document_tab(self.document)
+        self.document_tabs.currentChanged.connect(self.on_document_tab_changed)
+        self.document_tabs.tabCloseRequested.connect(self.close_document_tab)
+        main_layout.addWidget(self.document_tabs)
+        
+        # Create tabs; all but General are built on first activation
+        self.tab_widget = QTabWidget()
+        main_layout.addWidget(self.tab_widget)
+        
+        self.lazy_tabs = {}
+        self.setup_general_tab()
+        self.connect_preview_updates()
+        self.connect_journal_updates()
+        self.mark_startup("tab: General")
+        self.add_lazy_tab("Mapped Folders", self.setup_folders_tab)
+        self.add_lazy_tab("Startup", self.setup_startup_tab)
+        self.add_lazy_tab("Preview", self.setup_preview_tab)
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
+        # Previous values of the scalar fields, for undo
+        self.field_values = self.config_fields()
+        
+        # Status bar
+        self.statusBar().showMessage("Ready")
+        
+    def add_lazy_tab(self, title, setup):
+        """Add a placeholder tab that setup fills in when first shown"""
+        tab = QWidget()
+        self.tab_widget.addTab(tab, title)
+        self.lazy_tabs[title] = (tab, setup)
+        
+    def ensure_tab(self, title):
+        """Build a lazy tab if it has not been built yet"""
+        entry = self.lazy_tabs.pop(title, None)
+        if entry is not None:
+            tab, setup = entry
+            setup(tab)
+            self.mark_startup(f"tab: {title}")
+            
+    def ensure_all_tabs(self):
+        """Build every remaining lazy tab"""
+        for title in list(self.lazy_tabs):
+            self.ensure_tab(title)
+            
+    def setup_menu(self):
+        """Setup the menu bar"""
+        menubar = self.menuBar()
+        
+        # File menu
+        file_menu = menubar.addMenu("File")
+        
+        new_action = QAction("New", self)
+        new_action.setShortcut("Ctrl+N")
+        new_action.triggered.connect(self.new_config)
+        file_menu.addAction(new_action)
+        
+        open_action = QAction("Open...", self)
+        open_action.setShortcut("Ctrl+O")
+        open_action.triggered.connect(self.open_config)
+        file_menu.addAction(open_action)
+        
+        save_action = QAction("Save", self)
+        save_action.setShortcut("Ctrl+S")
+        save_action.triggered.connect(self.save_config)
+        file_menu.addAction(save_action)
+        
+        save_as_action = QAction("Save As...", self)
+        save_as_action.setShortcut("Ctrl+Shift+S")
+        save_as_action.triggered.connect(self.save_config_as)
+        file_menu.addAction(save_as_action)
+        
+        close_action = QAction("Close", self)
+        close_action.setShortcut(QKeySequence.StandardKey.Close)
+        close_action.triggered.connect(self.close_current_tab)
+        file_menu.addAction(close_action)
+        
+        file_menu.addSeparator()
+        
+        export_action = QAction("Export WSB...", self)
+        export_action.triggered.connect(self.export_wsb)
+        file_menu.addAction(export_action)
+        
+        self.backup_action = QAction("Keep Backup Copies", self)
+        self.backup_action.setCheckable(True)
+        self.backup_action.setChecked(self.settings.value("keepBackups", False, type=bool))
+        self.backup_action.setStatusTip(
+            f"Keep the last {self.BACKUP_COUNT} versions of saved files as .bak1-.bak{self.BACKUP_COUNT}"
+        )
+        self.backup_action.toggled.connect(lambda checked: self.settings.setValue("keepBackups", checked))
+        file_menu.addAction(self.backup_action)
+        
+        library_action = QAction("Profile Library...", self)
+        library_action.setShortcut("Ctrl+L")
+        library_action.triggered.connect(self.open_library)
+        file_menu.addAction(library_action)
+        
+        compare_action = QAction("Compare With...", self)
+        compare_action.setStatusTip("Show how the current configuration differs from a saved profile")
+        compare_action.triggered.connect(self.compare_with_file)
+        file_menu.addAction(compare_action)
+        
+        merge_action = QAction("Merge...", self)
+        merge_action.setStatusTip("Merge another edited copy of a profile into the current configuration")
+        merge_action.triggered.connect(self.merge_from_file)
+        file_menu.addAction(merge_action)
+        
+        file_menu.addSeparator()
+        
+        exit_action = QAction("Exit", self)
+        exit_action.triggered.connect(self.close)
+        file_menu.addAction(exit_action)
+        
+        # Edit menu
+        edit_menu = menubar.addMenu("Edit")
+        
+        self.undo_action = QAction("Undo", self)
+        self.undo_action.setShortcut(QKeySequence.StandardKey.Undo)
+        self.undo_action.triggered.connect(self.undo)
+        edit_menu.addAction(self.undo_action)
+        
+        self.redo_action = QAction("Redo", self)
+        self.redo_action.setShortcut(QKeySequence.StandardKey.Redo)
+        self.redo_action.triggered.connect(self.redo)
+        edit_menu.addAction(self.redo_action)
+        self.update_undo_actions()
+        
+        edit_menu.addSeparator()
+        
+        reset_action = QAction("Reset to Defaults", self)
+        reset_action.triggered.connect(self.reset_to_defaults)
+        edit_menu.addAction(reset_action)
+        
+        # Help menu
+        help_menu = menubar.addMenu("Help")
+        
+        diagnostics_action = QAction("Diagnostics", self)
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        help_menu.addAction(diagnostics_action)
+        
+        help_menu.addSeparator()
+        
+        about_action = QAction("About", self)
+        about_action.triggered.connect(self.show_about)
+        help_menu.addAction(about_action)
+        
+    def setup_general_tab(self):
+        """Setup the general configuration tab"""
+        tab = QWidget()
+        self.tab_widget.addTab(tab, "General")
+        
+        # Create scroll area for better space management
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        scroll_widget = QWidget()
+        scroll_area.setWidget(scroll_widget)
+        
+        # Main layout for the tab
+        tab_layout = QVBoxLayout(tab)
+        tab_layout.addWidget(scroll_area)
+        
+        # Two-column layout
+        main_layout = QHBoxLayout(scroll_widget)
+        main_layout.setSpacing(15)
+        
+        # Left column
+        left_column = QVBoxLayout()
+        left_column.setSpacing(10)
+        
+        # Right column
+        right_column = QVBoxLayout()
+        right_column.setSpacing(10)
+        
+        # Left column groups
+        # Basic settings group
+        basic_group = QGroupBox("Basic Settings")
+        basic_layout = QGridLayout(basic_group)
+        basic_layout.setVerticalSpacing(8)
+        basic_layout.setHorizontalSpacing(10)
+        
+        self.vgpu_enabled = QCheckBox("Enable vGPU")
+        self.vgpu_enabled.setChecked(True)
+        self.vgpu_enabled.setToolTip("Enable or disable virtualized GPU support")
+        
+        self.networking_enabled = QCheckBox("Enable Networking")
+        self.networking_enabled.setChecked(True)
+        self.networking_enabled.setToolTip("Enable or disable network access")
+        
+        self.clipboard_redirection_enabled = QCheckBox("Enable Clipboard Redirection")
+        self.clipboard_redirection_enabled.setChecked(True)
+        self.clipboard_redirection_enabled.setToolTip("Enable or disable clipboard sharing")
+        
+        basic_layout.addWidget(self.vgpu_enabled, 0, 0)
+        basic_layout.addWidget(self.networking_enabled, 0, 1)
+        basic_layout.addWidget(self.clipboard_redirection_enabled, 1, 0)
+        
+        # Hardware redirection group
+        hardware_group = QGroupBox("Hardware Redirection")
+        hardware_layout = QGridLayout(hardware_group)
+        hardware_layout.setVerticalSpacing(8)
+        hardware_layout.setHorizontalSpacing(10)
+        
+        self.audio_input_enabled = QCheckBox("Audio Input")
+        self.audio_input_enabled.setChecked(False)
+        self.audio_input_enabled.setToolTip("Enable or disable microphone access")
+        
+        self.video_input_enabled = QCheckBox("Video Input")
+        self.video_input_enabled.setChecked(False)
+        self.video_input_enabled.setToolTip("Enable or disable camera access")
+        
+        self.printer_redirection_enabled = QCheckBox("Printer Redirection")
+        self.printer_redirection_enabled.setChecked(False)
+        self.printer_redirection_enabled.setToolTip("Enable or disable printer access")
+        
+        hardware_layout.addWidget(self.audio_input_enabled, 0, 0)
+        hardware_layout.addWidget(self.video_input_enabled, 0, 1)
+        hardware_layout.addWidget(self.printer_redirection_enabled, 1, 0)
+        
+        # System settings group
+        system_group = QGroupBox("System Settings")
+        system_layout = QFormLayout(system_group)
+        system_layout.setVerticalSpacing(8)
+        
+        self.memory_mb = QSpinBox()
+        self.memory_mb.setRange(MIN_MEMORY_MB, MAX_MEMORY_MB)
+        self.memory_mb.setValue(4096)
+        self.memory_mb.setSuffix(" MB")
+        self.memory_mb.setToolTip("Memory allocation in megabytes")
+        self.memory_mb.setMinimumWidth(120)
+        system_layout.addRow("Memory Size:", self.memory_mb)
+        
+        self.protected_client_enabled = QCheckBox("Enable Protected Client")
+        self.protected_client_enabled.setChecked(False)
+        self.protected_client_enabled.setToolTip("Enable additional security protections")
+        system_layout.addRow(self.protected_client_enabled)
+        
+        # Add left column groups
+        left_column.addWidget(basic_group)
+        left_column.addWidget(hardware_group)
+        left_column.addWidget(system_group)
+        left_column.addStretch()
+        
+        # Right column groups
+        # Hostname settings group
+        hostname_group = QGroupBox("Hostname Configuration")
+        hostname_layout = QVBoxLayout(hostname_group)
+        hostname_layout.setSpacing(8)
+        
+        self.hostname_enabled = QCheckBox("Set Custom Hostname")
+        self.hostname_enabled.setChecked(False)
+        self.hostname_enabled.setToolTip("Enable custom hostname for the sandbox")
+        hostname_layout.addWidget(self.hostname_enabled)
+        
+        hostname_input_layout = QHBoxLayout()
+        hostname_input_layout.addWidget(QLabel("Hostname:"))
+        
+        self.hostname_value = QLineEdit()
+        self.hostname_value.setPlaceholderText("e.g., MySandbox")
+        self.hostname_value.setEnabled(False)
+        self.hostname_value.setToolTip("Custom hostname for the sandbox (max 15 characters)")
+        self.hostname_value.setMaxLength(15)
+        self.hostname_value.setMaximumWidth(150)
+        hostname_input_layout.addWidget(self.hostname_value)
+        hostname_input_layout.addStretch()
+        
+        hostname_layout.addLayout(hostname_input_layout)
+        
+        # Connect hostname checkbox to enable/disable input
+        self.hostname_enabled.toggled.connect(self.hostname_value.setEnabled)
+        
+        # Appearance settings group
+        appearance_group = QGroupBox("Appearance")
+        appearance_layout = QVBoxLayout(appearance_group)
+        appearance_layout.setSpacing(8)
+        
+        self.force_dark_mode = QCheckBox("Force Dark Mode")
+        self.force_dark_mode.setChecked(False)
+        self.force_dark_mode.setToolTip("Force the sandbox to use dark theme")
+        appearance_layout.addWidget(self.force_dark_mode)
+        
+        # Quick actions group
+        actions_group = QGroupBox("Quick Actions")
+        actions_layout = QGridLayout(actions_group)
+        actions_layout.setSpacing(8)
+        
+        # Security preset buttons
+        secure_preset_btn = QPushButton("Secure Preset")
+        secure_preset_btn.setToolTip("Apply secure settings (disable networking, vGPU, etc.)")
+        secure_preset_btn.clicked.connect(self.apply_secure_preset)
+        
+        default_preset_btn = QPushButton("Default Preset")
+        default_preset_btn.setToolTip("Apply default settings")
+        default_preset_btn.clicked.connect(self.apply_default_preset)
+        
+        testing_preset_btn = QPushButton("Testing Preset")
+        testing_preset_btn.setToolTip("Apply settings optimized for software testing")
+        testing_preset_btn.clicked.connect(self.apply_testing_preset)
+        
+        actions_layout.addWidget(secure_preset_btn, 0, 0)
+        actions_layout.addWidget(default_preset_btn, 0, 1)
+        actions_layout.addWidget(testing_preset_btn, 1, 0)
+        
+        # Add right column groups
+        right_column.addWidget(hostname_group)
+        right_column.addWidget(appearance_group)
+        right_column.addWidget(actions_group)
+        right_column.addStretch()
+        
+        # Add columns to main layout
+        main_layout.addLayout(left_column, 1)
+        main_layout.addLayout(right_column, 1)
+        
+    def apply_preset(self, name):
+        """Set the toggles of one of PRESETS as a single undo step"""
+        self.history.begin_group()
+        for field, value in PRESETS[name].items():
+            getattr(self, field).setChecked(value)
+        self.history.end_group()
+        self.statusBar().showMessage(f"Applied {name} preset settings")
+        
+    def apply_secure_preset(self):
+        """Apply secure preset settings"""
+        self.apply_preset('secure')
+        
+    def apply_default_preset(self):
+        """Apply default preset settings"""
+        self.apply_preset('default')
+        
+    def apply_testing_preset(self):
+        """Apply testing preset settings"""
+        self.apply_preset('testing')
+        
+    def setup_folders_tab(self, tab):
+        """Setup the mapped folders tab"""
+        layout = QVBoxLayout(tab)
+        layout.setSpacing(10)
+        
+        # Compact instructions
+        instructions = QLabel(
+            "Configure folders to be shared between the host and sandbox. "
+            "Host folders will be accessible from within the sandbox."
+        )
+        instructions.setWordWrap(True)
+        instructions.setMaximumHeight(40)
+        layout.addWidget(instructions)
+        
+        # Mapped folders widget, taking over any folders loaded before it existed
+        self.mapped_folders_widget = MappedFoldersWidget()
+        self.mapped_folders_widget.set_folders(self.pending_config.mapped_folders)
+        self.pending_config.mapped_folders = []
+        self.mapped_folders_widget.folders_changed.connect(self.schedule_preview_update)
+        self.removed_folders = None
+        self.folders_before_reset = None
+        for signal, slot in self.folders_model_signals(self.mapped_folders_widget.model):
+            signal.connect(slot)
+        layout.addWidget(self.mapped_folders_widget)
+        
+    def folders_model_signals(self, model):
+        """(signal, slot) pairs journaling and recording undo history for a folders model"""
+        return (
+            (model.rowsInserted, self.journal_folders_inserted),
+            (model.rowsRemoved, self.journal_folders_removed),
+            (model.dataChanged, self.journal_folders_changed),
+            (model.modelReset, self.journal_folders_reset),
+            (model.rowsInserted, self.history_folders_inserted),
+            (model.rowsAboutToBeRemoved, self.history_folders_about_to_be_removed),
+            (model.rowsRemoved, self.history_folders_removed),
+            (model.folder_edited, self.history_folder_edited),
+            (model.modelAboutToBeReset, self.history_folders_about_to_be_reset),
+            (model.modelReset, self.history_folders_reset),
+        )
+        
+    def set_folders_model(self, model):
+        """Show another profile's folders model without rebuilding the table"""
+        widget = self.mapped_folders_widget
+        for signal, slot in self.folders_model_signals(widget.model):
+            signal.disconnect(slot)
+        widget.set_model(model)
+        for signal, slot in self.folders_model_signals(model):
+            signal.connect(slot)
+        self.schedule_preview_update()
+        
+    def setup_startup_tab(self, tab):
+        """Setup the startup command tab"""
+        # Main horizontal layout
+        main_layout = QHBoxLayout(tab)
+        main_layout.setSpacing(15)
+        
+        # Left side - Logon command configuration
+        left_layout = QVBoxLayout()
+        
+        # Logon command group - more compact
+        logon_group = QGroupBox("Logon Command")
+        logon_layout = QVBoxLayout(logon_group)
+        logon_layout.setSpacing(8)
+        
+        instructions = QLabel(
+            "Specify a command to run when the sandbox starts up."
+        )
+        instructions.setWordWrap(True)
+        logon_layout.addWidget(instructions)
+        
+        # Command input layout
+        command_layout = QHBoxLayout()
+        command_layout.addWidget(QLabel("Command:"))
+        
+        self.logon_command = QLineEdit()
+        self.logon_command.setPlaceholderText("e.g., C:\\Windows\\System32\\cmd.exe")
+        self.logon_command.setText(self.pending_config.logon_command)
+        self.logon_command.textChanged.connect(self.schedule_preview_update)
+        self.logon_command.textChanged.connect(lambda text: self.record_field('logon_command', text))
+        command_layout.addWidget(self.logon_command)
+        
+        # Browse button for easier file selection
+        browse_btn = QPushButton("Browse...")
+        browse_btn.setMaximumWidth(80)
+        browse_btn.clicked.connect(self.browse_logon_command)
+        command_layout.addWidget(browse_btn)
+        
+        logon_layout.addLayout(command_layout)
+        
+        # Quick command buttons
+        quick_commands_layout = QGridLayout()
+        quick_commands_layout.setSpacing(5)
+        
+        cmd_btn = QPushButton("CMD")
+        cmd_btn.setToolTip("Command Prompt")
+        cmd_btn.clicked.connect(lambda: self.set_quick_command("C:\\Windows\\System32\\cmd.exe"))
+        
+        ps_btn = QPushButton("PowerShell")
+        ps_btn.setToolTip("PowerShell")
+        ps_btn.clicked.connect(lambda: self.set_quick_command("C:\\Windows\\System32\\WindowsPowerShell\\v1.0\\powershell.exe"))
+        
+        explorer_btn = QPushButton("Explorer")
+        explorer_btn.setToolTip("File Explorer")
+        explorer_btn.clicked.connect(lambda: self.set_quick_command("C:\\Windows\\explorer.exe"))
+        
+        clear_btn = QPushButton("Clear")
+        clear_btn.setToolTip("Clear command")
+        clear_btn.clicked.connect(lambda: self.logon_command.clear())
+        
+        quick_commands_layout.addWidget(cmd_btn, 0, 0)
+        quick_commands_layout.addWidget(ps_btn, 0, 1)
+        quick_commands_layout.addWidget(explorer_btn, 1, 0)
+        quick_commands_layout.addWidget(clear_btn, 1, 1)
+        
+        quick_group = QGroupBox("Quick Commands")
+        quick_group.setLayout(quick_commands_layout)
+        
+        left_layout.addWidget(logon_group)
+        left_layout.addWidget(quick_group)
+        left_layout.addStretch()
+        
+        # Right side - Examples and help
+        right_layout = QVBoxLayout()
+        
+        # Example commands - more compact
+        examples_group = QGroupBox("Command Examples")
+        examples_layout = QVBoxLayout(examples_group)
+        
+        examples_text = QTextEdit()
+        examples_text.setReadOnly(True)
+        examples_text.setMaximumHeight(200)
+        examples_text.setPlainText(
+            "Common Commands:\n"
+            "• C:\\Windows\\System32\\cmd.exe\n"
+            "• C:\\Windows\\System32\\WindowsPowerShell\\v1.0\\powershell.exe\n"
+            "• C:\\Windows\\explorer.exe\n\n"
+            "Custom Applications:\n"
+            "• C:\\Users\\WDAGUtilityAccount\\Desktop\\Shared\\myapp.exe\n"
+            "• C:\\Users\\WDAGUtilityAccount\\Desktop\\Shared\\setup.bat\n\n"
+            "Note: Files in mapped folders can be accessed via:\n"
+            "C:\\Users\\WDAGUtilityAccount\\Desktop\\Shared\\"
+        )
+        examples_layout.addWidget(examples_text)
+        
+        # Tips section
+        tips_group = QGroupBox("Tips")
+        tips_layout = QVBoxLayout(tips_group)
+        
+        tips_label = QLabel(
+            "• Use mapped folders to share files with the sandbox\n"
+            "• Commands run after the user logs into the sandbox\n"
+            "• Use full paths for reliable execution\n"
+            "• Batch files (.bat) can run multiple commands"
+        )
+        tips_label.setWordWrap(True)
+        tips_layout.addWidget(tips_label)
+        
+        right_layout.addWidget(examples_group)
+        right_layout.addWidget(tips_group)
+        right_layout.addStretch()
+        
+        # Add layouts to main layout
+        main_layout.addLayout(left_layout, 1)
+        main_layout.addLayout(right_layout, 1)
+        
+    def browse_logon_command(self):
+        """Browse for logon command executable"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Select Command",
+            "C:\\Windows\\System32",
+            "Executable files (*.exe *.bat *.cmd);;All files (*.*)"
+        )
+        if file_path:
+            self.logon_command.setText(file_path)
+            
+    def set_quick_command(self, command):
+        """Set a quick command"""
+        self.logon_command.setText(command)
+        
+    def setup_preview_tab(self, tab):
+        """Setup the preview tab"""
+        layout = QVBoxLayout(tab)
+        
+        # Preview controls
+        controls_layout = QHBoxLayout()
+        
+        refresh_button = QPushButton("Refresh Preview")
+        refresh_button.clicked.connect(self.refresh_preview)
+        controls_layout.addWidget(refresh_button)
+        controls_layout.addStretch()
+        
+        layout.addLayout(controls_layout)
+        
+        # Preview text
+        self.preview_text = WsbPreviewEdit()
+        layout.addWidget(self.preview_text)
+        
+    def connect_preview_updates(self):
+        """Schedule a preview refresh whenever a General tab input changes"""
+        for checkbox in (
+            self.vgpu_enabled, self.networking_enabled, self.audio_input_enabled,
+            self.video_input_enabled, self.protected_client_enabled,
+            self.printer_redirection_enabled, self.clipboard_redirection_enabled,
+            self.hostname_enabled, self.force_dark_mode
+        ):
+            checkbox.toggled.connect(self.schedule_preview_update)
+        self.memory_mb.valueChanged.connect(self.schedule_preview_update)
+        self.hostname_value.textChanged.connect(self.schedule_preview_update)
+        
+    def connect_journal_updates(self):
+        """Journal every General tab edit for crash recovery"""
+        for field in self.TOGGLE_FIELDS:
+            getattr(self, field).toggled.connect(
+                lambda checked, field=field: self.record_field(field, checked)
+            )
+        self.memory_mb.valueChanged.connect(lambda value: self.record_field('memory_mb', value))
+        self.hostname_value.textChanged.connect(lambda text: self.record_field('hostname_value', text))
+        
+    def setup_journal(self):
+        """Start the crash-recovery journal, offering to restore a crashed session"""
+        directory = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+        if not directory:
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError:
+            return
+            
+        # Only one running instance owns the journal; a crashed owner's lock is stale
+        self.journal_lock = QLockFile(os.path.join(directory, "recovery.lock"))
+        if not self.journal_lock.tryLock(0):
+            self.journal_lock = None
+            return
+            
+        self.journal_directory = directory
+        # Journals of a crashed session, one per open profile (or a single
+        # one in directory itself from before profiles had their own)
+        old_journals = [EditJournal(path) for path in [directory] + document_journal_dirs(directory)]
+        recovered = []
+        for journal in old_journals:
+            result = recover_journal(journal.directory)
+            if result is not None:
+                recovered.append(result)
+                
+        self.journal = self.new_journal()
+        if not recovered:
+            self.discard_journals(old_journals)
+            self.restart_journal()
+        else:
+            # The old journals stay on disk until the user has decided
+            QTimer.singleShot(0, lambda: self.offer_recovery(recovered, old_journals))
+            
+    def new_journal(self):
+        """An unstarted journal for a newly opened profile, or None without crash recovery"""
+        if self.journal_directory is None:
+            return None
+        return EditJournal(os.path.join(self.journal_directory, DOCUMENT_JOURNALS_DIR, uuid.uuid4().hex))
+        
+    def discard_journals(self, journals):
+        """Delete journals and the per-profile directories they were kept in"""
+        for journal in journals:
+            journal.discard()
+            if journal.directory != self.journal_directory:
+                try:
+                    os.rmdir(journal.directory)
+                except OSError:
+                    pass
+                    
+    def offer_recovery(self, recovered, old_journals=()):
+        """Ask whether to restore the unsaved profiles of a crashed session
+
+        recovered holds (config, current_file) pairs; each is restored in a
+        tab of its own.
+        """
+        reply = QMessageBox.question(
+            self, "Recover Configuration",
+            "The previous session did not exit cleanly. "
+            "Restore its unsaved changes?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.Yes
+        )
+        
+        if reply == QMessageBox.StandardButton.Yes:
+            for number, (config, current_file) in enumerate(recovered):
+                if number:
+                    self.open_document(ProfileDocument())
+                self.load_configuration(config)
+                self.current_file = current_file
+                self.current_base = self.base_of(current_file)
+                self.modified = True
+                self.update_window_title()
+                self.restart_journal(saved=False)
+            self.statusBar().showMessage("Recovered unsaved changes")
+        else:
+            self.restart_journal()
+        self.discard_journals(old_journals)
+            
+    def restart_journal(self, saved=True):
+        """Snapshot the current configuration and begin a new edit log"""
+        if self.journal is None:
+            return
+        self.journal_timer.stop()
+        try:
+            self.journal.start(self.get_current_configuration(), self.current_file, saved)
+        except OSError as e:
+            self.stop_journal(e)
+            
+    def stop_journal(self, error):
+        """Turn crash recovery off for this profile after its journal could not be written"""
+        self.journal_timer.stop()
+        self.discard_journals([self.journal])
+        self.journal = None
+        self.statusBar().showMessage(f"Crash recovery disabled: {error}")
+        
+    @property
+    def journaling(self):
+        return self.journal is not None and not self.loading_config
+        
+    def record_edit(self, edit):
+        """Queue an edit for the journal, flushing it shortly afterwards"""
+        if not self.journaling:
+            return
+        self.journal.record(edit)
+        if not self.journal_timer.isActive():
+            self.journal_timer.start()
+            
+    def record_field(self, field, value):
+        """Record a scalar field change in the undo history and journal"""
+        previous = self.field_values.get(field)
+        self.field_values[field] = value
+        self.record_history(
+            {'op': 'set', 'field': field, 'value': value},
+            {'op': 'set', 'field': field, 'value': previous},
+            field
+        )
+        self.record_edit({'op': 'set', 'field': field, 'value': value})
+        
+    def journal_folders_inserted(self, parent, first, last):
+        if self.journaling:
+            folders = self.mapped_folders_widget.model.folders[first:last + 1]
+            self.record_edit({
+                'op': 'insert_folders', 'row': first,
+                'folders': [folder.to_dict() for folder in folders]
+            })
+            
+    def journal_folders_removed(self, parent, first, last):
+        self.record_edit({'op': 'remove_folders', 'row': first, 'count': last - first + 1})
+        
+    def journal_folders_changed(self, top_left, bottom_right, roles=()):
+        model = self.mapped_folders_widget.model
+        # Status, size and highlighting updates are not edits
+        if not self.journaling or not model.is_folder_edit(top_left, roles):
+            return
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self.record_edit({'op': 'update_folder', 'row': row, 'folder': model.folders[row].to_dict()})
+            
+    def journal_folders_reset(self):
+        if self.journaling:
+            self.record_edit({
+                'op': 'set_folders',
+                'folders': [folder.to_dict() for folder in self.mapped_folders_widget.model.folders]
+            })
+            
+    def config_fields(self):
+        """Current values of every configuration field except the folders"""
+        config = self.get_sandbox_config()
+        return {
+            name: getattr(config, name)
+            for name in SandboxConfig.__slots__ if name != 'mapped_folders'
+        }
+        
+    def record_history(self, edit, inverse, key):
+        """Add an edit to the undo history unless it comes from a load or an undo"""
+        if self.loading_config or self.replaying_history:
+            return
+        self.mark_modified()
+        self.history.record(edit, inverse, key)
+        self.update_undo_actions()
+        
+    def mark_modified(self):
+        """Note that the current profile has unsaved edits"""
+        if not self.modified:
+            self.modified = True
+            self.update_window_title()
+        
+    def history_folders_inserted(self, parent, first, last):
+        self.record_history(
+            {'op': 'insert_folders', 'row': first,
+             'folders': self.mapped_folders_widget.model.folders[first:last + 1]},
+            {'op': 'remove_folders', 'row': first, 'count': last - first + 1},
+            'folders'
+        )
+        
+    def history_folders_about_to_be_removed(self, parent, first, last):
+        self.removed_folders = self.mapped_folders_widget.model.folders[first:last + 1]
+        
+    def history_folders_removed(self, parent, first, last):
+        self.record_history(
+            {'op': 'remove_folders', 'row': first, 'count': last - first + 1},
+            {'op': 'insert_folders', 'row': first, 'folders': self.removed_folders},
+            'folders'
+        )
+        self.removed_folders = None
+        
+    def history_folder_edited(self, row, previous):
+        self.record_history(
+            {'op': 'update_folder', 'row': row,
+             'folder': self.mapped_folders_widget.model.folders[row].copy()},
+            {'op': 'update_folder', 'row': row, 'folder': previous},
+            'folders'
+        )
+        
+    def history_folders_about_to_be_reset(self):
+        self.folders_before_reset = self.mapped_folders_widget.model.folders
+        
+    def history_folders_reset(self):
+        # Lists are shared with the model, not copied
+        self.record_history(
+            {'op': 'set_folders', 'folders': self.mapped_folders_widget.model.folders},
+            {'op': 'set_folders', 'folders': self.folders_before_reset},
+            'folders'
+        )
+        self.folders_before_reset = None
+        
+    def apply_history_edit(self, edit):
+        """Apply an edit from the undo history to the widgets"""
+        op = edit['op']
+        if op == 'set':
+            field, value = edit['field'], edit['value']
+            if field == 'logon_command':
+                self.set_logon_command(value)
+            elif field == 'memory_mb':
+                self.memory_mb.setValue(value)
+            elif field == 'hostname_value':
+                self.hostname_value.setText(value)
+            else:
+                getattr(self, field).setChecked(value)
+        elif op == 'set_folders':
+            self.set_mapped_folders(edit['folders'])
+        else:
+            model = self.mapped_folders_widget.model
+            if op == 'insert_folders':
+                model.insert_folders(edit['row'], edit['folders'])
+            elif op == 'remove_folders':
+                model.remove_rows(edit['row'], edit['count'])
+            elif op == 'update_folder':
+                model.update_folder(edit['row'], edit['folder'])
+                
+    def undo(self):
+        """Revert the last undo step"""
+        self.replaying_history = True
+        try:
+            done = self.history.undo(self.apply_history_edit)
+        finally:
+            self.replaying_history = False
+        self.update_undo_actions()
+        if done:
+            self.mark_modified()
+            self.statusBar().showMessage("Undo")
+            
+    def redo(self):
+        """Reapply the last undone step"""
+        self.replaying_history = True
+        try:
+            done = self.history.redo(self.apply_history_edit)
+        finally:
+            self.replaying_history = False
+        self.update_undo_actions()
+        if done:
+            self.mark_modified()
+            self.statusBar().showMessage("Redo")
+            
+    def update_undo_actions(self):
+        self.undo_action.setEnabled(self.history.can_undo)
+        self.redo_action.setEnabled(self.history.can_redo)
+        
+    def on_journal_timer(self):
+        """Write buffered edits, compacting the journal once it grows long"""
+        if self.journal is None:
+            return
+        try:
+            self.journal.flush()
+            if self.journal.needs_compaction:
+                self.journal.compact(self.get_current_configuration(), self.current_file)
+        except OSError as e:
+            self.stop_journal(e)
+            
+    def schedule_preview_update(self, *args):
+        """Restart the debounce timer for the live preview"""
+        self.preview_timer.start()
+        
+    def on_preview_timer(self):
+        """Refresh the preview once edits have settled"""
+        # A hidden preview is brought up to date in on_tab_changed instead
+        if self.preview_text is not None and self.preview_text.isVisible():
+            self.update_preview()
+            
+    def on_tab_changed(self, index):
+        """Handle tab change"""
+        title = self.tab_widget.tabText(index)
+        self.ensure_tab(title)
+        if title == "Preview":
+            self.update_preview()
+            
+    def generate_wsb_xml(self):
+        """Generate WSB XML configuration"""
+        return build_wsb_xml(self.get_sandbox_config())
+        
+    def format_xml(self, element):
+        """Format XML with proper indentation"""
+        return format_xml(element)
+        
+    @traced("update_preview")
+    def update_preview(self):
+        """Update the preview text, re-rendering only the sections that changed"""
+        self.preview_timer.stop()
+        if self.preview_text is None:
+            return
+        try:
+            formatted_xml = self.preview_renderer.render(
+                self.get_sandbox_config(), self.folders_revision()
+            )
+        except Exception as e:
+            formatted_xml = f"Error generating preview: {str(e)}"
+            
+        self.preview_text.show_text(formatted_xml)
+            
+    def refresh_preview(self):
+        """Rebuild the whole preview, discarding cached sections"""
+        self.preview_renderer.invalidate()
+        if self.preview_text is not None:
+            self.preview_text.invalidate()
+        self.update_preview()
+        
+    def new_config(self):
+        """Create a new configuration in a tab of its own"""
+        self.open_document(ProfileDocument())
+        self.statusBar().showMessage("New configuration created")
+        
+    def add_document_tab(self, document):
+        """Add a tab for document without switching to it, returning its index"""
+        index = self.document_tabs.addTab(document.title)
+        self.document_tabs.setTabData(index, document)
+        self.document_tabs.setTabToolTip(index, document.current_file or "")
+        return index
+        
+    def document_tab_index(self, document):
+        """Index of document's tab, or -1"""
+        for index in range(self.document_tabs.count()):
+            if self.document_tabs.tabData(index) is document:
+                return index
+        return -1
+        
+    def find_document_tab(self, file_path):
+        """Index of the tab that has file_path open, or -1"""
+        key = os.path.normcase(os.path.abspath(file_path))
+        for index in range(self.document_tabs.count()):
+            current_file = self.document_tabs.tabData(index).current_file
+            if current_file and os.path.normcase(os.path.abspath(current_file)) == key:
+                return index
+        return -1
+        
+    def open_document(self, document):
+        """Add a tab for a new document, switch to it and start its journal"""
+        document.journal = self.new_journal()
+        self.document_tabs.setCurrentIndex(self.add_document_tab(document))
+        self.restart_journal(saved=not document.modified)
+        
+    def on_document_tab_changed(self, index):
+        """Swap the widgets over to the profile of the selected tab"""
+        document = self.document_tabs.tabData(index)
+        if document is None or document is self.document:
+            return
+        if not document.loaded:
+            try:
+                self.reload_document(document)
+            except Exception as e:
+                QMessageBox.critical(
+                    self, "Error",
+                    f"Failed to reopen configuration:\n{str(e)}"
+                )
+                # Back to the profile that was shown, dropping the broken one
+                self.document_tabs.setCurrentIndex(self.document_tab_index(self.document))
+                self.document_tabs.removeTab(self.document_tab_index(document))
+                return
+                
+        previous = self.document
+        self.store_document()
+        self.activate_document(document)
+        self.document_cache.pop(document)
+        # Profiles with unsaved edits cannot be reloaded, so they always stay
+        for evicted in self.document_cache.put(previous, previous.weight, lambda old: not old.modified):
+            self.unload_document(evicted)
+            
+    def unload_document(self, document):
+        """Drop an inactive document's cached state and journal until it is shown again"""
+        self.document_cache.pop(document)
+        document.unload()
+        if document.journal is not None:
+            self.discard_journals([document.journal])
+            document.journal = None
+            
+    def store_document(self):
+        """Move the current profile's settings out of the widgets into its document"""
+        document = self.document
+        self.preview_timer.stop()
+        # Anything still buffered belongs to this profile's journal
+        self.on_journal_timer()
+        config = self.get_sandbox_config()
+        if self.mapped_folders_widget is not None:
+            document.folders_model = self.mapped_folders_widget.model
+            config.mapped_folders = []
+        else:
+            # The list itself, which undo history may refer to, not a copy
+            config.mapped_folders = self.pending_config.mapped_folders
+        document.config = config
+        if self.preview_text is not None:
+            document.preview_document = self.preview_text.document()
+            
+    def activate_document(self, document):
+        """Show document's settings, folders model and preview in the widgets"""
+        self.document = document
+        config = document.config
+        # Switching is not an edit, so nothing is journaled or added to history
+        self.loading_config = True
+        try:
+            for field in self.TOGGLE_FIELDS:
+                getattr(self, field).setChecked(getattr(config, field))
+            self.memory_mb.setValue(config.memory_mb)
+            self.hostname_value.setText(config.hostname_value)
+            self.set_logon_command(config.logon_command)
+            if self.mapped_folders_widget is None:
+                self.pending_config.mapped_folders = config.mapped_folders
+            else:
+                model = document.folders_model
+                if model is None:
+                    model = self.mapped_folders_widget.create_model(config.mapped_folders)
+                self.set_folders_model(model)
+        finally:
+            self.loading_config = False
+        document.config = None
+        document.folders_model = None
+        self.field_values = self.config_fields()
+        
+        if self.preview_text is not None:
+            if document.preview_document is None:
+                document.preview_document = self.preview_text.create_document()
+            self.preview_text.setDocument(document.preview_document)
+            document.preview_document = None
+            if self.preview_text.isVisible():
+                self.update_preview()
+        self.update_undo_actions()
+        self.update_window_title()
+        
+    def reload_document(self, document):
+        """Read an unloaded document's profile back from disk"""
+        if document.current_file is None:
+            config = SandboxConfig()
+        else:
+            config = SandboxConfig.from_dict(profile_resolver.resolve(document.current_file))
+            document.current_base = profile_resolver.base_of(document.current_file)
+        document.config = config
+        document.loaded = True
+        document.journal = self.new_journal()
+        if document.journal is not None:
+            try:
+                document.journal.start(config.to_dict(), document.current_file)
+            except OSError:
+                document.journal = None
+                
+    def close_document_tab(self, index):
+        """Close a profile's tab, asking first if it has unsaved edits"""
+        document = self.document_tabs.tabData(index)
+        if document.modified:
+            reply = QMessageBox.question(
+                self, "Close Configuration",
+                f"Close {document.title.rstrip('*')}? Its unsaved changes will be lost.",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+                
+        if self.document_tabs.count() == 1:
+            # There is always a profile to edit
+            self.open_document(ProfileDocument())
+        # Closing the current tab switches to a neighbour first
+        self.document_tabs.removeTab(self.document_tab_index(document))
+        self.document_cache.pop(document)
+        if document.journal is not None:
+            self.discard_journals([document.journal])
+            document.journal = None
+        document.unload()
+        
+    def close_current_tab(self):
+        self.close_document_tab(self.document_tabs.currentIndex())
+            
+    def reset_to_defaults(self):
+        """Reset all settings to defaults as a single undo step"""
+        self.history.begin_group()
+        self.vgpu_enabled.setChecked(True)
+        self.networking_enabled.setChecked(True)
+        self.audio_input_enabled.setChecked(False)
+        self.video_input_enabled.setChecked(False)
+        self.protected_client_enabled.setChecked(False)
+        self.printer_redirection_enabled.setChecked(False)
+        self.clipboard_redirection_enabled.setChecked(True)
+        self.memory_mb.setValue(4096)
+        self.set_logon_command("")
+        self.set_mapped_folders([])
+        self.hostname_enabled.setChecked(False)
+        self.hostname_value.clear()
+        self.force_dark_mode.setChecked(False)
+        self.history.end_group()
+        self.statusBar().showMessage("Settings reset to defaults")
+        
+    def open_config(self):
+        """Open a configuration file"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Open Configuration",
+            "", "Configuration files (*.json *.wsb);;JSON files (*.json);;"
+            "Windows Sandbox files (*.wsb);;All files (*.*)"
+        )
+        
+        if file_path:
+            self.open_file(file_path)
+            
+    @traced("open_config")
+    def open_file(self, file_path):
+        """Load a JSON profile or import a .wsb file in a tab of its own"""
+        # A profile that is already open is switched to, not opened twice
+        index = self.find_document_tab(file_path)
+        if index >= 0:
+            self.document_tabs.setCurrentIndex(index)
+            self.statusBar().showMessage(f"Already open: {file_path}")
+            return
+            
+        imported = file_path.lower().endswith('.wsb')
+        try:
+            if imported:
+                config = SandboxConfig.from_dict(parse_wsb(file_path))
+                base = None
+            else:
+                config = SandboxConfig.from_dict(profile_resolver.resolve(file_path))
+                base = profile_resolver.base_of(file_path)
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Error",
+                f"Failed to open configuration:\n{str(e)}"
+            )
+            return
+            
+        # An untouched new configuration is replaced rather than kept in a tab
+        if self.current_file is not None or self.modified:
+            self.open_document(ProfileDocument())
+        self.apply_sandbox_config(config)
+        self.current_base = base
+        if imported:
+            # Imported .wsb files are saved as new JSON profiles
+            self.current_file = None
+            self.modified = True
+            self.update_window_title()
+            self.restart_journal(saved=False)
+            self.statusBar().showMessage(f"Imported: {file_path}")
+        else:
+            self.current_file = file_path
+            self.modified = False
+            self.update_window_title()
+            self.restart_journal()
+            self.statusBar().showMessage(f"Opened: {file_path}")
+            
+    def open_library(self):
+        """Open a directory of profiles in the profile library browser"""
+        directory = QFileDialog.getExistingDirectory(
+            self, "Open Profile Library", self.settings.value("libraryDir", "")
+        )
+        if not directory:
+            return
+            
+        try:
+            library = ProfileLibrary(directory)
+            library.refresh()
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Error",
+                f"Failed to open profile library:\n{str(e)}"
+            )
+            return
+            
+        self.settings.setValue("libraryDir", directory)
+        dialog = ProfileLibraryDialog(library, self)
+        dialog.profile_selected.connect(self.open_file)
+        dialog.bulk_edit_requested.connect(lambda paths: self.open_bulk_edit(paths, dialog))
+        dialog.finished.connect(library.close)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.apply_filters()
+        dialog.show()
+        
+    def open_bulk_edit(self, paths, library_dialog):
+        """Offer bulk changes to profiles selected in the library"""
+        dialog = BulkEditDialog(paths, self.backup_count(), library_dialog)
+        dialog.profiles_edited.connect(library_dialog.rescan)
+        dialog.profiles_edited.connect(self.reload_edited_profiles)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.open()
+        
+    def reload_edited_profiles(self, paths):
+        """Reread open profiles that were changed on disk, keeping any with unsaved edits"""
+        keys = set()
+        for path in paths:
+            # Profiles extending a changed one resolve differently too
+            for affected in {path} | profile_resolver.dependents(path):
+                keys.add(os.path.normcase(os.path.abspath(affected)))
+        kept = []
+        for index in range(self.document_tabs.count()):
+            document = self.document_tabs.tabData(index)
+            if not document.current_file or os.path.normcase(os.path.abspath(document.current_file)) not in keys:
+                continue
+            if document.modified:
+                kept.append(document.title.rstrip('*'))
+            elif document is self.document:
+                try:
+                    config = SandboxConfig.from_dict(profile_resolver.resolve(self.current_file))
+                except Exception as e:
+                    QMessageBox.warning(
+                        self, "Warning",
+                        f"Failed to reload configuration:\n{str(e)}"
+                    )
+                    continue
+                self.apply_sandbox_config(config)
+                self.current_base = self.base_of(self.current_file)
+                self.restart_journal()
+            elif document.loaded:
+                self.unload_document(document)
+        if kept:
+            self.statusBar().showMessage(
+                f"Kept unsaved edits in {', '.join(kept)}; saving will overwrite the bulk changes"
+            )
+            
+    def choose_profile(self, title):
+        """Ask for a JSON profile or .wsb file, returning its path or an empty string"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, title,
+            "", "Configuration files (*.json *.wsb);;All files (*.*)"
+        )
+        return file_path
+        
+    def compare_with_file(self):
+        """Show how the current configuration differs from a file on disk"""
+        file_path = self.choose_profile("Compare With")
+        if not file_path:
+            return
+            
+        try:
+            other = load_config_file(file_path)
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Error",
+                f"Failed to open configuration:\n{str(e)}"
+            )
+            return
+            
+        diff = diff_profiles(other, self.get_current_configuration())
+        current = os.path.basename(self.current_file) if self.current_file else "current configuration"
+        dialog = ProfileDiffDialog(
+            f"Compare - {os.path.basename(file_path)}",
+            diff.format(file_path, current), self
+        )
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+        
+    def merge_from_file(self):
+        """Three-way merge another copy of a profile into the current configuration"""
+        base_path = self.choose_profile("Merge - Choose Common Base")
+        if not base_path:
+            return
+        theirs_path = self.choose_profile("Merge - Choose Other Copy")
+        if not theirs_path:
+            return
+            
+        try:
+            base = load_config_file(base_path)
+            theirs = load_config_file(theirs_path)
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Error",
+                f"Failed to open configuration:\n{str(e)}"
+            )
+            return
+            
+        merged, conflicts = merge_profiles(base, self.get_current_configuration(), theirs)
+        self.apply_configuration_edit(merged)
+        
+        if conflicts:
+            dialog = ProfileDiffDialog(
+                "Merge Conflicts",
+                f"{len(conflicts)} setting(s) changed on both sides; the current values were kept.\n\n"
+                + format_conflicts(conflicts), self
+            )
+            dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+            dialog.show()
+            self.statusBar().showMessage(f"Merged with {len(conflicts)} conflict(s): {theirs_path}")
+        else:
+            self.statusBar().showMessage(f"Merged: {theirs_path}")
+            
+    def apply_configuration_edit(self, config):
+        """Apply a configuration dictionary as a single undoable edit"""
+        config = SandboxConfig.from_dict(config)
+        self.history.begin_group()
+        for field in SCALAR_FIELDS:
+            self.apply_history_edit({'op': 'set', 'field': field, 'value': getattr(config, field)})
+        current = [folder.to_dict() for folder in self.get_mapped_folders()]
+        if current != [folder.to_dict() for folder in config.mapped_folders]:
+            self.set_mapped_folders(config.mapped_folders)
+        self.history.end_group()
+        
+    def save_config(self):
+        """Save the current configuration"""
+        if self.current_file:
+            self.save_to_file(self.current_file)
+        else:
+            self.save_config_as()
+            
+    def save_config_as(self):
+        """Save the configuration to a new file"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Configuration",
+            "", "JSON files (*.json);;All files (*.*)"
+        )
+        
+        if file_path:
+            self.save_to_file(file_path)
+            
+    @traced("save_to_file")
+    def save_to_file(self, file_path):
+        """Save configuration to specified file"""
+        try:
+            config = self.get_current_configuration()
+            if (self.current_base is not None and os.path.normcase(os.path.abspath(self.current_base))
+                    == os.path.normcase(os.path.abspath(file_path))):
+                # Saving over the base itself leaves nothing to extend
+                self.current_base = None
+            if self.current_base is not None:
+                # Derived profiles are saved as overrides of their base
+                extends = os.path.relpath(self.current_base, os.path.dirname(os.path.abspath(file_path)))
+                config = derive_profile(profile_resolver.resolve(self.current_base), config, extends)
+            written = save_profile(config, file_path, self.backup_count())
+            # A same-size save within one timestamp tick looks unchanged to the resolver
+            profile_resolver.invalidate(file_path)
+                
+            self.current_file = file_path
+            self.modified = False
+            self.update_window_title()
+            self.restart_journal()
+            if written:
+                self.statusBar().showMessage(f"Saved: {file_path}")
+            else:
+                self.statusBar().showMessage(f"No changes to save: {file_path}")
+            
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Error",
+                f"Failed to save configuration:\n{str(e)}"
+            )
+            
+    def base_of(self, file_path):
+        """Profile file_path extends, or None if it has no base or cannot be read"""
+        if not file_path:
+            return None
+        try:
+            return profile_resolver.base_of(file_path)
+        except Exception:
+            return None
+            
+    def backup_count(self):
+        """Number of rolling backups saves should keep"""
+        return self.BACKUP_COUNT if self.backup_action.isChecked() else 0
+        
+    def confirm_mappings(self):
+        """Warn about mapping errors and warnings, returning whether to go ahead"""
+        issues = [
+            issue for issue in validate_mappings(self.get_mapped_folders())
+            if issue.severity != ISSUE_INFO
+        ]
+        if not issues:
+            return True
+            
+        shown = "\n".join(f"- {issue.message}" for issue in issues[:10])
+        if len(issues) > 10:
+            shown += f"\n- ... and {len(issues) - 10} more"
+        reply = QMessageBox.warning(
+            self, "Mapping Issues",
+            f"The mapped folders have {format_issue_counts(issues)}:\n\n{shown}\n\nExport anyway?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        return reply == QMessageBox.StandardButton.Yes
+        
+    def export_wsb(self):
+        """Export as WSB file"""
+        if not self.confirm_mappings():
+            return
+            
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export WSB Configuration",
+            "", "Windows Sandbox files (*.wsb);;All files (*.*)"
+        )
+        
+        if file_path:
+            try:
+                with tracer.span("export_wsb"):
+                    written = save_wsb(self.get_sandbox_config(), file_path, self.backup_count())
+                if written:
+                    self.statusBar().showMessage(f"Exported WSB: {file_path}")
+                else:
+                    self.statusBar().showMessage(f"WSB already up to date: {file_path}")
+                
+                # Ask if user wants to run the sandbox
+                reply = QMessageBox.question(
+                    self, "Export Complete",
+                    f"WSB file exported successfully!\n\nDo you want to open the sandbox now?",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                    QMessageBox.StandardButton.No
+                )
+                
+                if reply == QMessageBox.StandardButton.Yes:
+                    os.startfile(file_path)
+                    
+            except Exception as e:
+                QMessageBox.critical(
+                    self, "Error",
+                    f"Failed to export WSB file:\n{str(e)}"
+                )
+                
+    def get_sandbox_config(self):
+        """Get the current configuration as a SandboxConfig"""
+        return SandboxConfig(
+            vgpu_enabled=self.vgpu_enabled.isChecked(),
+            networking_enabled=self.networking_enabled.isChecked(),
+            audio_input_enabled=self.audio_input_enabled.isChecked(),
+            video_input_enabled=self.video_input_enabled.isChecked(),
+            protected_client_enabled=self.protected_client_enabled.isChecked(),
+            printer_redirection_enabled=self.printer_redirection_enabled.isChecked(),
+            clipboard_redirection_enabled=self.clipboard_redirection_enabled.isChecked(),
+            memory_mb=self.memory_mb.value(),
+            logon_command=self.get_logon_command(),
+            mapped_folders=self.get_mapped_folders(),
+            hostname_enabled=self.hostname_enabled.isChecked(),
+            hostname_value=self.hostname_value.text(),
+            force_dark_mode=self.force_dark_mode.isChecked()
+        )
+        
+    def apply_sandbox_config(self, config):
+        """Apply a SandboxConfig to the widgets"""
+        # A load is journaled as one snapshot by restart_journal, not per field
+        self.loading_config = True
+        try:
+            self.vgpu_enabled.setChecked(config.vgpu_enabled)
+            self.networking_enabled.setChecked(config.networking_enabled)
+            self.audio_input_enabled.setChecked(config.audio_input_enabled)
+            self.video_input_enabled.setChecked(config.video_input_enabled)
+            self.protected_client_enabled.setChecked(config.protected_client_enabled)
+            self.printer_redirection_enabled.setChecked(config.printer_redirection_enabled)
+            self.clipboard_redirection_enabled.setChecked(config.clipboard_redirection_enabled)
+            self.memory_mb.setValue(config.memory_mb)
+            self.set_logon_command(config.logon_command)
+            
+            # Load hostname settings
+            self.hostname_enabled.setChecked(config.hostname_enabled)
+            self.hostname_value.setText(config.hostname_value)
+            
+            # Load appearance settings
+            self.force_dark_mode.setChecked(config.force_dark_mode)
+            
+            # Load mapped folders
+            self.set_mapped_folders(config.mapped_folders)
+        finally:
+            self.loading_config = False
+        # A loaded profile starts a fresh history
+        self.field_values = self.config_fields()
+        self.history.clear()
+        self.update_undo_actions()
+            
+    def get_logon_command(self):
+        """Logon command from the Startup tab, or the pending value if it is not built"""
+        if self.logon_command is None:
+            return self.pending_config.logon_command
+        return self.logon_command.text()
+        
+    def set_logon_command(self, command):
+        """Set the logon command, keeping it pending until the Startup tab is built"""
+        if self.logon_command is None:
+            self.pending_config.logon_command = command
+            self.record_field('logon_command', command)
+            self.schedule_preview_update()
+        else:
+            self.logon_command.setText(command)
+            
+    def get_mapped_folders(self):
+        """Mapped folders from the table, or the pending list if it is not built"""
+        if self.mapped_folders_widget is None:
+            return list(self.pending_config.mapped_folders)
+        return list(self.mapped_folders_widget.get_folders())
+        
+    def set_mapped_folders(self, folders):
+        """Replace the mapped folders, keeping them pending until the tab is built"""
+        if self.mapped_folders_widget is None:
+            previous = self.pending_config.mapped_folders
+            self.pending_config.mapped_folders = folders
+            self.pending_folders_revision += 1
+            self.record_history(
+                {'op': 'set_folders', 'folders': folders},
+                {'op': 'set_folders', 'folders': previous},
+                'folders'
+            )
+            if self.journaling:
+                self.record_edit({'op': 'set_folders', 'folders': [folder.to_dict() for folder in folders]})
+            self.schedule_preview_update()
+        else:
+            self.mapped_folders_widget.set_folders(folders)
+            
+    def folders_revision(self):
+        """Key that changes whenever the mapped folders change"""
+        if self.mapped_folders_widget is None:
+            return ("pending", self.pending_folders_revision)
+        return self.mapped_folders_widget.revision
+        
+    def get_current_configuration(self):
+        """Get the current configuration as a dictionary"""
+        return self.get_sandbox_config().to_dict()
+        
+    def load_configuration(self, config):
+        """Load configuration from dictionary"""
+        self.apply_sandbox_config(SandboxConfig.from_dict(config))
+        
+    def update_window_title(self):
+        """Update the window title and the current profile's tab"""
+        index = self.document_tab_index(self.document)
+        if index >= 0:
+            self.document_tabs.setTabText(index, self.document.title)
+            self.document_tabs.setTabToolTip(index, self.current_file or "")
+        if self.current_file:
+            filename = os.path.basename(self.current_file)
+            if self.current_base is not None:
+                filename += f" (extends {os.path.basename(self.current_base)})"
+            self.setWindowTitle(f"Windows Sandbox Configuration Tool - {filename}")
+        else:
+            self.setWindowTitle("Windows Sandbox Configuration Tool")
+            
+    def show_diagnostics(self):
+        """Show the Diagnostics dock, recording timings from the first time it opens"""
+        if self.diagnostics_dock is None:
+            tracer.enabled = True
+            self.diagnostics_dock = DiagnosticsDock(self)
+            if not self.restoreDockWidget(self.diagnostics_dock):
+                self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.diagnostics_dock)
+        self.diagnostics_dock.show()
+        self.diagnostics_dock.raise_()
+        
+    def show_about(self):
+        """Show about dialog"""
+        QMessageBox.about(
+            self, "About Windows Sandbox Configuration Tool",
+            "<h3>Windows Sandbox Configuration Tool</h3>"
+            "<p>A GUI tool for creating and managing Windows Sandbox configuration files (.wsb)</p>"
+            "<p>Based on Microsoft Windows Sandbox documentation.</p>"
+            "<p><b>Features:</b></p>"
+            "<ul>"
+            "<li>Configure all Windows Sandbox options</li>"
+            "<li>Manage mapped folders</li>"
+            "<li>Set startup commands</li>"
+            "<li>Preview and export WSB files</li>"
+            "<li>Save/load configurations</li>"
+            "</ul>"
+            "<p><b>Supported Options:</b></p>"
+            "<ul>"
+            "<li>VGpu (Virtual GPU)</li>"
+            "<li>Networking</li>"
+            "<li>Audio Input</li>"
+            "<li>Video Input</li>"
+            "<li>Protected Client</li>"
+            "<li>Printer Redirection</li>"
+            "<li>Clipboard Redirection</li>"
+            "<li>Memory Allocation</li>"
+            "<li>Custom Hostname</li>"
+            "<li>Force Dark Mode</li>"
+            "<li>Mapped Folders</li>"
+            "<li>Logon Command</li>"
+            "</ul>"
+            "<p>Version 1.0</p>"
+        )
+        
+    def load_settings(self):
+        """Load application settings"""
+        # Restore window geometry
+        geometry = self.settings.value("geometry")
+        if geometry:
+            self.restoreGeometry(geometry)
+            
+        # Restore window state
+        state = self.settings.value("windowState")
+        if state:
+            self.restoreState(state)
+            
+    def save_settings(self):
+        """Save application settings"""
+        self.settings.setValue("geometry", self.saveGeometry())
+        self.settings.setValue("windowState", self.saveState())
+        
+    def closeEvent(self, event):
+        """Handle application close event, asking first if any tab has unsaved edits"""
+        unsaved = [
+            self.document_tabs.tabData(index).title.rstrip('*')
+            for index in range(self.document_tabs.count())
+            if self.document_tabs.tabData(index).modified
+        ]
+        if unsaved:
+            reply = QMessageBox.question(
+                self, "Quit",
+                f"Quit with unsaved changes to {', '.join(unsaved)}? They will be lost.",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                event.ignore()
+                return
+
+        self.save_settings()
+        if self.mapped_folders_widget is not None:
+            self.mapped_folders_widget.shutdown()
+        # A clean exit leaves nothing to recover
+        self.journal_timer.stop()
+        for index in range(self.document_tabs.count()):
+            document = self.document_tabs.tabData(index)
+            if document.journal is not None:
+                self.discard_journals([document.journal])
+                document.journal = None
+        if self.journal_lock is not None:
+            self.journal_lock.unlock()
+        event.accept()
+
+
+def finish_startup_profile(app, window, profile):
+    """Time the first paint, then the deferred tabs, report, and quit"""
+    window.repaint()
+    profile.mark("first paint")
+    profile.report()
+    
+    # Lazy tabs are normally built on first use; time them separately
+    profile.reset()
+    window.ensure_all_tabs()
+    print("\ndeferred tabs:", file=sys.stderr)
+    profile.report()
+    window.close()
+    app.quit()
+
+
+def run_gui(argv, profile=None):
+    """Create the application and main window, returning the exit code"""
+    app = QApplication(argv)
+    if profile is not None:
+        profile.mark("QApplication")
+    
+    # Set application properties
+    app.setApplicationName("Windows Sandbox Configuration Tool")
+    app.setApplicationVersion("1.0")
+    app.setOrganizationName("SandboxGUI")
+    app.setOrganizationDomain("sandboxgui.local")
+    
+    # Create and show main window
+    window = SandboxConfigTool(startup_profile=profile)
+    window.show()
+    
+    if profile is not None:
+        QTimer.singleShot(0, lambda: finish_startup_profile(app, window, profile))
+    
+    # Run application
+    return app.exec()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the profile archive format: ProfileArchiveWriter, ProfileArchive
+and the --extract command
+
+Usage: python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sandbox_config import (
+    SANDBOX_SHARED_FOLDER, MappedFolder, SandboxConfig, ProfileArchive, ProfileArchiveWriter,
+    load_profile, run_extract
+)
+
+# Seeded, so a failure is reproducible
+FUZZ_SEED = 25
+FUZZ_ROUNDS = 1500
+
+
+def make_profiles(count=200):
+    """Varied (name, configuration dictionary) pairs, covering shared and odd paths"""
+    rnd = random.Random(count)
+    hosts = ["D:\\Projects\\team{team}\\repo{j}", "/home/user/p{j}/", "", "C:\\", "relative",
+             "\\\\server\\share\\x{j}", "E:/mixed\\sep/{j}"]
+    sandboxes = [SANDBOX_SHARED_FOLDER + "\\repo{j}", "", "C:/mixed\\sep/x", "C:\\Ünïcode\\{j}"]
+    profiles = []
+    for i in range(count):
+        config = SandboxConfig(
+            vgpu_enabled=rnd.random() < .5, networking_enabled=rnd.random() < .5,
+            audio_input_enabled=rnd.random() < .5, force_dark_mode=rnd.random() < .5,
+            hostname_enabled=rnd.random() < .5,
+            memory_mb=rnd.choice([512, 4096, 32768, 2 ** 40]),
+            logon_command=rnd.choice(["", "cmd.exe /c echo ü", f"run{i}"]),
+            hostname_value=rnd.choice(["", "box", "名前"]),
+            mapped_folders=[
+                MappedFolder(rnd.choice(hosts).format(team=i % 7, j=j),
+                             rnd.choice(sandboxes).format(j=j), rnd.random() < .5)
+                for j in range(rnd.randint(0, 30))
+            ]
+        )
+        profiles.append((f"team{i % 7}/sub{i % 3}/profile{i}.json", config.to_dict()))
+    return profiles
+
+
+class ProfileArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "profiles.sbxa")
+        self.profiles = make_profiles()
+        writer = ProfileArchiveWriter()
+        for name, config in self.profiles:
+            writer.add(name, config)
+        self.data = writer.to_bytes()
+        self.write(self.data)
+
+    def write(self, data, path=None):
+        with open(path or self.path, 'wb') as f:
+            f.write(data)
+
+    def test_round_trip(self):
+        with ProfileArchive(self.path) as archive:
+            self.assertEqual(len(archive), len(self.profiles))
+            for name, config in self.profiles:
+                self.assertIn(name, archive)
+                self.assertEqual(archive.load(name), config)
+            self.assertNotIn("missing.json", archive)
+            with self.assertRaises(KeyError):
+                archive.load("missing.json")
+
+    def test_iteration_is_sorted(self):
+        expected = sorted(name for name, _ in self.profiles)
+        with ProfileArchive(self.path) as archive:
+            self.assertEqual(list(archive), expected)
+            self.assertEqual([name for name, _ in archive.items()], expected)
+            self.assertEqual(dict(archive.items()), dict(self.profiles))
+
+    def test_empty_archive(self):
+        self.write(ProfileArchiveWriter().to_bytes())
+        with ProfileArchive(self.path) as archive:
+            self.assertEqual(len(archive), 0)
+            self.assertEqual(list(archive), [])
+
+    def test_writer_is_deterministic(self):
+        writer = ProfileArchiveWriter()
+        for name, config in self.profiles:
+            writer.add(name, config)
+        self.assertEqual(writer.to_bytes(), self.data)
+
+        # Ids follow the order profiles are added in, but the contents do not
+        writer = ProfileArchiveWriter()
+        for name, config in reversed(self.profiles):
+            writer.add(name, config)
+        self.write(writer.to_bytes())
+        with ProfileArchive(self.path) as archive:
+            self.assertEqual(dict(archive.items()), dict(self.profiles))
+
+    def test_writer_rejects_bad_values(self):
+        writer = ProfileArchiveWriter()
+        writer.add("a.json", SandboxConfig().to_dict())
+        with self.assertRaises(ValueError):
+            writer.add("a.json", SandboxConfig().to_dict())
+        with self.assertRaises(ValueError):
+            writer.add("b.json", dict(SandboxConfig().to_dict(), memory_mb="lots"))
+
+    def read_everything(self):
+        """Open the archive and decode every profile, as extraction does"""
+        with ProfileArchive(self.path) as archive:
+            for name, config in archive.items():
+                SandboxConfig.from_dict(config)
+            "profile0.json" in archive
+
+    def test_truncated_archives_raise_value_error(self):
+        for length in list(range(0, 64)) + list(range(64, len(self.data), 97)):
+            self.write(self.data[:length])
+            with self.subTest(length=length), self.assertRaises(ValueError):
+                self.read_everything()
+
+    def test_damaged_archives_raise_only_value_error(self):
+        rnd = random.Random(FUZZ_SEED)
+        for round_number in range(FUZZ_ROUNDS):
+            data = bytearray(self.data)
+            kind = rnd.randrange(3)
+            if kind == 0:
+                for _ in range(rnd.randint(1, 5)):
+                    data[rnd.randrange(len(data))] = rnd.randrange(256)
+            elif kind == 1:
+                del data[rnd.randrange(len(data)):]
+            else:
+                # The header's section offsets and count
+                data[rnd.randrange(6, 38)] = rnd.randrange(256)
+            self.write(bytes(data))
+            with self.subTest(round=round_number):
+                try:
+                    self.read_everything()
+                except ValueError:
+                    pass
+
+    def test_extract(self):
+        output = os.path.join(self.directory.name, "out")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(run_extract(self.path, output, jobs=1), 0)
+        for name, config in self.profiles:
+            self.assertEqual(load_profile(os.path.join(output, *name.split('/'))), config)
+
+    def test_extract_corrupt_archive_exits_with_2(self):
+        output = os.path.join(self.directory.name, "out")
+        for data in (self.data[:len(self.data) - 10], b"not an archive at all, just some bytes" * 2):
+            self.write(data)
+            stderr = io.StringIO()
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(stderr):
+                self.assertEqual(run_extract(self.path, output, jobs=1), 2)
+            self.assertIn("archive", stderr.getvalue())
+            self.assertNotIn("Traceback", stderr.getvalue())
+
+    def test_extract_refuses_unsafe_names(self):
+        writer = ProfileArchiveWriter()
+        unsafe = ["../evil.json", "a/../../x.json", "/abs.json", "C:x.json", "a\\..\\x.json"]
+        for name in unsafe + ["ok/p.json"]:
+            writer.add(name, SandboxConfig().to_dict())
+        self.write(writer.to_bytes())
+        output = os.path.join(self.directory.name, "nested", "out")
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(stderr):
+            self.assertEqual(run_extract(self.path, output, jobs=1), 1)
+        self.assertEqual(stderr.getvalue().count("unsafe profile name"), len(unsafe))
+        self.assertTrue(os.path.isfile(os.path.join(output, "ok", "p.json")))
+        self.assertEqual(os.listdir(os.path.dirname(output)), ["out"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for bulk edits of profile files: dry runs, rollback and backups
+
+Usage: python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sandbox_config
+from sandbox_config import (
+    BulkEdit, MappedFolder, SandboxConfig, bulk_edit_profile, bulk_edit_profiles,
+    load_profile, profile_resolver, run_bulk_edit, save_profile
+)
+
+EDIT = BulkEdit(preset='secure', memory_mb=8192,
+                add_folders=[{'host_folder': "C:\\Tools", 'sandbox_folder': "C:\\Tools"}])
+
+
+class BulkEditTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(profile_resolver.clear)
+        self.paths = []
+        for i in range(5):
+            config = SandboxConfig(memory_mb=2048 + i, mapped_folders=[
+                MappedFolder(f"D:\\Projects\\repo{i}", f"C:\\repo{i}", True)
+            ])
+            path = os.path.join(self.directory.name, f"profile{i}.json")
+            save_profile(config.to_dict(), path)
+            self.paths.append(path)
+        # The base is not part of the edit
+        self.base = os.path.join(self.directory.name, "base.json")
+        save_profile(SandboxConfig(memory_mb=1024).to_dict(), self.base)
+        self.derived = os.path.join(self.directory.name, "derived.json")
+        save_profile({'extends': "base.json", 'hostname_enabled': True, 'hostname_value': "box"},
+                     self.derived)
+        self.paths.append(self.derived)
+
+    def contents(self):
+        """Every file in the directory and its bytes"""
+        contents = {}
+        for name in sorted(os.listdir(self.directory.name)):
+            with open(os.path.join(self.directory.name, name), 'rb') as f:
+                contents[name] = f.read()
+        return contents
+
+    def failing_save(self, failing_path):
+        """save_profile that writes failing_path and then fails, as a crash mid-save would"""
+        def save(config, file_path, backups=0):
+            written = save_profile(config, file_path, backups)
+            if os.path.abspath(file_path) == os.path.abspath(failing_path):
+                raise OSError("disk full")
+            return written
+        return mock.patch.object(sandbox_config, 'save_profile', save)
+
+    def test_dry_run_leaves_files_untouched(self):
+        before = self.contents()
+        stamps = [os.stat(path).st_mtime_ns for path in self.paths]
+        results = list(bulk_edit_profiles(self.paths, EDIT, jobs=1, dry_run=True))
+        self.assertEqual(self.contents(), before)
+        self.assertEqual([os.stat(path).st_mtime_ns for path in self.paths], stamps)
+        self.assertEqual(len(results), len(self.paths))
+        self.assertTrue(all(error is None and diff and not written for _, error, diff, written in results))
+
+    def test_edits_every_profile(self):
+        results = list(bulk_edit_profiles(self.paths, EDIT, jobs=1))
+        self.assertTrue(all(error is None and written for _, error, _, written in results))
+        for path in self.paths:
+            config = profile_resolver.resolve(path)
+            self.assertEqual(config['memory_mb'], 8192)
+            self.assertFalse(config['networking_enabled'])
+            self.assertIn("C:\\Tools", [folder['host_folder'] for folder in config['mapped_folders']])
+        # A derived profile stays derived, holding only its overrides
+        stored = load_profile(self.derived)
+        self.assertEqual(stored['extends'], "base.json")
+        self.assertEqual(stored['memory_mb'], 8192)
+        self.assertNotIn('audio_input_enabled', stored)
+        self.assertEqual(profile_resolver.resolve(self.derived)['hostname_value'], "box")
+        self.assertEqual(load_profile(self.base)['memory_mb'], 1024)
+        self.assertFalse([name for name in os.listdir(self.directory.name) if name.endswith('.orig')])
+
+        # Editing again changes nothing
+        results = list(bulk_edit_profiles(self.paths, EDIT, jobs=1))
+        self.assertTrue(all(error is None and not diff for _, error, diff, _ in results))
+
+    def test_failed_write_is_rolled_back(self):
+        before = self.contents()
+        with self.failing_save(self.paths[2]):
+            path, error, diff, written = bulk_edit_profile(self.paths[2], EDIT)
+        self.assertIn("original restored", error)
+        self.assertFalse(written)
+        self.assertEqual(self.contents(), before)
+        self.assertEqual(profile_resolver.resolve(self.paths[2])['memory_mb'], 2050)
+
+    def test_failure_does_not_stop_the_batch(self):
+        with self.failing_save(self.paths[2]):
+            results = list(bulk_edit_profiles(self.paths, EDIT, jobs=1))
+        errors = {os.path.basename(path): error for path, error, _, _ in results if error}
+        self.assertEqual(list(errors), ["profile2.json"])
+        self.assertEqual(profile_resolver.resolve(self.paths[2])['memory_mb'], 2050)
+        self.assertEqual(profile_resolver.resolve(self.paths[4])['memory_mb'], 8192)
+
+    def test_atomic_batch_rolls_back_every_written_profile(self):
+        before = self.contents()
+        with self.failing_save(self.paths[3]):
+            results = list(bulk_edit_profiles(self.paths, EDIT, jobs=1, atomic=True))
+        # Profiles written before and after the failure are all restored
+        self.assertEqual(self.contents(), before)
+        self.assertEqual(len(results), len(self.paths))
+        self.assertTrue(all(error and not written for _, error, _, written in results))
+        rolled_back = [path for path, error, _, _ in results if "rolled back" in error]
+        self.assertEqual(len(rolled_back), len(self.paths) - 1)
+        for path in self.paths:
+            self.assertNotEqual(profile_resolver.resolve(path)['memory_mb'], 8192)
+
+    def test_atomic_batch_without_failures_edits_everything(self):
+        results = list(bulk_edit_profiles(self.paths + self.paths[:2], EDIT, jobs=1, atomic=True))
+        self.assertEqual(len(results), len(self.paths))
+        self.assertTrue(all(error is None and written for _, error, _, written in results))
+        self.assertFalse([name for name in os.listdir(self.directory.name) if name.endswith('.orig')])
+        self.assertEqual(profile_resolver.resolve(self.paths[1])['memory_mb'], 8192)
+
+    def test_backups_rotate(self):
+        path = self.paths[1]
+        with open(path, 'rb') as f:
+            original = f.read()
+        edits = [BulkEdit(memory_mb=memory) for memory in (4000, 5000, 6000)]
+        for edit in edits:
+            _, error, _, written = bulk_edit_profile(path, edit, backups=2)
+            self.assertIsNone(error)
+            self.assertTrue(written)
+        self.assertEqual(load_profile(path)['memory_mb'], 6000)
+        self.assertEqual(load_profile(path + ".bak1")['memory_mb'], 5000)
+        self.assertEqual(load_profile(path + ".bak2")['memory_mb'], 4000)
+        self.assertFalse(os.path.exists(path + ".bak3"))
+
+        # A rolled back edit leaves the current file and its content intact
+        with open(path, 'rb') as f:
+            current = f.read()
+        with self.failing_save(path):
+            self.assertIsNotNone(bulk_edit_profile(path, BulkEdit(memory_mb=7000), backups=2)[1])
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), current)
+        self.assertNotEqual(current, original)
+
+    def test_wsb_files_are_not_edited(self):
+        path = os.path.join(self.directory.name, "compiled.wsb")
+        sandbox_config.save_wsb(SandboxConfig(), path)
+        before = self.contents()
+        _, error, _, written = bulk_edit_profile(path, EDIT)
+        self.assertIn("not a JSON profile", error)
+        self.assertFalse(written)
+        self.assertEqual(self.contents(), before)
+
+    def test_run_bulk_edit(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(run_bulk_edit([self.directory.name], EDIT, jobs=1, dry_run=True), 0)
+            self.assertEqual(run_bulk_edit([self.directory.name], BulkEdit()), 2)
+            self.assertEqual(run_bulk_edit([self.directory.name], EDIT, jobs=1), 0)
+        # The directory also holds the base, and once it is edited the derived profile needs nothing
+        self.assertIn("Would change 7/7 profiles", stdout.getvalue())
+        self.assertIn("Changed 6/7 profiles", stdout.getvalue())
+        self.assertIn("1 unchanged, 0 failed", stdout.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
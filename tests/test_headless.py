@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Checks that scripted, non-GUI use never loads Qt
+
+Each case runs in a fresh interpreter, since this process may already have
+imported PySide6.
+
+Usage: python -m unittest discover tests
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILE = {
+    "memory_mb": 8192,
+    "mapped_folders": [
+        {"host_folder": "C:\\Projects", "sandbox_folder": "C:\\Users\\WDAGUtilityAccount\\Desktop\\Projects",
+         "read_only": True}
+    ]
+}
+
+# Runs a headless compile, then reports its exit code and whether Qt was imported
+COMPILE_API = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from sandbox_config import compile_profiles
+errors = [error for _, error, _ in compile_profiles(sys.argv[2], sys.argv[3], jobs=1) if error]
+print(json.dumps({"code": 1 if errors else 0, "qt": "PySide6" in sys.modules}))
+"""
+
+COMPILE_CLI = """
+import json, os, runpy, sys
+script = os.path.join(sys.argv[1], "SandBoxGUI.py")
+sys.argv = [script, "--compile", sys.argv[2], "-o", sys.argv[3], "-j", "1"]
+try:
+    runpy.run_path(script, run_name="__main__")
+    code = 0
+except SystemExit as e:
+    code = e.code
+print(json.dumps({"code": code, "qt": "PySide6" in sys.modules}))
+"""
+
+
+class HeadlessCompileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.source = os.path.join(self.directory.name, "profiles")
+        self.output = os.path.join(self.directory.name, "wsb")
+        os.makedirs(self.source)
+        with open(os.path.join(self.source, "dev.json"), 'w', encoding='utf-8') as f:
+            json.dump(PROFILE, f)
+
+    def run_headless(self, code):
+        result = subprocess.run(
+            [sys.executable, "-c", code, ROOT, self.source, self.output],
+            capture_output=True, text=True, timeout=120
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def assert_compiled_without_qt(self, report):
+        self.assertEqual(report["code"], 0)
+        self.assertTrue(os.path.isfile(os.path.join(self.output, "dev.wsb")))
+        self.assertFalse(report["qt"], "headless compile imported PySide6")
+
+    def test_compile_profiles(self):
+        self.assert_compiled_without_qt(self.run_headless(COMPILE_API))
+
+    def test_command_line_compile(self):
+        self.assert_compiled_without_qt(self.run_headless(COMPILE_CLI))
+
+
+if __name__ == "__main__":
+    unittest.main()
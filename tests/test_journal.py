@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for crash recovery: EditJournal and recover_journal
+
+Usage: python -m unittest discover tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sandbox_config import EditJournal, MappedFolder, SandboxConfig, apply_journal_edit, recover_journal
+
+FOLDER = MappedFolder("D:\\Projects", "C:\\Projects", True).to_dict()
+
+EDITS = [
+    {'op': 'set', 'field': 'memory_mb', 'value': 8192},
+    {'op': 'insert_folders', 'row': 0, 'folders': [FOLDER, dict(FOLDER, host_folder="E:\\Data")]},
+    {'op': 'update_folder', 'row': 1, 'folder': dict(FOLDER, read_only=False)},
+    {'op': 'remove_folders', 'row': 0, 'count': 1},
+    {'op': 'set', 'field': 'hostname_value', 'value': "box"},
+]
+
+
+def replay(config, edits):
+    config = json.loads(json.dumps(config))
+    for edit in edits:
+        apply_journal_edit(config, edit)
+    return config
+
+
+class EditJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.journal = EditJournal(self.directory.name)
+        self.addCleanup(self.journal.discard)
+        self.config = SandboxConfig(memory_mb=2048).to_dict()
+
+    def record(self, edits):
+        for edit in edits:
+            self.journal.record(edit)
+            # One line per edit, as the window's flush timer would write them
+            self.journal.flush()
+
+    def crash(self):
+        """Leave the files behind as a session that did not exit cleanly would"""
+        self.journal._file.close()
+        self.journal._file = None
+
+    def test_recovers_every_edit(self):
+        self.journal.start(self.config, "/profiles/dev.json", saved=True)
+        self.record(EDITS)
+        self.crash()
+        self.assertEqual(recover_journal(self.directory.name),
+                         (replay(self.config, EDITS), "/profiles/dev.json"))
+
+    def test_torn_last_line_keeps_earlier_edits(self):
+        self.journal.start(self.config)
+        self.record(EDITS)
+        self.crash()
+        with open(self.journal.journal_path, 'r+', encoding='utf-8') as f:
+            content = f.read()
+            # Cut the last edit off halfway through, as a crash mid-write would
+            f.seek(0)
+            f.truncate()
+            f.write(content[:len(content) - len(json.dumps(EDITS[-1])) // 2 - 1])
+        config, current_file = recover_journal(self.directory.name)
+        self.assertEqual(config, replay(self.config, EDITS[:-1]))
+        self.assertIsNone(current_file)
+
+    def test_corrupt_line_ends_the_replay(self):
+        self.journal.start(self.config)
+        self.record(EDITS[:2])
+        self.journal._file.write("not json\n")
+        self.record(EDITS[2:])
+        self.crash()
+        config, _ = recover_journal(self.directory.name)
+        self.assertEqual(config, replay(self.config, EDITS[:2]))
+
+    def test_edits_from_another_generation_are_not_replayed(self):
+        self.journal.start(self.config, saved=False)
+        self.record(EDITS)
+        self.crash()
+        # As if a compaction replaced the snapshot but not yet the edit log
+        compacted = replay(self.config, EDITS)
+        with open(self.journal.snapshot_path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        snapshot.update(generation="0" * 32, config=compacted)
+        with open(self.journal.snapshot_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        config, _ = recover_journal(self.directory.name)
+        # Replaying the old log again would remove a second folder
+        self.assertEqual(config, compacted)
+
+        # A saved snapshot with only a stale log has nothing to recover
+        snapshot['saved'] = True
+        with open(self.journal.snapshot_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        self.assertIsNone(recover_journal(self.directory.name))
+
+    def test_saved_snapshot_without_edits_is_not_recovered(self):
+        self.journal.start(self.config, "/profiles/dev.json", saved=True)
+        self.crash()
+        self.assertIsNone(recover_journal(self.directory.name))
+
+        # Edits that never reached the log do not count either
+        self.journal.start(self.config, "/profiles/dev.json", saved=True)
+        self.journal.record(EDITS[0])
+        self.crash()
+        self.assertIsNone(recover_journal(self.directory.name))
+
+    def test_unsaved_snapshot_without_edits_is_recovered(self):
+        self.journal.start(self.config, saved=False)
+        self.crash()
+        self.assertEqual(recover_journal(self.directory.name), (self.config, None))
+
+    def test_compaction_folds_edits_into_the_snapshot(self):
+        self.journal.start(self.config, "/profiles/dev.json", saved=True)
+        self.record(EDITS)
+        self.assertEqual(self.journal.edit_count, len(EDITS))
+        compacted = replay(self.config, EDITS)
+        self.journal.compact(compacted, "/profiles/dev.json")
+        self.assertEqual(self.journal.edit_count, 0)
+        self.record(EDITS[:1])
+        self.crash()
+        self.assertEqual(recover_journal(self.directory.name),
+                         (replay(compacted, EDITS[:1]), "/profiles/dev.json"))
+
+    def test_consecutive_changes_to_one_field_share_a_line(self):
+        self.journal.start(self.config)
+        for memory in (1000, 2000, 3000):
+            self.journal.record({'op': 'set', 'field': 'memory_mb', 'value': memory})
+        self.journal.flush()
+        self.assertEqual(self.journal.edit_count, 1)
+        self.crash()
+        self.assertEqual(recover_journal(self.directory.name)[0]['memory_mb'], 3000)
+
+    def test_missing_or_damaged_journal(self):
+        self.assertIsNone(recover_journal(self.directory.name))
+        os.makedirs(self.directory.name, exist_ok=True)
+        with open(self.journal.snapshot_path, 'w', encoding='utf-8') as f:
+            f.write('{"generation": ')
+        self.assertIsNone(recover_journal(self.directory.name))
+
+    def test_discard_removes_the_files(self):
+        self.journal.start(self.config)
+        self.record(EDITS)
+        self.journal.discard()
+        self.assertFalse(os.path.exists(self.journal.snapshot_path))
+        self.assertFalse(os.path.exists(self.journal.journal_path))
+        self.assertIsNone(recover_journal(self.directory.name))
+
+
+if __name__ == "__main__":
+    unittest.main()
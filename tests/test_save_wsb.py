@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for saving .wsb files: save_wsb and stream_if_changed
+
+Usage: python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sandbox_config import MappedFolder, SandboxConfig, render_wsb, save_wsb, stream_if_changed
+
+
+def make_config(folders=3000):
+    return SandboxConfig(
+        logon_command="cmd.exe /c echo \"a & b\"",
+        mapped_folders=[MappedFolder(f"D:\\Projects\\<repo{i}>\\ü", f"C:\\repo{i}", i % 2 == 0)
+                        for i in range(folders)]
+    )
+
+
+class SaveWsbTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "dev.wsb")
+        self.config = make_config()
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def test_streamed_output_matches_render_wsb(self):
+        self.assertTrue(save_wsb(self.config, self.path))
+        # Larger than one block, so the writer flushed more than once
+        self.assertEqual(self.read(), render_wsb(self.config).replace('\n', os.linesep).encode('utf-8'))
+
+    def test_unchanged_file_is_left_alone(self):
+        save_wsb(self.config, self.path)
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(save_wsb(self.config, self.path))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.assertEqual(os.listdir(self.directory.name), ["dev.wsb"])
+
+        self.config.memory_mb = 1234
+        self.assertTrue(save_wsb(self.config, self.path, backups=1))
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["dev.wsb", "dev.wsb.bak1"])
+        self.assertIn(b"<MemoryInMB>1234</MemoryInMB>", self.read())
+
+    def test_failure_leaves_the_file_and_no_temporary(self):
+        save_wsb(self.config, self.path)
+        before = self.read()
+
+        def produce(f):
+            f.write("x" * 100000)
+            raise OSError("disk full")
+
+        with self.assertRaises(OSError):
+            stream_if_changed(self.path, produce)
+        self.assertEqual(self.read(), before)
+        self.assertEqual(os.listdir(self.directory.name), ["dev.wsb"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for UndoHistory, replaying its steps with apply_journal_edit
+
+Usage: python -m unittest discover tests
+"""
+
+import os
+import random
+import sys
+import tracemalloc
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sandbox_config
+from sandbox_config import SANDBOX_SHARED_FOLDER, SandboxConfig, UndoHistory, apply_journal_edit
+
+FOLDERS = 20000
+STEPS = 300
+
+
+def make_config(folders=FOLDERS):
+    config = SandboxConfig().to_dict()
+    config['mapped_folders'] = [
+        {'host_folder': f"D:\\Projects\\repo{i}", 'sandbox_folder': f"{SANDBOX_SHARED_FOLDER}\\repo{i}",
+         'read_only': i % 2 == 0}
+        for i in range(folders)
+    ]
+    return config
+
+
+def snapshot(config):
+    """Copy of config that later edits cannot change; folder dictionaries are replaced, never mutated"""
+    copy = dict(config)
+    copy['mapped_folders'] = list(config['mapped_folders'])
+    return copy
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class UndoHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch.object(sandbox_config.time, 'monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.history = UndoHistory()
+        self.config = make_config()
+        self.apply = lambda edit: apply_journal_edit(self.config, edit)
+
+    def edit(self, edit, inverse, key=None):
+        """Apply an edit to the configuration and record it, as the window does"""
+        self.apply(edit)
+        self.history.record(edit, inverse, key)
+
+    def set_field(self, field, value):
+        previous = self.config[field]
+        self.edit({'op': 'set', 'field': field, 'value': value},
+                  {'op': 'set', 'field': field, 'value': previous}, field)
+
+    def random_step(self, rnd, step):
+        folders = self.config['mapped_folders']
+        choice = rnd.randrange(4)
+        if choice == 0:
+            self.set_field('memory_mb', 1024 + step)
+        elif choice == 1:
+            row = rnd.randrange(len(folders) + 1)
+            added = [{'host_folder': f"E:\\new{step}\\{i}", 'sandbox_folder': f"C:\\new{step}\\{i}",
+                      'read_only': False} for i in range(rnd.randint(1, 3))]
+            self.edit({'op': 'insert_folders', 'row': row, 'folders': added},
+                      {'op': 'remove_folders', 'row': row, 'count': len(added)}, 'folders')
+        elif choice == 2:
+            row = rnd.randrange(len(folders) - 2)
+            removed = folders[row:row + 2]
+            self.edit({'op': 'remove_folders', 'row': row, 'count': 2},
+                      {'op': 'insert_folders', 'row': row, 'folders': removed}, 'folders')
+        else:
+            row = rnd.randrange(len(folders))
+            previous = folders[row]
+            folder = dict(previous, read_only=not previous['read_only'])
+            self.edit({'op': 'update_folder', 'row': row, 'folder': folder},
+                      {'op': 'update_folder', 'row': row, 'folder': previous}, 'folders')
+
+    def test_undo_and_redo_many_steps_on_a_large_profile(self):
+        rnd = random.Random(15)
+        states = [snapshot(self.config)]
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            for step in range(STEPS):
+                # Past the merge window, so every edit is a step of its own
+                self.clock.now += UndoHistory.MERGE_SECONDS + 1
+                self.random_step(rnd, step)
+                states.append(snapshot(self.config))
+            states_size = sum(sys.getsizeof(state['mapped_folders']) for state in states)
+            grown = tracemalloc.get_traced_memory()[0] - before - states_size
+        finally:
+            tracemalloc.stop()
+        # History keeps only what changed, never a copy of the 20,000 folders
+        self.assertLess(grown, 1 << 20)
+
+        for expected in reversed(states[:-1]):
+            self.assertTrue(self.history.undo(self.apply))
+            self.assertEqual(self.config, expected)
+        self.assertFalse(self.history.can_undo)
+        self.assertFalse(self.history.undo(self.apply))
+
+        for expected in states[1:]:
+            self.assertTrue(self.history.redo(self.apply))
+            self.assertEqual(self.config, expected)
+        self.assertFalse(self.history.can_redo)
+
+    def test_edits_to_one_key_merge_within_the_merge_window(self):
+        original = snapshot(self.config)
+        for value in (1000, 2000, 3000):
+            self.clock.now += UndoHistory.MERGE_SECONDS / 2
+            self.set_field('memory_mb', value)
+        self.history.undo(self.apply)
+        self.assertEqual(self.config, original)
+        self.assertFalse(self.history.can_undo)
+
+    def test_edits_do_not_merge_across_keys_time_or_close_step(self):
+        self.set_field('memory_mb', 1000)
+        self.set_field('hostname_value', "box")
+        self.clock.now += UndoHistory.MERGE_SECONDS + 1
+        self.set_field('hostname_value', "box2")
+        self.history.close_step()
+        self.set_field('hostname_value', "box3")
+
+        expected = ["box2", "box", "", ""]
+        for hostname in expected:
+            self.history.undo(self.apply)
+            self.assertEqual(self.config['hostname_value'], hostname)
+        self.assertEqual(self.config['memory_mb'], SandboxConfig().memory_mb)
+        self.assertFalse(self.history.can_undo)
+
+    def test_group_is_one_step(self):
+        self.set_field('memory_mb', 1000)
+        original = snapshot(self.config)
+        self.history.begin_group()
+        self.set_field('memory_mb', 8192)
+        self.history.begin_group()
+        self.set_field('networking_enabled', False)
+        self.history.end_group()
+        self.clock.now += UndoHistory.MERGE_SECONDS + 1
+        self.edit({'op': 'remove_folders', 'row': 0, 'count': 1},
+                  {'op': 'insert_folders', 'row': 0, 'folders': self.config['mapped_folders'][:1]}, 'folders')
+        self.history.end_group()
+        changed = snapshot(self.config)
+        # The next edit starts a step of its own, even with the group's last key
+        self.set_field('memory_mb', 2048)
+
+        self.history.undo(self.apply)
+        self.assertEqual(self.config, changed)
+        self.history.undo(self.apply)
+        self.assertEqual(self.config, original)
+        self.history.redo(self.apply)
+        self.assertEqual(self.config, changed)
+
+    def test_new_edit_clears_redo(self):
+        self.set_field('memory_mb', 1000)
+        self.clock.now += UndoHistory.MERGE_SECONDS + 1
+        self.set_field('memory_mb', 2000)
+        self.history.undo(self.apply)
+        self.assertTrue(self.history.can_redo)
+        self.set_field('hostname_value', "box")
+        self.assertFalse(self.history.can_redo)
+        self.assertFalse(self.history.redo(self.apply))
+        self.assertEqual(self.config['memory_mb'], 1000)
+
+    def test_oldest_steps_are_dropped_past_max_steps(self):
+        self.history.MAX_STEPS = 10
+        for step in range(25):
+            self.clock.now += UndoHistory.MERGE_SECONDS + 1
+            self.set_field('memory_mb', 1000 + step)
+        undone = 0
+        while self.history.undo(self.apply):
+            undone += 1
+        self.assertEqual(undone, 10)
+        self.assertEqual(self.config['memory_mb'], 1014)
+
+    def test_oldest_steps_are_dropped_past_max_weight(self):
+        # Each list replacement holds every folder twice, the new and the old list
+        self.history.MAX_WEIGHT = 3 * FOLDERS
+        original = self.config['mapped_folders']
+        for step in range(3):
+            self.clock.now += UndoHistory.MERGE_SECONDS + 1
+            folders = self.config['mapped_folders'][1:] + self.config['mapped_folders'][:1]
+            self.edit({'op': 'set_folders', 'folders': folders},
+                      {'op': 'set_folders', 'folders': self.config['mapped_folders']}, 'folders')
+        self.assertTrue(self.history.undo(self.apply))
+        self.assertFalse(self.history.can_undo)
+        self.assertEqual(self.config['mapped_folders'], original[2:] + original[:2])
+
+        # The newest step is always kept, however heavy
+        self.history.MAX_WEIGHT = 1
+        self.history.redo(self.apply)
+        self.assertTrue(self.history.can_undo)
+
+
+if __name__ == "__main__":
+    unittest.main()